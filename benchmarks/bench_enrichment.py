@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment import add_age_columns, points_per_game, stats_missing_by_team
+from phase1_2023_2024_age_aware_final import get_birth_year_from_code, get_class_from_birth_year
+from synthetic import make_local_stats
+
+LOCAL_COLUMNS = {" Player ": "Player", "GamesPlayed": "GP", "Goals": "G", "Assists": "A"}
+CLASS_SETS = [("AAA", "U15", ""), ("Canada", "", ""), ("nan", "Major", "CAN-West"), ("", "", "")]
+
+
+def legacy_age_columns(df, season_end, classes):
+    # scrape_league's row-wise apply calls, kept as the reference
+    context = dict(zip(["Class 1", "Class 2", "Class 3"], classes))
+    df["IsCanadian"] = df.apply(lambda x: any("can" in str(context[k]).lower() for k in ["Class 1", "Class 2", "Class 3"]), axis=1)
+    df["BirthYear"] = df["AgeLevel"].apply(lambda code: get_birth_year_from_code(code, season_end, False))
+    df["BirthYear"] = df.apply(lambda row: get_birth_year_from_code(row["AgeLevel"], season_end, row["IsCanadian"]), axis=1)
+    df["ClassLevel"] = df.apply(lambda row: get_class_from_birth_year(row["BirthYear"], season_end, row["IsCanadian"]), axis=1)
+    return df
+
+
+def legacy_ppg(df):
+    return df.apply(lambda r: (r["G"] + r["A"]) / r["GP"] if r["GP"] > 0 else 0, axis=1)
+
+
+def legacy_stats_missing(df):
+    # The groupby-apply the phase 2 build used before checkpointing
+    return df.groupby("Team")["GP"].apply(lambda gp: (gp.fillna(0) < 10).all())
+
+
+def ranking_table(n, missing, seed):
+    rng = np.random.default_rng(seed)
+    ages = rng.choice(["08", "10", "12", "14", "15", "16", "18"], n).astype(object)
+    ages[rng.random(n) < missing] = ""
+    return pd.DataFrame({"Team": [f"Team {i}" for i in range(n)], "AgeLevel": pd.array(ages, dtype="str")})
+
+
+def local_stats(rows, seed):
+    # make_local_stats with phase 2's column names and a team for every 25 players
+    df = make_local_stats(rows, seed).rename(columns=LOCAL_COLUMNS)
+    df["Team"] = "T" + (df.index // 25).astype(str)
+    return df
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timing of the column-wise enrichment vs the row-wise apply calls it replaced")
+    parser.add_argument("--rows", type=int, default=200_000, help="players for the PPG and StatsMissing timings")
+    parser.add_argument("--teams", type=int, default=5_000, help="ranking rows for the age column timing")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Equivalence with the row-wise code is checked in tests/test_enrichment.py
+    ranking = ranking_table(args.teams, 0.1, args.seed)
+    stats = local_stats(args.rows, args.seed)
+    cases = {
+        f"age columns ({args.teams} teams)": (lambda: legacy_age_columns(ranking.copy(), 2024, CLASS_SETS[1]),
+                                              lambda: add_age_columns(ranking.copy(), 2024, CLASS_SETS[1])),
+        f"PPG ({args.rows} players)": (lambda: legacy_ppg(stats),
+                                       lambda: points_per_game(stats["G"], stats["A"], stats["GP"])),
+        f"StatsMissing ({args.rows} players)": (lambda: legacy_stats_missing(stats),
+                                                lambda: stats_missing_by_team(stats["Team"], stats["GP"])),
+    }
+    print(f"{'case':<34}{'apply ms':>10}{'vector ms':>11}{'speedup':>9}")
+    for name, (old, new) in cases.items():
+        _, old_s = timed(old, args.repeat)
+        _, new_s = timed(new, args.repeat)
+        print(f"{name:<34}{old_s * 1000:>10.1f}{new_s * 1000:>11.1f}{old_s / new_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
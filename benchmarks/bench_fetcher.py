@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_loader
+from page_loader import configure_cache, configure_http, prefetch
+from stub_server import serve, FIXTURE_DIR
+from telemetry import start_run, finish_run
+
+import phase1_2023_2024_age_aware_final as phase1
+
+MHR_ROUTE = "/rankings/alberta-u18-aaa"
+
+
+class FakeBrowser:
+    # Pretends to be Chrome: every load costs `load_seconds`, and the pages in
+    # `rendered` come back as they look after their scripts have run.
+
+    def __init__(self, load_seconds, rendered=None):
+        self.load_seconds = load_seconds
+        self.rendered = rendered or {}
+        self.loads = 0
+        self.page_source = ""
+
+    def get(self, url):
+        self.loads += 1
+        time.sleep(self.load_seconds)
+        path = url.split("?")[0].split("/", 3)[-1]
+        name = self.rendered.get(("/" + path, "?tab=stats" in url))
+        if name:
+            with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+                self.page_source = f.read()
+        else:
+            with urllib.request.urlopen(url) as response:
+                self.page_source = response.read().decode("utf-8")
+
+    def execute_script(self, script, *args):
+        if "readyState" in script:
+            return "complete"
+        return self.page_source.count("<tr")
+
+    def quit(self):
+        pass
+
+
+def bench_mhr(base_url, pages, browser_seconds, use_http):
+    configure_http(enabled=use_http)
+    page_loader.PREFETCHED.clear()
+    browser = FakeBrowser(browser_seconds)
+    urls = [f"{base_url}{MHR_ROUTE}?page={i}" for i in range(pages)]
+    start = time.perf_counter()
+    prefetch(urls, phase1.MHR_EXPECT)
+    frames = [phase1.scrape_mhr_with_links(browser, url) for url in urls]
+    elapsed = time.perf_counter() - start
+    return elapsed, browser.loads, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plain-HTTP fast path vs browser loads against the stub server")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--browser-seconds", type=float, default=1.0, help="simulated cost of one Chrome page load")
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated server latency per request")
+    args = parser.parse_args()
+
+    configure_cache(enabled=False)
+    start_run("bench_fetcher", path="")
+    with serve(delay=args.latency) as (base_url, handler):
+        http_time, http_loads, http_frames = bench_mhr(base_url, args.pages, args.browser_seconds, True)
+        browser_time, browser_loads, browser_frames = bench_mhr(base_url, args.pages, args.browser_seconds, False)
+        same = all(a.equals(b) for a, b in zip(http_frames, browser_frames))
+        print(f"MHR x{args.pages}: http {http_time:.2f}s ({http_time / args.pages * 1000:.0f} ms/page, {http_loads} browser loads) | "
+              f"browser {browser_time:.2f}s ({browser_loads} loads) | {len(http_frames[0])} teams/page | identical: {same}")
+        print(f"Stub server handled {handler.requests} requests")
+    # Page load p50/p95 per source come from the telemetry summary
+    finish_run()
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
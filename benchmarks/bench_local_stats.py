@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_stats import LocalStatsCache, ingest_local_stats, ingest_pool, normalize_local_stats, INGEST_WORKERS
+from synthetic import make_local_stats
+from telemetry import start_run, finish_run, TELEMETRY
+
+
+def write_sheets(root, files, rows, seed):
+    paths = []
+    for i in range(files):
+        path = os.path.join(root, f"team_{i:04d}.csv")
+        make_local_stats(rows, seed + i, with_position=i % 2 == 0).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def serial(paths):
+    # run_phase2 before: one read_csv at a time, in the loop that drives Chrome
+    return {path: normalize_local_stats(pd.read_csv(path)) for path in paths}
+
+
+def concurrent(paths, workers, cache):
+    with ingest_pool(workers) as pool:
+        futures = ingest_local_stats(paths, pool, cache)
+        return {path: future.result() for path, future in futures.items()}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent, cached LocalStatsFile ingestion vs the serial reads")
+    parser.add_argument("--files", type=int, default=300, help="local stats sheets")
+    parser.add_argument("--rows", type=int, default=2_000, help="players per sheet")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        start_run("bench_local_stats", path="")
+        paths = write_sheets(root, args.files, args.rows, args.seed)
+        cache = LocalStatsCache(os.path.join(root, "cache"))
+
+        expected, serial_s = timed(lambda: serial(paths))
+        cases = [("serial (before)", expected, serial_s)]
+        cases.append(("threads, uncached", *timed(lambda: concurrent(paths, args.workers, None))))
+        cases.append(("threads, cold cache", *timed(lambda: concurrent(paths, args.workers, cache))))
+        cases.append(("threads, warm cache", *timed(lambda: concurrent(paths, args.workers, cache))))
+        # Touched but unchanged sheets are recognized by their hash
+        for path in paths:
+            os.utime(path)
+        cases.append(("threads, touched files", *timed(lambda: concurrent(paths, args.workers, cache))))
+        cached = TELEMETRY.counters.get("phase2.local_stats_cached", 0)
+        finish_run()
+
+    print(f"\n{args.files} sheets x {args.rows} players, {args.workers} workers")
+    print(f"{'case':<24}{'seconds':>9}{'speedup':>9}  same")
+    for name, result, seconds in cases:
+        same = all(result[p].equals(expected[p]) and (result[p].dtypes == expected[p].dtypes).all() for p in paths)
+        print(f"{name:<24}{seconds:>9.2f}{serial_s / seconds:>8.1f}x  {same}")
+    print(f"Cache hits: {cached} of {2 * args.files} expected")
+
+
+if __name__ == "__main__":
+    main()
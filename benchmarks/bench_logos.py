@@ -0,0 +1,162 @@
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+import urllib.request
+import zlib
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import phase2_logo_with_ids as phase2
+from fetcher import HttpPool
+from stub_server import serve, FIXTURE_DIR
+from team_logos import Image, LogoCache, THUMB_SIZE, logo_targets, update_logos
+
+LOGO_ROUTE = "/layout/logos/team-logos/9001.png"
+
+
+def solid_png(width, height, rgb):
+    # A valid PNG without needing Pillow
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    rows = b"".join(b"\x00" + bytes(rgb) * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows, 9)) + chunk(b"IEND", b""))
+
+
+def write_logos(root, team_ids, shared, seed=0):
+    # One logo per team, except every `shared`-th team reuses the logo file
+    # of the team before it (affiliates often do)
+    os.makedirs(os.path.join(root, "logos"), exist_ok=True)
+    paths = {}
+    for i, team_id in enumerate(team_ids):
+        if shared and i % shared == shared - 1 and i:
+            paths[team_id] = paths[team_ids[i - 1]]
+            continue
+        paths[team_id] = f"logos/{team_id}.png"
+        rgb = ((i * 37 + seed) % 256, (i * 91) % 256, (i * 53 + seed * 7) % 256)
+        with open(os.path.join(root, paths[team_id]), "wb") as f:
+            f.write(solid_png(200, 200, rgb))
+    return paths
+
+
+def phase2_rows(base_url, paths, players_per_team):
+    # What the phase 2 output holds: one row per player, the logo URL repeated
+    team_ids = [t for t in paths for _ in range(players_per_team)]
+    return pd.DataFrame({"EP_Team_ID": team_ids, "TeamLogoURL": [f"{base_url}/{paths[t]}" for t in team_ids]})
+
+
+def sequential(df, out_dir):
+    # Baseline: one blocking urllib download per team, no cache
+    os.makedirs(out_dir, exist_ok=True)
+    for team_id, url in logo_targets(df).items():
+        with urllib.request.urlopen(url) as response, open(os.path.join(out_dir, f"{team_id}.png"), "wb") as f:
+            f.write(response.read())
+
+
+def timed_run(label, handler, func):
+    before = handler.requests
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    print(f"{label:<34}{seconds:>8.2f}s{handler.requests - before:>10}  {result or ''}")
+    return result
+
+
+def check_cache(cache, targets, root, paths):
+    # Every team maps to a thumbnail; without Pillow it holds the served bytes
+    problems = []
+    for team_id in targets:
+        entry = cache.get(team_id)
+        if entry is None:
+            problems.append(f"team {team_id}: no thumbnail")
+            continue
+        with open(cache.path(entry["thumb"]), "rb") as f:
+            thumb = f.read()
+        with open(os.path.join(root, paths[team_id]), "rb") as f:
+            served = f.read()
+        if entry["size"] != (THUMB_SIZE if Image is not None else None):
+            problems.append(f"team {team_id}: recorded size {entry['size']} for a logo that was "
+                            f"{'' if Image is not None else 'not '}resized")
+        if os.path.splitext(entry["thumb"])[0] != hashlib.sha1(thumb).hexdigest():
+            problems.append(f"team {team_id}: thumbnail is not named by its content")
+        if thumb[:8] != b"\x89PNG\r\n\x1a\n" or (Image is None and thumb != served):
+            problems.append(f"team {team_id}: thumbnail does not match the served logo")
+    return problems
+
+
+def check_fixture(tmp):
+    # The roster fixture's logo, found by the parser, fetched through the stub route
+    with open(os.path.join(FIXTURE_DIR, "ep_roster.html"), encoding="utf-8") as f:
+        logo_url = phase2.parse_ep_roster(f.read(), "Calgary Flames U18 AAA").attrs["logo_url"]
+    with serve() as (base_url, handler):
+        url = base_url + LOGO_ROUTE
+        cache = LogoCache(os.path.join(tmp, "fixture_logos"))
+        first = update_logos({"9001": url}, cache, pool=HttpPool())
+        again = update_logos({"9001": url}, cache, pool=HttpPool(), max_age=0)
+    ok = logo_url.endswith(LOGO_ROUTE)
+    print(f"fixture: parsed {logo_url}; first run {first}; revalidated {again}; {handler.requests} requests")
+    return ok and first["downloaded"] == 1 and again["not_modified"] == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Team logo stage against the stub server: cold, warm and revalidated runs")
+    parser.add_argument("--teams", type=int, default=300)
+    parser.add_argument("--players-per-team", type=int, default=25)
+    parser.add_argument("--shared", type=int, default=10, help="every Nth team reuses the previous team's logo")
+    parser.add_argument("--changed", type=int, default=15, help="logos replaced on the server before the last run")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated server latency per request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "site")
+        team_ids = [str(10_000 + i) for i in range(args.teams)]
+        paths = write_logos(root, team_ids, args.shared)
+        failed = not check_fixture(tmp)
+
+        with serve(root, delay=args.latency) as (base_url, handler):
+            df = phase2_rows(base_url, paths, args.players_per_team)
+            targets = logo_targets(df)
+            print(f"{len(df):,} phase 2 rows, {len(targets)} teams, {len(set(targets.values()))} distinct logo URLs")
+            print(f"{'run':<34}{'time':>9}{'requests':>10}  result")
+            timed_run("sequential urllib, per team", handler, lambda: sequential(df, os.path.join(tmp, "plain")))
+
+            cache = LogoCache(os.path.join(tmp, "team_logos"))
+            pool = HttpPool()
+            timed_run("update_logos, cold cache", handler, lambda: update_logos(targets, cache, pool))
+            problems = check_cache(cache, targets, root, paths)
+            timed_run("update_logos, re-run", handler, lambda: update_logos(targets, LogoCache(cache.root), pool))
+            timed_run("update_logos, revalidate all", handler,
+                      lambda: update_logos(targets, LogoCache(cache.root), pool, max_age=0))
+
+            # Replace some logos on the server; only those come down again
+            changed = team_ids[:args.changed]
+            later = time.time() + 5
+            for i, team_id in enumerate(changed):
+                path = os.path.join(root, paths[team_id])
+                with open(path, "wb") as f:
+                    f.write(solid_png(200, 200, (255 - i, 255, 0)))
+                os.utime(path, (later, later))
+            cache = LogoCache(cache.root)
+            summary = timed_run("update_logos, after changes", handler,
+                                lambda: update_logos(targets, cache, pool, max_age=0))
+            problems += check_cache(cache, targets, root, paths)
+            expected = sum(1 for t in targets if paths[t] in {paths[c] for c in changed})
+            if summary["downloaded"] != expected:
+                problems.append(f"{summary['downloaded']} logos downloaded after changes, expected {expected}")
+            thumbs = len([f for f in os.listdir(cache.root) if not f.endswith(".json")])
+            print(f"{thumbs} thumbnail files for {len(targets)} teams in {cache.root}")
+
+    for problem in problems:
+        print(f"    {problem}")
+    if failed or problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
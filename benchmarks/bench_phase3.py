@@ -0,0 +1,175 @@
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phase32 import run_phase3
+from phase3_engine import prepare_rosters, class_groups, explode_classes, score_classes
+from synthetic import make_phase2_rosters
+
+
+def legacy_run_phase3(PHASE2_FILE, OUTPUT_DIR, CURRENT_YEAR=2024):
+    # run_phase3 as it was before the grouped engine, kept as the reference for --check.
+    df = pd.read_csv(PHASE2_FILE, low_memory=False, encoding="utf-8")
+    df.columns = [col.strip().lower() for col in df.columns]
+
+    df["player"] = df["player"].astype(str).str.strip()
+    df["player"] = df["player"].apply(lambda x: unicodedata.normalize("NFKD", x).encode("ascii", "ignore").decode("utf-8"))
+
+    df["position"] = df.get("position", "F").fillna("F").astype(str).str.upper().str.strip()
+    df["position"] = df["position"].replace({
+        "F/D": "F", "D/F": "D", "FORWARD": "F", "DEFENSE": "D", "": "F", "-": "F",
+        "LW": "F", "RW": "F", "C": "F", "LD": "D", "RD": "D"
+    })
+    df = df[df["position"].isin(["F", "D"])]
+
+    df = df[~df["player"].str.strip().str.isnumeric()]
+    df = df.drop_duplicates(subset=["player", "team", "gp", "g", "a", "birthyear"])
+    df["gp"] = pd.to_numeric(df["gp"], errors="coerce")
+    df["g"] = pd.to_numeric(df["g"], errors="coerce")
+    df["a"] = pd.to_numeric(df["a"], errors="coerce")
+    df = df.dropna(subset=["gp", "g", "a"])
+    df = df[df["gp"] >= 10]
+    df["birthyear"] = pd.to_numeric(df["birthyear"], errors="coerce")
+    df = df[df["birthyear"] >= 1999]
+    df["age"] = CURRENT_YEAR - df["birthyear"]
+
+    for field in ["class 1", "class 2", "class 3"]:
+        if field not in df.columns:
+            continue
+        for value in df[field].dropna().unique():
+            group_df = df[df[field] == value].copy()
+            if group_df.empty:
+                continue
+
+            group_df["actualppg"] = ((group_df["g"] + group_df["a"]) / group_df["gp"]).round(2)
+            group_df["opponentrating"] = pd.to_numeric(group_df["opponentrating"], errors="coerce")
+            opp_cutoff = group_df["opponentrating"].quantile(0.05)
+            group_df = group_df[group_df["opponentrating"] >= opp_cutoff]
+
+            mean_opp = group_df["opponentrating"].mean()
+            range_opp = max(group_df["opponentrating"].max() - group_df["opponentrating"].min(), 1)
+            sched_strength = (group_df["opponentrating"] - mean_opp) / range_opp
+            sched_multiplier = (1 + (sched_strength * 2.5)).clip(0.5, 1.5)
+            group_df["schedadjppg"] = (group_df["actualppg"] * sched_multiplier).round(2)
+
+            mean_age = group_df["age"].mean()
+            range_age = max(group_df["age"].max() - group_df["age"].min(), 1.5)
+            age_factor = (mean_age - group_df["age"]) / range_age
+            group_df["ageadjppg"] = (group_df["schedadjppg"] * (1 + age_factor * 1.5)).round(2)
+
+            team_totals = group_df.groupby("team")[["g", "a"]].sum().sum(axis=1)
+            player_points = group_df["g"] + group_df["a"]
+            group_df["teampoints"] = group_df["team"].map(team_totals)
+            group_df["pctteampoints"] = player_points / group_df["teampoints"].replace(0, np.nan)
+            group_df["pctcentered"] = group_df["pctteampoints"] - group_df["pctteampoints"].mean()
+            group_df["pctteampointsadjppg"] = (group_df["schedadjppg"] * (1 + group_df["pctcentered"] * 1.5)).round(2)
+
+            group_df["truproscore"] = (
+                (group_df["schedadjppg"] + group_df["ageadjppg"] + group_df["pctteampointsadjppg"]) / 3
+            ).round(2)
+
+            pos_frames = []
+            for pos in ["F", "D"]:
+                pos_df = group_df[group_df["position"] == pos].copy()
+                if not pos_df.empty:
+                    mean_pos = pos_df["truproscore"].mean()
+                    std_pos = pos_df["truproscore"].std()
+                    super_threshold = mean_pos + 2.5 * std_pos + std_pos
+                    pos_df["positional_z_score"] = ((pos_df["truproscore"] - mean_pos) / std_pos).round(2)
+
+                    def assign_prospect_grade(z, score):
+                        if score >= super_threshold:
+                            return "🌟🌟🌟🌟🌟 Star Prospect"
+                        elif z > 2.5: return "⭐⭐⭐⭐ Elite Prospect"
+                        elif z > 2.0: return "⭐⭐⭐ High-End Prospect"
+                        elif z > 1.0: return "⭐⭐ Strong Prospect"
+                        elif z > 0.5: return "⭐ Solid Prospect"
+                        else: return ""
+
+                    pos_df["prospect_grade"] = pos_df.apply(lambda row: assign_prospect_grade(row["positional_z_score"], row["truproscore"]), axis=1)
+                    pos_df["prospectscore"] = pos_df["positional_z_score"]
+                    pos_df["scheddifffromactual"] = (pos_df["schedadjppg"] - pos_df["actualppg"]).round(2)
+                    pos_df["agedifffromactual"] = (pos_df["ageadjppg"] - pos_df["actualppg"]).round(2)
+                    pos_df["truprodifffromactual"] = (pos_df["truproscore"] - pos_df["actualppg"]).round(2)
+                    pos_frames.append(pos_df)
+
+            class_df = pd.concat(pos_frames, axis=0, ignore_index=True)
+            safe_name = re.sub(r'[^a-zA-Z0-9_]+', '_', str(value))[:60]
+            class_df.to_csv(f"{OUTPUT_DIR}/{safe_name}.csv", index=False)
+
+
+
+def compare_outputs(legacy_dir, new_dir):
+    legacy_files = sorted(f for f in os.listdir(legacy_dir) if f.endswith(".csv"))
+    new_files = sorted(f for f in os.listdir(new_dir) if f.endswith(".csv"))
+    assert legacy_files == new_files, f"class files differ: {set(legacy_files) ^ set(new_files)}"
+
+    worst = 0.0
+    for name in legacy_files:
+        old = pd.read_csv(os.path.join(legacy_dir, name), low_memory=False)
+        new = pd.read_csv(os.path.join(new_dir, name), low_memory=False)
+        assert list(old.columns) == list(new.columns), f"{name}: columns differ"
+        assert len(old) == len(new), f"{name}: {len(old)} vs {len(new)} rows"
+        for col in ["truproscore", "positional_z_score"]:
+            diff = np.nanmax(np.abs(old[col].to_numpy(float) - new[col].to_numpy(float)), initial=0.0)
+            worst = max(worst, diff)
+            assert diff <= 0.01 + 1e-9, f"{name}: {col} differs by {diff}"
+            assert (old[col].isna() == new[col].isna()).all(), f"{name}: {col} NaN pattern differs"
+        grades_old = old["prospect_grade"].fillna("")
+        grades_new = new["prospect_grade"].fillna("")
+        mismatched = int((grades_old != grades_new).sum())
+        assert mismatched == 0, f"{name}: {mismatched} prospect grades differ"
+        assert (old["player"].astype(str) == new["player"].astype(str)).all(), f"{name}: row order differs"
+    return len(legacy_files), worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and equivalence check for the phase 3 scoring engine")
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="also run the legacy per-class loop and compare outputs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roster_file = os.path.join(tmp, "phase2_team_rosters.csv")
+        make_phase2_rosters(args.players, seed=args.seed).to_csv(roster_file, index=False)
+        print(f"{args.players:,} synthetic players → {os.path.getsize(roster_file) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        df = prepare_rosters(pd.read_csv(roster_file, low_memory=False), 2024)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        scored = score_classes(explode_classes(df, class_groups(df)))
+        score_time = time.perf_counter() - start
+        print(f"load+clean {load_time:.2f}s | scoring {score_time:.2f}s for {len(scored):,} scored rows")
+        del df, scored
+
+        new_dir = os.path.join(tmp, "engine")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_phase3(roster_file, new_dir)
+        print(f"grouped engine end to end: {time.perf_counter() - start:.2f}s")
+
+        if args.check:
+            legacy_dir = os.path.join(tmp, "legacy")
+            os.makedirs(legacy_dir)
+            start = time.perf_counter()
+            legacy_run_phase3(roster_file, legacy_dir)
+            print(f"legacy loop end to end:    {time.perf_counter() - start:.2f}s")
+            files, worst = compare_outputs(legacy_dir, new_dir)
+            print(f"✅ {files} class files identical (max score difference {worst:.3g})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from synthetic import make_phase2_rosters
+
+# Prints the run's own peak RSS. ru_maxrss would carry over the parent's
+# high-water mark through fork and exec; VmHWM starts fresh with the new image.
+RUN = """
+import sys
+from phase32 import run_phase3
+run_phase3(sys.argv[1], sys.argv[2], chunksize=int(sys.argv[3]))
+with open("/proc/self/status") as f:
+    sys.stderr.write(next(line for line in f if line.startswith("VmHWM:")))
+"""
+
+
+def run_isolated(roster_file, output_dir, chunksize, cwd):
+    # Each run gets its own process so its peak RSS is its own
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([REPO_DIR, os.environ.get("PYTHONPATH", "")]),
+           "TRUPRO_TELEMETRY": ""}
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", RUN, roster_file, output_dir, str(chunksize)],
+                          cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if proc.returncode:
+        raise SystemExit(f"phase 3 run failed (chunksize {chunksize}):\n{proc.stderr}")
+    peak_kb = int(proc.stderr.rsplit("VmHWM:", 1)[1].split()[0])
+    return time.perf_counter() - start, peak_kb / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked phase 3 vs the in-memory run: peak memory and time "
+                                                 "(tests/test_phase3_equivalence.py checks the output is identical)")
+    parser.add_argument("--players", type=int, default=500_000)
+    parser.add_argument("--chunksizes", default="20000,100000", help="comma separated chunk sizes to try")
+    parser.add_argument("--duplicates", type=float, default=0.02, help="fraction of rows repeated later in the file")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roster_file = os.path.join(tmp, "phase2_team_rosters.csv")
+        df = make_phase2_rosters(args.players, seed=args.seed)
+        # Repeats land in later chunks, so cross-chunk deduplication is exercised
+        df = pd.concat([df, df.sample(frac=args.duplicates, random_state=args.seed)], ignore_index=True)
+        df.to_csv(roster_file, index=False)
+        print(f"{len(df):,} roster rows → {os.path.getsize(roster_file) / 1e6:.1f} MB")
+        del df
+
+        print(f"{'mode':<22}{'seconds':>9}{'peak MB':>10}")
+        full_dir = os.path.join(tmp, "in_memory")
+        seconds, peak = run_isolated(roster_file, full_dir, 0, tmp)
+        print(f"{'in memory':<22}{seconds:>9.2f}{peak:>10.0f}")
+        for chunksize in (int(c) for c in args.chunksizes.split(",") if c):
+            seconds, peak = run_isolated(roster_file, os.path.join(tmp, f"chunked_{chunksize}"), chunksize, tmp)
+            print(f"{f'chunks of {chunksize:,}':<22}{seconds:>9.2f}{peak:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import driver_cache
+
+ENTRY_POINTS = ["phase1_2023_2024_age_aware_final", "phase2_logo_with_ids", "phase32", "build_dashboard", "pipeline"]
+BROWSER_MODULES = ("selenium", "webdriver_manager", "undetected_chromedriver", "closerun", "bs4")
+
+IMPORT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({browser!r}))
+print(seconds, ",".join(loaded))
+"""
+
+
+def import_cost(module, cwd, repeat):
+    # Fresh interpreter each time: what a CLI invocation pays before main() runs
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([REPO_DIR, os.environ.get("PYTHONPATH", "")])}
+    best, loaded = None, ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", IMPORT.format(module=module, browser=BROWSER_MODULES)],
+                             cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout.split()
+        wall = time.perf_counter() - start
+        seconds, loaded = float(out[0]), out[1] if len(out) > 1 else ""
+        best = min(best or (wall, seconds), (wall, seconds))
+    return best, loaded
+
+
+def fake_driver(root, version):
+    path = os.path.join(root, "chromedriver")
+    with open(path, "w") as f:
+        f.write(f"#!/bin/sh\necho 'ChromeDriver {version} (fake)'\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+def check_driver_cache(tmp, install_seconds):
+    # webdriver_manager stand-in: each install() costs install_seconds
+    path = fake_driver(tmp, "124.0.6367.91")
+    installs = []
+
+    class ChromeDriverManager:
+        def install(self):
+            installs.append(time.sleep(install_seconds))
+            return path
+
+    chrome = types.ModuleType("webdriver_manager.chrome")
+    chrome.ChromeDriverManager = ChromeDriverManager
+    sys.modules["webdriver_manager"] = types.ModuleType("webdriver_manager")
+    sys.modules["webdriver_manager.chrome"] = chrome
+
+    cache_file = os.path.join(tmp, "chromedriver.json")
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        resolved = driver_cache.resolve_chromedriver(cache_file)
+        timings.append(time.perf_counter() - start)
+    ok = resolved == path and len(installs) == 1
+    os.remove(path)
+    driver_cache.resolve_chromedriver(cache_file)
+    ok = ok and len(installs) == 2
+    print(f"chromedriver: first resolve {timings[0] * 1000:.0f} ms, cached {min(timings[1:]) * 1000:.1f} ms, "
+          f"{len(installs)} installs (second after the binary vanished) | {'ok' if ok else 'WRONG'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import cost of each entry point and the chromedriver cache")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--install-seconds", type=float, default=1.0, help="simulated webdriver_manager resolve time")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'module':<36}{'wall s':>8}{'import s':>10}  browser modules")
+        for module in ENTRY_POINTS:
+            (wall, seconds), loaded = import_cost(module, tmp, args.repeat)
+            print(f"{module:<36}{wall:>8.2f}{seconds:>10.2f}  {loaded or '-'}")
+            failed = failed or bool(loaded)
+        if os.listdir(tmp):
+            print(f"    importing created {sorted(os.listdir(tmp))}")
+            failed = True
+        failed = not check_driver_cache(tmp, args.install_seconds) or failed
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
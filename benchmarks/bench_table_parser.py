@@ -0,0 +1,204 @@
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import table_stream
+import phase1_2023_2024_age_aware_final as phase1
+import phase2_logo_with_ids as phase2
+from names import normalize_name
+from stub_server import FIXTURE_DIR
+
+
+def legacy_parse_mhr_table(html, max_teams=200):
+    # parse_mhr_table before streaming: full html.parser tree, then find_all
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table")
+    if not table:
+        return pd.DataFrame()
+    results = []
+    seen_teams = set()
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) < 7:
+            continue
+        team = cols[1].text.strip()
+        if team in seen_teams:
+            continue
+        seen_teams.add(team)
+        ep_url = None
+        other_links = []
+        for link in cols[6].find_all("a"):
+            href = link.get("href", "")
+            if "eliteprospects.com" in href:
+                ep_url = href
+            else:
+                other_links.append(href)
+        results.append({
+            "Team": team,
+            "NormalizedTeam": normalize_name(team),
+            "AgeLevel": phase1.extract_age_level(team),
+            "Record": cols[2].text.strip(),
+            "TeamRating": re.sub(r"[^\d.]+", "", cols[3].text.strip()),
+            "AGD": re.sub(r"[^\d.-]+", "", cols[4].text.strip()),
+            "OpponentRating": re.sub(r"[^\d.]+", "", cols[5].text.strip()),
+            "EP_URL": ep_url,
+            "OtherLinks": ", ".join(other_links)
+        })
+        if max_teams and len(results) >= max_teams:
+            break
+    return pd.DataFrame(results)
+
+
+def legacy_parse_ep_roster(html, team_name):
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", class_=lambda c: c and c.startswith("SortTable_table"))
+    roster = []
+    current_section = ""
+    for row in table.find_all("tr"):
+        if row.find("th"):
+            section = row.get_text(strip=True).upper()
+            if "GOALTENDER" in section:
+                current_section = "G"
+            elif "DEFENSE" in section:
+                current_section = "D"
+            elif "FORWARD" in section:
+                current_section = "F"
+            continue
+        cols = row.find_all("td")
+        if len(cols) < 1:
+            continue
+        jersey = nationality = player_name = position = birth_year = ""
+        for col in cols:
+            text = col.get_text(strip=True)
+            if not jersey and re.match(r"#?\d{1,2}$", text):
+                jersey = text
+                continue
+            if not nationality:
+                img = col.select_one("div.DualFlag_flagWrapper__Qkagc img") or col.select_one("img[alt]")
+                if img and "flag" in img.get("alt", "").lower():
+                    nationality = img["alt"].split()[0]
+                continue
+            if not birth_year and re.match(r"19\d{2}|20[0-2]\d", text):
+                birth_year = text
+                continue
+            if not player_name:
+                match = re.search(r"(.*?)\s*\(([A-Z]+)\)", text)
+                if match:
+                    player_name = match.group(1).strip()
+                    position = match.group(2).strip()
+                else:
+                    player_name = text.strip()
+                continue
+        position = position or current_section or "F"
+        if player_name:
+            roster.append({"Player": player_name, "Team": team_name, "Position": position,
+                           "BirthYear": birth_year, "Nationality": nationality, "Jersey": jersey})
+    return pd.DataFrame(roster)
+
+
+def legacy_parse_ep_stats(html):
+    soup = BeautifulSoup(html, "html.parser")
+    stats = []
+    for row in soup.select(phase2.STATS_ROWS):
+        cols = row.find_all("td")
+        if len(cols) < 6:
+            continue
+        name_pos = cols[2].get_text(" ", strip=True)
+        match = re.match(r"(.*?)\s*\((\w+)\)", name_pos)
+        player = match.group(1).strip() if match else name_pos
+        position = match.group(2) if match else "F"
+        gp, g, a = (cols[i].get_text(strip=True) for i in (3, 4, 5))
+        if not (gp.isdigit() and g.isdigit() and a.isdigit()):
+            continue
+        gp, g, a = int(gp), int(g), int(a)
+        stats.append({"Player": player, "Position": position, "GP": gp, "G": g, "A": a,
+                      "PPG": round((g + a) / gp, 4) if gp > 0 else 0})
+    return pd.DataFrame(stats)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def big_ranking(html, copies):
+    # The fixture's body rows repeated with fresh team names, as one long ranking table
+    head, rest = html.split("<tbody>", 1)
+    body, tail = rest.split("</tbody>", 1)
+    rows = body.strip().split("\n")
+    out = []
+    for i in range(copies):
+        out.extend(row.replace("</a></td><td>", f" {i}</a></td><td>", 1) for row in rows)
+    return head + "<tbody>\n" + "\n".join(out) + "\n</tbody>" + tail
+
+
+def measure(parse, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = parse(html)
+            best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse(html)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def check_chunking(cases):
+    # Chunk boundaries fall inside tags, entities and text nodes at these sizes
+    original = table_stream.CHUNK_SIZE
+    try:
+        for size in (1, 7, 61, 1000):
+            table_stream.CHUNK_SIZE = size
+            for name, (parse, html, expected) in cases.items():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if not parse(html).equals(expected):
+                        return f"{name} at chunk size {size}"
+    finally:
+        table_stream.CHUNK_SIZE = original
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming table parser vs the BeautifulSoup tree it replaced")
+    parser.add_argument("--copies", type=int, default=20, help="fixture ranking rows x copies for the long table")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    mhr, roster, stats = read_fixture("mhr_ranking.html"), read_fixture("ep_roster.html"), read_fixture("ep_stats.html")
+    long_table = big_ranking(mhr, args.copies)
+    cases = {
+        "mhr page (200 cap)": (phase1.parse_mhr_table, legacy_parse_mhr_table, mhr),
+        f"mhr x{args.copies} (no cap)": (lambda h: phase1.parse_mhr_table(h, max_teams=0),
+                                         lambda h: legacy_parse_mhr_table(h, max_teams=0), long_table),
+        f"mhr x{args.copies} (200 cap)": (phase1.parse_mhr_table, legacy_parse_mhr_table, long_table),
+        "ep roster": (lambda h: phase2.parse_ep_roster(h, "Team"), lambda h: legacy_parse_ep_roster(h, "Team"), roster),
+        "ep stats": (phase2.parse_ep_stats, legacy_parse_ep_stats, stats),
+    }
+    print(f"{'case':<24}{'rows':>7}{'bs4 ms':>10}{'stream ms':>11}{'speedup':>9}{'bs4 MB':>9}{'stream MB':>11}  same")
+    chunk_cases = {}
+    for name, (new, old, html) in cases.items():
+        old_df, old_s, old_mb = measure(old, html, args.repeat)
+        new_df, new_s, new_mb = measure(new, html, args.repeat)
+        chunk_cases[name] = (new, html, old_df)
+        print(f"{name:<24}{len(new_df):>7}{old_s * 1000:>10.1f}{new_s * 1000:>11.1f}{old_s / new_s:>8.1f}x"
+              f"{old_mb:>9.1f}{new_mb:>11.1f}  {new_df.equals(old_df)}")
+    failed = check_chunking(chunk_cases)
+    print(f"Chunk boundaries: {'mismatch in ' + failed if failed else 'identical at chunk sizes 1, 7, 61, 1000'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import difflib
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from team_matcher import TeamIndex, extract_numeric_class, extract_ep_class_from_url
+from team_registry import TeamRegistry
+
+CITIES = [
+    "Calgary", "Edmonton", "Red Deer", "Lethbridge", "Medicine Hat", "Okotoks", "Airdrie",
+    "Spruce Grove", "St Albert", "Sherwood Park", "Fort McMurray", "Grande Prairie", "Camrose",
+    "Brooks", "Canmore", "Cochrane", "Lloydminster", "Saskatoon", "Regina", "Moose Jaw",
+    "Prince Albert", "Winnipeg", "Brandon", "Kelowna", "Kamloops", "Vernon", "Penticton",
+    "Minneapolis", "Duluth", "Fargo", "Bismarck", "Spokane", "Boise", "Billings", "Missoula",
+]
+MASCOTS = [
+    "Flames", "Oilers", "Rebels", "Hurricanes", "Tigers", "Drillers", "Raiders", "Saints",
+    "Kings", "Bruins", "Wolves", "Bears", "Eagles", "Hawks", "Thunder", "Storm", "Blades",
+    "Warriors", "Chiefs", "Royals", "Rockets", "Blazers", "Vipers", "Knights", "Titans",
+]
+TIERS = ["AAA", "AA", "A", "Elite", "Prep", "Academy", "Selects", "Black", "Gold", "White"]
+AGES = [13, 14, 15, 16, 17, 18]
+
+
+def make_reference(n, rng):
+    names = set()
+    rows = []
+    while len(rows) < n:
+        age = rng.choice(AGES)
+        name = f"{rng.choice(CITIES)} {rng.choice(MASCOTS)} {rng.choice(TIERS)} U{age} {rng.randint(1, 400)}"
+        if name in names:
+            continue
+        names.add(name)
+        slug = name.lower().replace(" ", "-")
+        rows.append({
+            "Team": name,
+            "NormalizedTeam": name.lower(),
+            "EP_URL": f"https://www.eliteprospects.com/team/{len(rows) + 1}/{slug}",
+            "Level": "Minor",
+            "Class 1": f"U{age} AAA",
+        })
+    return pd.DataFrame(rows)
+
+
+def perturb(name, rng):
+    chars = list(name)
+    for _ in range(rng.randint(0, 2)):
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+    return "".join(chars).strip()
+
+
+def make_scraped(ref, n, rng):
+    picks = ref.sample(n=n, random_state=rng.randint(0, 2**31 - 1))
+    rows = []
+    for _, ref_row in picks.iterrows():
+        team = perturb(ref_row["Team"], rng)
+        rows.append({
+            "Team": team,
+            "NormalizedTeam": team.lower(),
+            "Class 1": ref_row["Class 1"],
+            "Season": "2023-2024",
+            "TeamRating": 90.0,
+            "OpponentRating": 88.0,
+            "Expected": ref_row["NormalizedTeam"],
+        })
+    return pd.DataFrame(rows)
+
+
+def legacy_matches(scraped_df, ref_df):
+    # The nested-loop match_to_ep this engine replaced, kept for comparison.
+    used_refs = set()
+    matches = []
+    for _, row in scraped_df.iterrows():
+        team_class_num = extract_numeric_class(row.get("Class 1", ""))
+        candidates = []
+        for _, ref_row in ref_df.iterrows():
+            ref_class_num = extract_ep_class_from_url(ref_row.get("EP_URL", ""))
+            if ref_row["NormalizedTeam"] in used_refs:
+                continue
+            if team_class_num and ref_class_num and abs(team_class_num - ref_class_num) > 1:
+                continue
+            score = difflib.SequenceMatcher(None, row["NormalizedTeam"], ref_row["NormalizedTeam"]).ratio()
+            candidates.append((score, ref_row))
+        if not candidates:
+            continue
+        candidates.sort(reverse=True, key=lambda x: x[0])
+        matches.append(candidates[0][1]["NormalizedTeam"])
+        used_refs.add(candidates[0][1]["NormalizedTeam"])
+    return matches
+
+
+def indexed_matches(scraped_df, ref_df):
+    index = TeamIndex(ref_df)
+    matches = []
+    for row in scraped_df.to_dict("records"):
+        pos = index.best_match(row["NormalizedTeam"], extract_numeric_class(row.get("Class 1", "")))
+        if pos is None:
+            continue
+        matches.append(index.names[pos])
+        index.mark_used(pos)
+    return matches
+
+
+def registry_rounds(n_scraped, n_ref, rng):
+    # match_to_ep with an empty registry, then again as a repeat season would run it
+    from phase1_2023_2024_age_aware_final import match_to_ep
+    ref = make_reference(n_ref, rng)
+    scraped = make_scraped(ref, n_scraped, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "registry.sqlite")
+        timings, outputs = [], []
+        for _ in range(2):
+            registry = TeamRegistry(path)
+            start = time.perf_counter()
+            registry.add_reference(ref)
+            outputs.append(match_to_ep(scraped, ref, registry))
+            registry.close()
+            timings.append(time.perf_counter() - start)
+    return timings, outputs[0].equals(outputs[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the indexed team matcher")
+    parser.add_argument("--sizes", default="1000x5000,2000x10000,5000x25000,10000x50000",
+                        help="comma separated SCRAPEDxREFERENCE sizes")
+    parser.add_argument("--legacy-size", default="100x500",
+                        help="size to compare against the nested-loop matcher ('' to skip)")
+    parser.add_argument("--registry-size", default="2000x10000",
+                        help="size for the cold vs warm team registry comparison ('' to skip)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    if args.legacy_size:
+        n_scraped, n_ref = map(int, args.legacy_size.split("x"))
+        ref = make_reference(n_ref, rng)
+        scraped = make_scraped(ref, n_scraped, rng)
+        start = time.perf_counter()
+        legacy = legacy_matches(scraped, ref)
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        indexed = indexed_matches(scraped, ref)
+        indexed_time = time.perf_counter() - start
+        agree = sum(a == b for a, b in zip(legacy, indexed)) / max(len(legacy), 1)
+        print(f"legacy {args.legacy_size}: {legacy_time:.2f}s | indexed: {indexed_time:.3f}s | agreement {agree:.1%}")
+
+    if args.registry_size:
+        n_scraped, n_ref = map(int, args.registry_size.split("x"))
+        (cold, warm), same = registry_rounds(n_scraped, n_ref, rng)
+        print(f"registry {args.registry_size}: first season {cold:.2f}s | repeat season {warm:.2f}s | identical: {same}")
+
+    print(f"{'size':>14} {'build':>8} {'match':>8} {'teams/s':>10} {'accuracy':>9}")
+    for size in args.sizes.split(","):
+        n_scraped, n_ref = map(int, size.split("x"))
+        ref = make_reference(n_ref, rng)
+        scraped = make_scraped(ref, n_scraped, rng)
+
+        start = time.perf_counter()
+        index = TeamIndex(ref)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = []
+        for row in scraped.to_dict("records"):
+            pos = index.best_match(row["NormalizedTeam"], extract_numeric_class(row["Class 1"]))
+            found.append(index.names[pos] if pos is not None else None)
+            if pos is not None:
+                index.mark_used(pos)
+        match_time = time.perf_counter() - start
+
+        accuracy = (pd.Series(found) == scraped["Expected"].values).mean()
+        print(f"{size:>14} {build_time:>7.2f}s {match_time:>7.2f}s {n_scraped / match_time:>10.0f} {accuracy:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_team_matcher import make_reference, make_scraped
+from stub_server import FIXTURE_DIR
+from synthetic import make_phase2_rosters, make_local_stats
+
+import phase1_2023_2024_age_aware_final as phase1
+import phase2_logo_with_ids as phase2
+from local_stats import normalize_local_stats
+from phase32 import run_phase3
+
+# === CONFIG ===
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+REGRESSION_THRESHOLD = 1.10
+# Below this many seconds slower, a change is timer noise whatever the ratio
+REGRESSION_MIN_SECONDS = 0.05
+# Timings are only compared against a baseline recorded with all of these the same
+ENVIRONMENT_KEYS = ("scale", "seed", "machine", "cpu", "python", "numpy", "pandas")
+SCALES = {
+    "small": {"pages": 20, "match": (500, 2000), "local_rows": 10_000, "players": 20_000},
+    "medium": {"pages": 100, "match": (2000, 10_000), "local_rows": 100_000, "players": 200_000},
+    "large": {"pages": 500, "match": (10_000, 50_000), "local_rows": 1_000_000, "players": 1_000_000},
+}
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def parse_pages(parse, html, pages):
+    def run():
+        return sum(len(parse(html)) for _ in range(pages))
+    return run
+
+
+def bench_match(n_scraped, n_ref, seed):
+    rng = random.Random(seed)
+    ref = make_reference(n_ref, rng)
+    scraped = make_scraped(ref, n_scraped, rng)
+    return lambda: len(phase1.match_to_ep(scraped, ref))
+
+
+def bench_local_stats(rows, seed):
+    df = make_local_stats(rows, seed)
+    return lambda: len(normalize_local_stats(df.copy()))
+
+
+def bench_phase3(players, seed, work_dir):
+    roster_file = os.path.join(work_dir, "phase2_team_rosters.csv")
+    make_phase2_rosters(players, seed=seed).to_csv(roster_file, index=False)
+    runs = itertools.count()
+
+    def run():
+        # A fresh output directory each time, so every run scores every class
+        run_phase3(roster_file, os.path.join(work_dir, f"phase3_{next(runs)}"))
+        return players
+    return run
+
+
+def benchmarks(scale, seed, work_dir):
+    # name -> setup(); setup builds the inputs and returns the timed run()
+    sizes = SCALES[scale]
+    return {
+        "parse_mhr": lambda: parse_pages(phase1.parse_mhr_table, read_fixture("mhr_ranking.html"), sizes["pages"]),
+        "parse_ep_stats": lambda: parse_pages(phase2.parse_ep_stats, read_fixture("ep_stats.html"), sizes["pages"]),
+        "parse_ep_roster": lambda: parse_pages(lambda html: phase2.parse_ep_roster(html, "Team"),
+                                               read_fixture("ep_roster.html"), sizes["pages"]),
+        "match_to_ep": lambda: bench_match(*sizes["match"], seed),
+        "normalize_local_stats": lambda: bench_local_stats(sizes["local_rows"], seed),
+        "run_phase3": lambda: bench_phase3(sizes["players"], seed, work_dir),
+    }
+
+
+def time_benchmark(setup, repeat):
+    # Only run() is timed; the phases' own progress output is swallowed
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = setup()
+    runs = []
+    rows = 0
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            rows = run()
+            runs.append(time.perf_counter() - start)
+    best = min(runs)
+    return {"seconds": round(best, 4), "runs": [round(r, 4) for r in runs], "rows": rows,
+            "rows_per_sec": round(rows / best, 1) if best > 0 else None}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            return next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), None)
+    except OSError:
+        return platform.processor() or None
+
+
+def compare(results, baseline, threshold):
+    # Returns the names of the benchmarks that got slower than threshold allows
+    regressions = []
+    print(f"\n{'benchmark':<24}{'baseline s':>12}{'current s':>12}{'change':>10}")
+    for name, result in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:<24}{'-':>12}{result['seconds']:>12.3f}{'new':>10}")
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        flag = ""
+        if ratio > threshold and result["seconds"] - base["seconds"] > REGRESSION_MIN_SECONDS:
+            regressions.append(name)
+            flag = "  ❌ regression"
+        elif ratio < 1 / threshold:
+            flag = "  ✅ faster"
+        print(f"{name:<24}{base['seconds']:>12.3f}{result['seconds']:>12.3f}{ratio - 1:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite: fixture parsing, matching, local stats and phase 3")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest is reported")
+    parser.add_argument("--only", default="", help="comma separated benchmark names")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against (default: baselines/<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="slowdown ratio counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on any regression")
+    args = parser.parse_args()
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.scale}.json")
+
+    results = {
+        "scale": args.scale, "seed": args.seed, "repeat": args.repeat, "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+        "numpy": np.__version__, "pandas": pd.__version__,
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)", "cpu": cpu_model(),
+        "results": {},
+    }
+    only = set(filter(None, args.only.split(",")))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Phases write side files (name table, telemetry) into the working directory
+        os.chdir(work_dir)
+        try:
+            for name, setup in benchmarks(args.scale, args.seed, work_dir).items():
+                if only and name not in only:
+                    continue
+                result = results["results"][name] = time_benchmark(setup, args.repeat)
+                print(f"{name:<24}{result['seconds']:>9.3f}s  {result['rows']:>10} rows  {result['rows_per_sec'] or 0:>12.0f} rows/s")
+        finally:
+            os.chdir(cwd)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    regressions = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Baseline: {baseline.get('commit')} on {baseline.get('machine')}, {baseline.get('created')}")
+        differs = [f"{key} {baseline.get(key)!r} vs {results[key]!r}" for key in ENVIRONMENT_KEYS
+                   if baseline.get(key) != results[key]]
+        if differs:
+            # Timings from another machine or library version say nothing about this tree
+            print(f"⚠️ Not comparing: {baseline_path} was recorded with a different " + ", ".join(differs))
+            print("   Record a baseline here with --save-baseline")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"Saved baseline to {baseline_path}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
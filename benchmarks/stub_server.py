@@ -0,0 +1,140 @@
+import argparse
+import gzip
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Site-shaped paths for the fixtures, so scrapers can be pointed at the stub
+# with their usual URLs. Any other path is served as a file under the root.
+ROUTES = {
+    "/rankings/alberta-u18-aaa": "mhr_ranking.html",
+    "/team/9001/calgary-flames-u18-aaa": "ep_roster.html",
+    "/team/9001/calgary-flames-u18-aaa?tab=stats": "ep_stats.html",
+    "/team/9002/client-rendered": "ep_client_rendered.html",
+    "/team/9002/client-rendered?tab=stats": "ep_client_rendered.html",
+    "/layout/logos/team-logos/9001.png": "team-logos/9001.png",
+}
+# /redirect?to=<url> answers 302 to that URL; /broken-gzip sends a gzip body
+# that fails to inflate
+REDIRECT_ROUTE = "/redirect"
+BROKEN_GZIP_ROUTE = "/broken-gzip"
+CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".png": "image/png", ".jpg": "image/jpeg", ".json": "application/json"}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Keep-alive, gzip, ETag and Last-Modified, like a real static host.
+    protocol_version = "HTTP/1.1"
+    # Headers and body leave in one write, without waiting on delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    root = FIXTURE_DIR
+    delay = 0.0
+    requests = 0
+    cookies = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def _resolve(self):
+        parts = urlsplit(self.path)
+        name = ROUTES.get(parts.path + (f"?{parts.query}" if parts.query else "")) or ROUTES.get(parts.path)
+        path = os.path.normpath(os.path.join(self.root, name or parts.path.lstrip("/")))
+        if not path.startswith(os.path.abspath(self.root)) or not os.path.isfile(path):
+            return None
+        return path
+
+    def do_GET(self):
+        type(self).requests += 1
+        type(self).cookies.append(self.headers.get("Cookie"))
+        if self.delay:
+            time.sleep(self.delay)
+        parts = urlsplit(self.path)
+        if parts.path == REDIRECT_ROUTE:
+            self._reply(302, b"", {"Location": parse_qs(parts.query).get("to", ["/"])[0]})
+            return
+        if parts.path == BROKEN_GZIP_ROUTE:
+            # A gzip header followed by a corrupt deflate stream
+            body = gzip.compress(b"<table><tr><td>x")[:10] + b"\xff" * 16
+            self._reply(200, body, {"Content-Type": "text/html", "Content-Encoding": "gzip"})
+            return
+        path = self._resolve()
+        if path is None:
+            self._reply(404, b"not found", {"Content-Type": "text/plain"})
+            return
+
+        with open(path, "rb") as f:
+            body = f.read()
+        mtime = int(os.path.getmtime(path))
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        headers = {
+            "Content-Type": CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream"),
+            "ETag": etag,
+            "Last-Modified": formatdate(mtime, usegmt=True),
+        }
+        if self.headers.get("If-None-Match") == etag or self._not_modified_since(mtime):
+            self._reply(304, b"", headers)
+            return
+        if "gzip" in self.headers.get("Accept-Encoding", "") and headers["Content-Type"].startswith("text/"):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self._reply(200, body, headers)
+
+    def _not_modified_since(self, mtime):
+        since = self.headers.get("If-Modified-Since")
+        if not since or self.headers.get("If-None-Match"):
+            return False
+        try:
+            return mtime <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _reply(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+@contextmanager
+def serve(root=FIXTURE_DIR, port=0, delay=0.0):
+    """Serve `root` on localhost in a background thread.
+
+    Yields the base URL and the handler class, whose `requests` counts hits
+    and `cookies` holds each request's Cookie header.
+    """
+    handler = type("Handler", (FixtureHandler,), {"root": root, "delay": delay, "requests": 0, "cookies": []})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="stub-server", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the benchmark fixtures over HTTP for offline scraper runs")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--root", default=FIXTURE_DIR)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before every response")
+    args = parser.parse_args()
+    with serve(args.root, args.port, args.delay) as (base_url, _):
+        print(f"Serving {args.root} at {base_url} (Ctrl+C to stop)")
+        for route, name in ROUTES.items():
+            print(f"  {base_url}{route} -> {name}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+CLASSES_1 = ["U18 AAA", "U17 AAA", "U16 AAA", "U15 AAA", "U18 AA", "U15 AA", "Junior A", "U18 Prep"]
+CLASSES_2 = ["CSSHL U18", "CSSHL U17", "Alberta U18", "Sask U18", "Manitoba U16"]
+CLASSES_3 = ["Canada U18", "USA U18"]
+POSITIONS = ["F", "F", "F", "D", "D", "G", "LW", "RW", "C", "LD", "RD", "F/D", "-"]
+FIRST = ["Liam", "Noah", "Owen", "Carter", "Ethan", "Jack", "Logan", "Lucas", "Cole", "Brody",
+         "Émile", "Zoë", "Jérôme", "Mikko", "Dawson", "Ryder", "Hudson", "Nolan", "Tyson", "Gage"]
+LAST = ["Smith", "MacDonald", "Tremblay", "Gagné", "Roy", "Côté", "Bouchard", "Wilson", "Martin",
+        "Lee", "Anderson", "Johnson", "Nieminen", "Novák", "Schmidt", "O'Brien", "Desjardins"]
+
+
+def make_phase2_rosters(n_players, seed=0, team_size=25):
+    """Synthetic phase2_team_rosters.csv frame with n_players rows."""
+    rng = np.random.default_rng(seed)
+    n_teams = max(1, n_players // team_size)
+
+    team_ids = np.arange(1, n_teams + 1)
+    team_class_1 = rng.choice(CLASSES_1, n_teams)
+    team_class_2 = np.where(rng.random(n_teams) < 0.4, rng.choice(CLASSES_2, n_teams), None)
+    team_class_3 = np.where(rng.random(n_teams) < 0.05, rng.choice(CLASSES_3, n_teams), None)
+    team_opp = np.round(rng.uniform(70, 99, n_teams), 2)
+    team_opp[rng.random(n_teams) < 0.02] = np.nan
+
+    team_of = rng.integers(0, n_teams, n_players)
+    gp = rng.integers(0, 61, n_players)
+    goals = np.minimum(rng.poisson(gp * 0.25), 80)
+    assists = np.minimum(rng.poisson(gp * 0.35), 100)
+    birth = rng.integers(2003, 2011, n_players).astype(float)
+    birth[rng.random(n_players) < 0.03] = np.nan
+
+    players = [
+        f"{FIRST[i % len(FIRST)]} {LAST[j % len(LAST)]} {k}"
+        for i, j, k in zip(rng.integers(0, 1000, n_players), rng.integers(0, 1000, n_players), range(n_players))
+    ]
+    teams = np.array([f"Team {t} Hockey" for t in team_ids])
+
+    df = pd.DataFrame({
+        "Player": players,
+        "GP": gp,
+        "G": goals,
+        "A": assists,
+        "Position": rng.choice(POSITIONS, n_players),
+        "PPG": np.round(np.where(gp > 0, (goals + assists) / np.maximum(gp, 1), 0), 4),
+        "Team": teams[team_of],
+        "EP_Team_ID": team_ids[team_of],
+        "TeamLogoFile": [f"{t}.jpg" for t in team_ids[team_of]],
+        "EP_URL": [f"https://www.eliteprospects.com/team/{t}/team-{t}-hockey" for t in team_ids[team_of]],
+        "Level": "AJHL",
+        "Class 1": team_class_1[team_of],
+        "Class 2": team_class_2[team_of],
+        "Class 3": team_class_3[team_of],
+        "Season": "2023-2024",
+        "OpponentRating": team_opp[team_of],
+        "BirthYear": birth,
+        "Nationality": rng.choice(["CAN", "USA", "FIN", "CZE", ""], n_players),
+        "Jersey": rng.integers(1, 99, n_players),
+    })
+    df["StatsMissing"] = (df["GP"] < 10).groupby(df["Team"]).transform("all")
+    return df
+
+
+def make_leagues(n_leagues, seed=0, base_url="https://myhockeyrankings.com"):
+    """Synthetic phase 1 input (league6_2023-2024.csv): one MHR ranking URL per league row."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "MHR": [f"{base_url}/rankings/league-{i}" for i in range(n_leagues)],
+        "Level": rng.choice(["AJHL", "CSSHL", "AEHL", "AMHL"], n_leagues),
+        "Class 1": rng.choice(CLASSES_1, n_leagues),
+        "Class 2": np.where(rng.random(n_leagues) < 0.4, rng.choice(CLASSES_2, n_leagues), None),
+        "Class 3": np.where(rng.random(n_leagues) < 0.2, rng.choice(CLASSES_3, n_leagues), None),
+        "Season": "2023-2024",
+    })
+
+
+def make_local_stats(n_players, seed=0, with_position=False):
+    """A LocalStatsFile as league sites export it: long stat names, padded headers, some gaps."""
+    rng = np.random.default_rng(seed)
+    gp = rng.integers(0, 61, n_players).astype(float)
+    gp[rng.random(n_players) < 0.01] = np.nan
+    df = pd.DataFrame({
+        " Player ": [f"{FIRST[i % len(FIRST)]} {LAST[i % len(LAST)]} {i}" for i in rng.integers(0, 1000, n_players)],
+        "GamesPlayed": gp,
+        "Goals": np.minimum(rng.poisson(np.nan_to_num(gp) * 0.25), 80),
+        "Assists": np.minimum(rng.poisson(np.nan_to_num(gp) * 0.35), 100),
+        "PIM": rng.integers(0, 120, n_players),
+    })
+    if with_position:
+        df["Position"] = rng.choice(POSITIONS, n_players)
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Write synthetic phase inputs for offline runs and benchmarks")
+    parser.add_argument("--out", default="synthetic_data")
+    parser.add_argument("--leagues", type=int, default=20)
+    parser.add_argument("--players", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    make_leagues(args.leagues, args.seed).to_csv(os.path.join(args.out, "league6_2023-2024.csv"), index=False)
+    make_phase2_rosters(args.players, args.seed).to_csv(os.path.join(args.out, "phase2_team_rosters.csv"), index=False)
+    make_local_stats(max(25, args.players // 100), args.seed).to_csv(os.path.join(args.out, "local_stats.csv"), index=False)
+    print(f"Wrote synthetic inputs to {args.out}")
@@ -0,0 +1,186 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from names import normalize_name
+from storage import read_table, set_storage_format, PHASE3_SCHEMA, STORAGE_FORMAT
+from team_logos import LogoCache, LOGO_DIR
+
+# === CONFIG ===
+CLASS_OUTPUT_DIR = "phase3_class_outputs"
+DATA_DIR = "data"
+PAGE_SIZE = 100
+PREFIX_LENGTHS = (1, 2)
+INT_FIELDS = {"by", "birthyear", "gp", "g", "a", "teampoints"}
+
+PAGE_FIELDS = {
+    "player": "name", "team": "team", "position": "pos", "birthyear": "by",
+    "truproscore": "score", "prospect_grade": "grade",
+}
+PLAYER_CLASS_FIELDS = [
+    "gp", "g", "a", "actualppg", "schedadjppg", "ageadjppg", "pctteampointsadjppg",
+    "truproscore", "positional_z_score", "prospect_grade", "opponentrating", "teampoints",
+]
+
+
+def slugify(text):
+    return normalize_name(str(text)).replace(" ", "-")
+
+
+def search_key(text):
+    return normalize_name(str(text))
+
+
+def search_grams(text):
+    # Trigrams of the whole name, plus 1-2 character word prefixes so that
+    # short queries ("mc", "j") still find something.
+    key = search_key(text)
+    grams = set()
+    for word in key.split():
+        grams.update("^" + word[:n] for n in PREFIX_LENGTHS if len(word) >= n)
+    padded = f" {key} "
+    grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _clean(value, field=None):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if field in INT_FIELDS and isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_class_outputs(input_dir):
+    frames = []
+    for path in sorted(glob.glob(os.path.join(input_dir, "*.csv"))):
+        df = read_table(path, PHASE3_SCHEMA, low_memory=False)
+        if df.empty:
+            continue
+        df["_class"] = os.path.splitext(os.path.basename(path))[0]
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    # level is categorical when read from Parquet; object takes the fill value
+    df["_league"] = df["level"].astype(object).fillna("unknown").map(slugify) if "level" in df.columns else "unknown"
+    df["_slug"] = [
+        slugify(f"{player} {team} {'' if pd.isna(by) else int(by)}")
+        for player, team, by in zip(df["player"], df["team"], df.get("birthyear", pd.Series(index=df.index)))
+    ]
+    return df
+
+
+def copy_team_logos(league_df, thumbnails, logo_dir, out_dir):
+    # Every team's thumbnail next to the league's pages, as {team: path}
+    if not thumbnails or "ep_team_id" not in league_df.columns:
+        return {}
+    logos = {}
+    teams = league_df[["team", "ep_team_id"]].dropna().drop_duplicates("team")
+    for team, team_id in zip(teams["team"], teams["ep_team_id"]):
+        team_id = str(int(team_id)) if isinstance(team_id, float) else str(team_id)
+        thumb = thumbnails.get(team_id)
+        if not thumb or not os.path.exists(os.path.join(logo_dir, thumb)):
+            continue
+        target = os.path.join(out_dir, "logos", thumb)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(os.path.join(logo_dir, thumb), target)
+        logos[team] = f"logos/{thumb}"
+    return logos
+
+
+def build_league(league_df, out_dir, page_size, thumbnails=None, logo_dir=LOGO_DIR):
+    players = {}
+    for row in league_df.to_dict("records"):
+        entry = players.setdefault(row["_slug"], {
+            "slug": row["_slug"],
+            "name": row["player"],
+            "team": row["team"],
+            "position": row.get("position"),
+            "birthyear": _clean(row.get("birthyear"), "birthyear"),
+            "classes": [],
+        })
+        entry["classes"].append({"class": row["_class"], **{f: _clean(row.get(f), f) for f in PLAYER_CLASS_FIELDS}})
+    for slug, entry in players.items():
+        _write_json(os.path.join(out_dir, "players", f"{slug}.json"), entry)
+
+    classes = []
+    page_columns = [c for c in PAGE_FIELDS if c in league_df.columns]
+    for class_name, class_df in league_df.groupby("_class", sort=True):
+        class_df = class_df.sort_values("truproscore", ascending=False, kind="stable")
+        records = class_df[page_columns + ["_slug"]].rename(columns={**PAGE_FIELDS, "_slug": "slug"})
+        records = [{k: _clean(v, k) for k, v in r.items()} for r in records.to_dict("records")]
+        pages = 0
+        for start in range(0, len(records), page_size):
+            _write_json(os.path.join(out_dir, class_name, f"page-{pages:04d}.json"), records[start:start + page_size])
+            pages += 1
+        classes.append({"name": class_name, "count": len(records), "pages": pages})
+
+    slugs = sorted(players)
+    grams = {}
+    for i, slug in enumerate(slugs):
+        for gram in search_grams(players[slug]["name"]):
+            grams.setdefault(gram, []).append(i)
+    # Posting lists are ascending player ids stored as gaps, which keeps the
+    # numbers (and the file) small
+    _write_json(os.path.join(out_dir, "search.json"), {
+        "players": [[slug, players[slug]["name"], players[slug]["team"]] for slug in slugs],
+        "grams": {gram: [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] for gram, ids in grams.items()},
+    })
+
+    _write_json(os.path.join(out_dir, "index.json"), {
+        "page_size": page_size,
+        "players": len(players),
+        "classes": classes,
+        "search": "search.json",
+        "logos": copy_team_logos(league_df, thumbnails, logo_dir, out_dir),
+    })
+    return len(players), len(classes)
+
+
+def run_build(input_dir=CLASS_OUTPUT_DIR, data_dir=DATA_DIR, page_size=PAGE_SIZE, logo_dir=LOGO_DIR):
+    df = load_class_outputs(input_dir)
+    if df.empty:
+        print(f"❌ No class outputs found in {input_dir}")
+        return
+    thumbnails = LogoCache(logo_dir).thumbnails() if logo_dir and os.path.isdir(logo_dir) else {}
+
+    for league, league_df in df.groupby("_league", sort=True):
+        # Build next to the live directory and swap it in, so the dashboard
+        # never sees a half-written league
+        final_dir = os.path.join(data_dir, league)
+        tmp_dir = final_dir + ".building"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        n_players, n_classes = build_league(league_df, tmp_dir, page_size, thumbnails, logo_dir)
+        old_dir = final_dir + ".old"
+        if os.path.exists(final_dir):
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(final_dir, old_dir)
+        os.replace(tmp_dir, final_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        print(f"✅ {league}: {n_players} players across {n_classes} classes → {final_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sharded dashboard JSON from the phase 3 class outputs")
+    parser.add_argument("--input-dir", default=CLASS_OUTPUT_DIR)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--logo-dir", default=LOGO_DIR, help="team logo thumbnails from team_logos.py")
+    parser.add_argument("--storage", choices=["csv", "parquet"], default=STORAGE_FORMAT)
+    args = parser.parse_args()
+    set_storage_format(args.storage)
+    run_build(args.input_dir, args.data_dir, args.page_size, args.logo_dir)
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from enrichment import stats_missing_by_team
+from storage import PHASE2_SCHEMA
+
+# === CONFIG ===
+CHECKPOINT_DIR = "phase2_checkpoints"
+MANIFEST_NAME = "manifest.jsonl"
+COMPLETE_NAME = "complete"
+
+
+def file_stamp(path):
+    # Size and mtime of a LocalStatsFile, so an edited sheet gets a new key
+    if not isinstance(path, str) or not path:
+        return ""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "absent"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def checkpoint_keys(df):
+    # One key per phase 1 row, over everything in the row (OpponentRating,
+    # classes, ...) and the stamp of its LocalStatsFile: a checkpoint is only
+    # reused for exactly the inputs it was made from. The same team listed
+    # twice gets two keys.
+    keys = []
+    seen = {}
+    columns = list(df.columns)
+    for _, row in df.iterrows():
+        ident = "|".join(f"{col}={'' if pd.isna(row[col]) else row[col]}" for col in columns)
+        ident += f"|stamp={file_stamp(row.get('LocalStatsFile'))}"
+        digest = hashlib.sha1(ident.encode("utf-8")).hexdigest()[:16]
+        seen[digest] = seen.get(digest, 0) + 1
+        keys.append(f"{digest}-{seen[digest]}")
+    return keys
+
+
+class CheckpointStore:
+    # Append-only per-team results for phase 2.
+    # Each finished team gets its own CSV, and a line in manifest.jsonl marks it
+    # done. A team is only marked done after its CSV is fully on disk. Once
+    # the output has been built the store is marked complete, and the next
+    # run starts over instead of resuming.
+
+    def __init__(self, root=CHECKPOINT_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        os.makedirs(root, exist_ok=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+    def mark_complete(self):
+        with open(os.path.join(self.root, COMPLETE_NAME), "w", encoding="utf-8") as f:
+            f.write("built\n")
+
+    def is_complete(self):
+        return os.path.exists(os.path.join(self.root, COMPLETE_NAME))
+
+    def entries(self):
+        entries = {}
+        if not os.path.exists(self.manifest_path):
+            return entries
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write leaves at most one torn trailing line
+                    continue
+                entries[entry["key"]] = entry
+        return entries
+
+    def completed(self):
+        return set(self.entries())
+
+    def _append(self, entry):
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.csv")
+
+    def save(self, key, team, df):
+        tmp_path = self.path(key) + ".tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path(key))
+        self._append({"key": key, "team": team, "status": "ok", "rows": len(df)})
+
+    def record_missing(self, key, team, ep_url, note):
+        self._append({"key": key, "team": team, "status": "missing", "EP_URL": ep_url, "Note": note})
+
+    def missing(self, keys):
+        entries = self.entries()
+        return [
+            {"Team": entries[k]["team"], "EP_URL": entries[k]["EP_URL"], "Note": entries[k]["Note"]}
+            for k in keys if k in entries and entries[k]["status"] == "missing"
+        ]
+
+    def build(self, keys, output_path):
+        """Stream the checkpoints for `keys`, in order, into one CSV.
+
+        The first pass reads only the headers and the Team/GP columns to get
+        the column union and the per-team StatsMissing flag. The second pass
+        then copies one team at a time.
+        """
+        entries = self.entries()
+        paths = [self.path(k) for k in keys if entries.get(k, {}).get("status") == "ok"]
+
+        columns = []
+        all_low_gp = {}
+        for path in paths:
+            for col in pd.read_csv(path, nrows=0).columns:
+                if col not in columns:
+                    columns.append(col)
+            part = pd.read_csv(path, usecols=lambda c: c in ("Team", "GP"))
+            for team, low in stats_missing_by_team(part["Team"], part["GP"]).items():
+                all_low_gp[team] = all_low_gp.get(team, True) and bool(low)
+        columns.append("StatsMissing")
+
+        tmp_path = output_path + ".tmp"
+        rows = 0
+        for i, path in enumerate(paths):
+            part = pd.read_csv(path, dtype=str, keep_default_na=False)
+            # One dtype for every part: "12", never "12" for one team and "12.0" for the next
+            part["GP"] = pd.to_numeric(part["GP"], errors="coerce").fillna(0).astype(PHASE2_SCHEMA["GP"])
+            part["StatsMissing"] = part["Team"].map(all_low_gp)
+            part.reindex(columns=columns).to_csv(tmp_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(part)
+        if rows:
+            os.replace(tmp_path, output_path)
+        return rows
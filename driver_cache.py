@@ -0,0 +1,103 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from telemetry import count, stage
+
+# === CONFIG ===
+DRIVER_CACHE_FILE = ".chromedriver.json"
+CHROME_BINARIES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+MAC_CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+VERSION_TIMEOUT = 5
+
+_VERSION = re.compile(r"(\d+)\.\d+\.\d+(?:\.\d+)?")
+_lock = threading.Lock()
+
+
+def binary_version(path):
+    # "Google Chrome 124.0.6367.91" / "ChromeDriver 124.0.6367.91 (...)" -> "124.0.6367.91"
+    try:
+        out = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=VERSION_TIMEOUT).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION.search(out)
+    return match.group(0) if match else None
+
+
+def chrome_version():
+    # Windows keeps the version in the registry; there the cache is trusted as is
+    if sys.platform == "win32":
+        return None
+    candidates = [shutil.which(name) for name in CHROME_BINARIES]
+    if sys.platform == "darwin":
+        candidates.append(MAC_CHROME if os.path.exists(MAC_CHROME) else None)
+    path = next((c for c in candidates if c), None)
+    return binary_version(path) if path else None
+
+
+def _major(version):
+    return version.split(".")[0] if version else None
+
+
+def _load(cache_file):
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cached_chromedriver(cache_file=DRIVER_CACHE_FILE):
+    """The cached chromedriver path if it is still usable, else None.
+
+    Checked without the network: the binary must still be there and
+    executable, and its major version must match the installed Chrome
+    when Chrome can be found.
+    """
+    entry = _load(cache_file)
+    if not entry or not entry.get("path"):
+        return None
+    path = entry["path"]
+    if not os.path.isfile(path) or not os.access(path, os.X_OK):
+        return None
+    browser = chrome_version()
+    if browser and entry.get("driver_version") and _major(browser) != _major(entry["driver_version"]):
+        print(f"🔄 Chrome {browser} no longer matches cached chromedriver {entry['driver_version']}")
+        return None
+    return path
+
+
+def resolve_chromedriver(cache_file=DRIVER_CACHE_FILE, refresh=False):
+    """Path to a chromedriver matching the installed Chrome.
+
+    webdriver_manager is only imported (and only asked to resolve versions)
+    when there is no usable cached driver.
+    """
+    with _lock:
+        path = None if refresh else cached_chromedriver(cache_file)
+        if path:
+            count("chromedriver.cached")
+            return path
+        with stage("chromedriver.resolve"):
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            entry = {"path": path, "driver_version": binary_version(path), "browser_version": chrome_version(),
+                     "resolved": time.time()}
+        tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=1)
+        os.replace(tmp_path, cache_file)
+        count("chromedriver.resolved")
+        return path
+
+
+def forget_chromedriver(cache_file=DRIVER_CACHE_FILE):
+    try:
+        os.remove(cache_file)
+    except OSError:
+        pass
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Column-wise versions of the per-row enrichment the phases used to do with
+# DataFrame.apply. Each keeps the values and dtypes the row-wise code produced,
+# quirks included ("U9.0" class labels once a league has a team without an age).
+
+# === CONFIG ===
+BIRTH_YEAR_BASE = 2000
+CANADIAN_MARKER = "can"
+# A team whose players all have fewer games than this has no usable stats
+LOW_GP = 10
+
+
+def is_canadian_league(classes):
+    return any(CANADIAN_MARKER in str(c).lower() for c in classes)
+
+
+def birth_years(age_codes):
+    """2000 + the two-digit age code ("15" -> 2015).
+
+    int64 when every code parses, float64 with NaN when some do not, and an
+    object column of None when none do.
+    """
+    if pd.api.types.is_numeric_dtype(age_codes):
+        valid = age_codes.notna()
+        codes = np.trunc(age_codes)
+    else:
+        # What int() accepts: optional sign and digits, surrounding spaces ignored
+        text = age_codes.astype(str).str.strip()
+        valid = text.str.fullmatch(r"[+-]?\d+").fillna(False).astype(bool)
+        codes = pd.to_numeric(text.where(valid), errors="coerce")
+    if not valid.any():
+        return pd.Series([None] * len(age_codes), index=age_codes.index, dtype=object)
+    years = BIRTH_YEAR_BASE + codes.astype("float64")
+    return years.astype("int64") if valid.all() else years
+
+
+def class_levels(years, season_end_year, is_canadian):
+    """"U<age>" for the season; Canadian leagues count one year younger."""
+    if years.dtype == object:
+        return pd.Series([None] * len(years), index=years.index, dtype=object)
+    diff = season_end_year - years - np.asarray(is_canadian, dtype="int64")
+    return pd.Series(np.char.add("U", diff.to_numpy().astype(str)), index=years.index)
+
+
+def add_age_columns(df, season_end_year, classes):
+    # IsCanadian, BirthYear and ClassLevel for one league's ranking table
+    canadian = is_canadian_league(classes)
+    df["IsCanadian"] = canadian
+    df["BirthYear"] = birth_years(df["AgeLevel"])
+    df["ClassLevel"] = class_levels(df["BirthYear"], season_end_year, canadian)
+    return df
+
+
+def points_per_game(goals, assists, games):
+    # 0 for players without games; integer 0s when nobody has played
+    played = games > 0
+    ppg = ((goals + assists) / games).where(played, 0)
+    if len(ppg) and not played.any():
+        return ppg.astype("int64")
+    return ppg.astype("float64")
+
+
+def stats_missing_by_team(teams, games):
+    # Team -> True when every player on it has fewer than LOW_GP games
+    gp = pd.to_numeric(games, errors="coerce").fillna(0)
+    return (gp < LOW_GP).groupby(teams.astype(str)).all()
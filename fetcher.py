@@ -0,0 +1,185 @@
+import asyncio
+import gzip
+import http.client
+import re
+import threading
+import zlib
+from itertools import islice
+from urllib.parse import urljoin, urlsplit
+
+# === CONFIG ===
+HTTP_TIMEOUT = 10
+HTTP_CONCURRENCY = 8
+HTTP_PER_DOMAIN = 4
+MAX_IDLE_PER_HOST = 4
+MAX_REDIRECTS = 5
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+# Credentials: only sent to the origin they were given for, never over a downgrade to http
+ORIGIN_ONLY_HEADERS = ("cookie", "authorization")
+# What a broken gzip/deflate body raises on top of OSError
+DECODE_ERRORS = (zlib.error, EOFError)
+
+_ROW_TAG = re.compile(r"<tr[\s>]", re.IGNORECASE)
+
+
+class HttpResponse:
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self):
+        charset = self.headers.get_content_charset() or "utf-8"
+        return self.body.decode(charset, errors="replace")
+
+
+def decode_body(body, encoding):
+    encoding = (encoding or "").lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+class HttpPool:
+    # Keep-alive HTTP(S) connections, reused per host. Safe to share between
+    # threads: a request checks a connection out and returns it once the
+    # whole body has been read.
+
+    def __init__(self, timeout=HTTP_TIMEOUT, max_idle=MAX_IDLE_PER_HOST, headers=None):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def _connect(self, scheme, netloc):
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _checkout(self, origin):
+        with self._lock:
+            idle = self._idle.get(origin)
+            if idle:
+                return idle.pop(), True
+        return self._connect(*origin), False
+
+    def _checkin(self, origin, conn):
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(self, url, headers):
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.netloc)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            conn, reused = self._checkout(origin)
+            try:
+                conn.request("GET", target, headers={**self.headers, **(headers or {})})
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                if reused:
+                    # The server dropped an idle keep-alive connection; try a fresh one
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._checkin(origin, conn)
+            return response.status, response.headers, body
+
+    def get(self, url, headers=None):
+        origin = _origin(url)
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = self._send(url, headers)
+            location = response_headers.get("Location")
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                if headers and _origin(url) != origin:
+                    # A redirect to another host, port or scheme loses the Cookie
+                    # and Authorization headers for the rest of the chain
+                    headers = {k: v for k, v in headers.items() if k.lower() not in ORIGIN_ONLY_HEADERS}
+                continue
+            return HttpResponse(url, status, response_headers, decode_body(body, response_headers.get("Content-Encoding")))
+        raise http.client.HTTPException(f"Too many redirects: {url}")
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return parts.scheme.lower(), (parts.hostname or "").lower(), parts.port
+
+
+HTTP_POOL = HttpPool()
+
+
+def html_has_rows(marker="<table", min_rows=1):
+    # Cheap check on raw HTML: `marker` is present and at least `min_rows`
+    # <tr> tags follow it. A page that builds its table with JavaScript fails
+    # this and goes to the browser instead.
+    def check(html):
+        start = html.find(marker)
+        return start >= 0 and len(list(islice(_ROW_TAG.finditer(html, start), min_rows))) >= min_rows
+    return check
+
+
+def get_html(url, expect=None, pool=None, headers=None):
+    """GET url over plain HTTP and return its HTML, or None.
+
+    None means the page has to go through a browser: the request failed, the
+    status was not 200, or the HTML did not pass `expect(html)`.
+    """
+    try:
+        response = (pool or HTTP_POOL).get(url, headers=headers)
+    except (OSError, http.client.HTTPException, *DECODE_ERRORS) as e:
+        print(f"🌐 HTTP fetch failed for {url}: {e}")
+        return None
+    if response.status != 200:
+        return None
+    html = response.text
+    if expect is not None and not expect(html):
+        return None
+    return html
+
+
+async def fetch_all(urls, fetch, concurrency=HTTP_CONCURRENCY, per_domain=HTTP_PER_DOMAIN):
+    """Run fetch(url) for every url on worker threads and return {url: result}.
+
+    At most `concurrency` requests are in flight overall, and at most
+    `per_domain` against any one host.
+    """
+    overall = asyncio.Semaphore(max(1, concurrency))
+    hosts = {}
+
+    async def one(url):
+        host = hosts.setdefault(urlsplit(url).netloc.lower(), asyncio.Semaphore(max(1, per_domain)))
+        async with overall, host:
+            return await asyncio.to_thread(fetch, url)
+
+    urls = list(dict.fromkeys(urls))
+    results = await asyncio.gather(*(one(url) for url in urls))
+    return dict(zip(urls, results))
@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+# Per-group mean, std and quantile with the exact floating-point results of
+# Series.mean(), .std() and .quantile() on each group, computed for all
+# groups at once. Grouped cython reductions add in a different order than
+# those Series methods, and the last-bit difference can flip a value that is
+# later rounded to 2 decimals.
+
+# numpy sums a float array pairwise: halves until a piece has at most
+# PAIRWISE_BLOCK values, which are added in PAIRWISE_LANES running lanes
+PAIRWISE_BLOCK = 128
+PAIRWISE_LANES = 8
+_DONE = object()
+
+
+def _group_codes(keys):
+    # One integer per distinct key (or key combination) in order of first
+    # appearance; -1 where any key is missing
+    keys = keys if isinstance(keys, list) else [keys]
+    codes = np.zeros(len(keys[0]), dtype=np.int64)
+    for key in keys:
+        key_codes, uniques = pd.factorize(key)
+        codes = np.where((codes < 0) | (key_codes < 0), -1, codes * len(uniques) + key_codes)
+    if len(keys) > 1:
+        known = codes >= 0
+        codes[known] = pd.factorize(codes[known])[0]
+    return codes
+
+
+def _layout(keys):
+    # Each row's group code (-1 where a key is missing, as groupby drops
+    # those), the order of the grouped rows that puts every group together
+    # with its rows in input order, and each group's start and length in it
+    codes = _group_codes(keys)
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    lengths = np.bincount(codes[codes >= 0], minlength=n_groups)
+    order = np.argsort(np.where(codes < 0, n_groups, codes), kind="stable")[:lengths.sum()]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)[:n_groups]
+    return codes, order, starts, lengths
+
+
+def _per_row(per_group, codes, index):
+    out = np.full(len(codes), np.nan)
+    has_group = codes >= 0
+    out[has_group] = per_group[codes[has_group]]
+    return pd.Series(out, index=index)
+
+
+def pairwise_sums(a, starts, lengths):
+    """np.sum(a[s:s + n]) for every (s, n) segment, bit for bit, in one pass.
+
+    numpy's pairwise recursion runs over all segments together: a loop per
+    level of halving and per lane position, never per segment.
+    """
+    node_start, node_len = [np.asarray(starts, np.int64)], [np.asarray(lengths, np.int64)]
+    splits = []
+    frontier = np.arange(len(node_start[0]))
+    total = len(frontier)
+    while True:
+        all_start, all_len = np.concatenate(node_start), np.concatenate(node_len)
+        split = frontier[all_len[frontier] > PAIRWISE_BLOCK]
+        if not len(split):
+            break
+        half = all_len[split] // 2
+        half -= half % PAIRWISE_LANES
+        low = np.arange(total, total + len(split))
+        high = low + len(split)
+        node_start += [all_start[split], all_start[split] + half]
+        node_len += [half, all_len[split] - half]
+        splits.append((split, low, high))
+        total += 2 * len(split)
+        frontier = np.concatenate((low, high))
+
+    sums = np.empty(total)
+    leaves = np.flatnonzero(all_len <= PAIRWISE_BLOCK)
+    start, n = all_start[leaves], all_len[leaves]
+    padded = np.append(a, 0.0)
+
+    def at(offset, use):
+        # a[start + offset] where `use`, else a placeholder that is never added
+        return padded[np.where(use, start + offset, len(a))]
+
+    # Fewer than PAIRWISE_LANES values: added one after another
+    short = n < PAIRWISE_LANES
+    one_by_one = np.full(len(leaves), -0.0)
+    for k in range(PAIRWISE_LANES - 1):
+        use = short & (k < n)
+        one_by_one = np.where(use, one_by_one + at(k, use), one_by_one)
+
+    # Otherwise one running sum per lane, the lanes added as a tree, then the leftovers
+    lanes = [at(j, ~short) for j in range(PAIRWISE_LANES)]
+    body = n - n % PAIRWISE_LANES
+    for offset in range(PAIRWISE_LANES, PAIRWISE_BLOCK, PAIRWISE_LANES):
+        use = ~short & (offset < body)
+        for j in range(PAIRWISE_LANES):
+            lanes[j] = np.where(use, lanes[j] + at(offset + j, use), lanes[j])
+    blocked = ((lanes[0] + lanes[1]) + (lanes[2] + lanes[3])) + ((lanes[4] + lanes[5]) + (lanes[6] + lanes[7]))
+    for k in range(PAIRWISE_LANES - 1):
+        use = ~short & (k < n % PAIRWISE_LANES)
+        blocked = np.where(use, blocked + at(body + k, use), blocked)
+    sums[leaves] = np.where(short, one_by_one, blocked)
+
+    # The halves are added back together, deepest split first
+    for split, low, high in reversed(splits):
+        sums[split] = sums[low] + sums[high]
+    return sums[:len(starts)]
+
+
+def _pairwise_plan(n):
+    # numpy's pairwise recursion over n values in the order it adds: a block
+    # length to sum directly, or None to add the last two partial sums
+    if n <= PAIRWISE_BLOCK:
+        yield n
+        return
+    half = n // 2
+    half -= half % PAIRWISE_LANES
+    yield from _pairwise_plan(half)
+    yield from _pairwise_plan(n - half)
+    yield None
+
+
+class PairwiseSum:
+    """np.sum of n values that arrive a piece at a time, bit for bit.
+
+    n has to be known up front, as it fixes where numpy splits. Holds at
+    most one block of values and one partial sum per level of halving.
+    """
+
+    def __init__(self, n):
+        self._plan = _pairwise_plan(n)
+        self._step = next(self._plan)
+        self._buffer = np.empty(0)
+        self._partials = []
+
+    def add(self, values):
+        buffer = np.concatenate((self._buffer, np.asarray(values, dtype="float64")))
+        used = 0
+        while self._step is not _DONE:
+            if self._step is None:
+                high, low = self._partials.pop(), self._partials.pop()
+                self._partials.append(low + high)
+            elif len(buffer) - used >= self._step:
+                self._partials.append(np.add.reduce(buffer[used:used + self._step]))
+                used += self._step
+            else:
+                break
+            self._step = next(self._plan, _DONE)
+        self._buffer = buffer[used:]
+
+    def total(self):
+        self.add(())
+        return float(self._partials[-1])
+
+
+def _sorted_groups(values, keys):
+    codes, order, starts, lengths = _layout(keys)
+    x = values.to_numpy(dtype="float64", na_value=np.nan)[order]
+    missing = np.isnan(x)
+    counts = np.bincount(codes[(codes >= 0) & values.notna().to_numpy()], minlength=len(starts)).astype(np.float64)
+    return codes, starts, lengths, np.where(missing, 0.0, x), missing, counts
+
+
+def group_mean(values, keys):
+    # values.groupby(keys).transform(lambda part: part.mean())
+    codes, starts, lengths, filled, _, counts = _sorted_groups(values, keys)
+    with np.errstate(all="ignore"):
+        means = pairwise_sums(filled, starts, lengths) / counts
+    means[counts == 0] = np.nan
+    return _per_row(means, codes, values.index)
+
+
+def group_std(values, keys):
+    # values.groupby(keys).transform(lambda part: part.std()): two passes, as pandas does
+    codes, starts, lengths, filled, missing, counts = _sorted_groups(values, keys)
+    in_group = np.repeat(np.arange(len(starts)), lengths)
+    with np.errstate(all="ignore"):
+        means = pairwise_sums(filled, starts, lengths) / counts
+        squares = np.where(missing, 0.0, (means[in_group] - filled) ** 2)
+        stds = np.sqrt(pairwise_sums(squares, starts, lengths) / (counts - 1))
+    stds[counts <= 1] = np.nan
+    return _per_row(stds, codes, values.index)
+
+
+def group_quantile(values, keys, q):
+    # values.groupby(keys).transform(lambda part: part.quantile(q)), linear interpolation
+    codes = _group_codes(keys)
+    x = values.to_numpy(dtype="float64", na_value=np.nan)
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    use = (codes >= 0) & ~np.isnan(x)
+    order = np.lexsort((x[use], codes[use]))
+    ranked, ranked_codes = x[use][order], codes[use][order]
+    counts = np.bincount(ranked_codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)[:n_groups]
+
+    # numpy's "linear" method: the virtual index (n - 1) * q, its two
+    # neighbours, and a lerp from whichever end is nearer
+    virtual = (counts - 1) * q
+    below = np.floor(virtual)
+    gamma = virtual - below
+    at_end = virtual >= counts - 1
+    below = np.where(at_end, counts - 1, below).astype(np.int64)
+    above = np.where(at_end, counts - 1, below + 1).astype(np.int64)
+    padded = np.append(ranked, np.nan)
+    empty = counts == 0
+    a = padded[np.where(empty, len(ranked), starts + below)]
+    b = padded[np.where(empty, len(ranked), starts + above)]
+    diff = b - a
+    quantiles = np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+    return _per_row(quantiles, codes, values.index)
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from enrichment import points_per_game
+from telemetry import stage, count
+
+# === CONFIG ===
+LOCAL_STATS_CACHE = ".local_stats_cache"
+# read_csv spends most of its time in C with the GIL released, so threads overlap well
+INGEST_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+# Bump when normalize_local_stats changes, so cached frames are parsed again
+NORMALIZE_VERSION = 1
+
+
+def normalize_local_stats(df):
+    df = df.rename(columns=lambda x: x.strip())
+    df = df.rename(columns={
+        'GamesPlayed': 'GP', 'Goals': 'G', 'Assists': 'A',
+    })
+    for col in ['Player', 'GP', 'G', 'A']:
+        if col not in df.columns:
+            df[col] = np.nan
+    df["PPG"] = points_per_game(df["G"], df["A"], df["GP"])
+    if "Position" not in df.columns:
+        df["Position"] = "F"
+    return df
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LocalStatsCache:
+    # Normalized LocalStatsFile frames, one pickle per source path. An entry
+    # is used as is while the file's size and mtime are unchanged; a file
+    # that was only touched or copied over is recognized by its SHA-1 and
+    # keeps its entry.
+
+    def __init__(self, root=LOCAL_STATS_CACHE):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, source):
+        key = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key + ".pkl")
+
+    def _read(self, source):
+        try:
+            with open(self.path(source), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return None
+        return entry if entry.get("version") == NORMALIZE_VERSION else None
+
+    def _write(self, source, entry):
+        path = self.path(source)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load(self, source):
+        """The normalized frame for source and whether it came from the cache."""
+        st = os.stat(source)
+        stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        entry = self._read(source)
+        if entry is not None and all(entry[k] == v for k, v in stamp.items()):
+            return entry["df"], True
+        sha1 = file_sha1(source)
+        if entry is not None and entry["sha1"] == sha1:
+            self._write(source, {**entry, **stamp})
+            return entry["df"], True
+        df = normalize_local_stats(pd.read_csv(source))
+        self._write(source, {"version": NORMALIZE_VERSION, "sha1": sha1, **stamp, "df": df})
+        return df, False
+
+
+def read_local_stats(source, cache=None):
+    with stage("phase2.local_stats") as current:
+        if cache is None:
+            df, cached = normalize_local_stats(pd.read_csv(source)), False
+        else:
+            df, cached = cache.load(source)
+        current.rows = len(df)
+        current.extra["cached"] = cached
+    if cached:
+        count("phase2.local_stats_cached")
+    return df
+
+
+def ingest_local_stats(sources, pool, cache=None):
+    # One future per distinct file; callers copy the frame before changing it
+    return {source: pool.submit(read_local_stats, source, cache) for source in dict.fromkeys(sources)}
+
+
+def ingest_pool(workers=INGEST_WORKERS):
+    return ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="local-stats")
@@ -0,0 +1,110 @@
+import csv
+import io
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+# === CONFIG ===
+NAME_TABLE_FILE = "canonical_names.csv"
+NAME_CACHE_SIZE = 1 << 16
+# Bump whenever ascii_fold or normalize_name change; older table rows are ignored
+NAME_RULES_VERSION = 1
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def ascii_fold(text):
+    # Display form: accents dropped, everything else kept ("Côté" -> "Cote")
+    return unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("utf-8")
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_name(name):
+    # Matching key: folded, lowercased, punctuation runs become one space
+    # ("St. Albert Saints" -> "st albert saints")
+    if not isinstance(name, str):
+        return ""
+    return _NON_ALNUM.sub(" ", ascii_fold(name).lower()).strip()
+
+
+def _non_ascii(text):
+    return text.str.contains(r"[^\x00-\x7f]", regex=True, na=False).astype(bool)
+
+
+class NameTable:
+    # Folded forms of the non-ASCII names seen so far, optionally persisted as
+    # a CSV so names from earlier runs and seasons are never folded again.
+    # ASCII names fold to themselves and are not stored.
+
+    def __init__(self, path=None):
+        self.path = path
+        self.names = {}
+        self.new = []
+        if path and os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    # A crash mid-append leaves at most one short trailing row
+                    if len(row) == 3 and row[2] == str(NAME_RULES_VERSION):
+                        self.names[row[0]] = row[1]
+
+    def lookup(self, raw):
+        folded = self.names.get(raw)
+        if folded is None:
+            folded = self.names[raw] = ascii_fold(raw)
+            self.new.append((raw, folded))
+        return folded
+
+    def fold(self, series):
+        text = series.astype(str)
+        mask = _non_ascii(text)
+        if not mask.any():
+            return text
+        folded = text.copy()
+        folded[mask] = text[mask].map(self.lookup)
+        return folded
+
+    def keys(self, series):
+        if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object).map(lambda v: v if isinstance(v, str) else None)
+        folded = self.fold(series.astype(str).where(series.notna()))
+        return folded.str.lower().str.replace(_NON_ALNUM.pattern, " ", regex=True).str.strip().fillna("")
+
+    def save(self):
+        # Append-only: each run writes just the names it saw for the first time
+        if not self.path or not self.new:
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not os.path.exists(self.path):
+            writer.writerow(["raw", "folded", "version"])
+        writer.writerows((raw, folded, NAME_RULES_VERSION) for raw, folded in self.new)
+        # One write() call, so concurrent pipeline tasks appending to the same
+        # table cannot interleave their rows
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            f.write(buffer.getvalue())
+        self.new = []
+
+
+NAME_TABLE = NameTable()
+
+
+def load_name_table(path=NAME_TABLE_FILE):
+    global NAME_TABLE
+    NAME_TABLE = NameTable(path)
+    return NAME_TABLE
+
+
+def save_name_table():
+    NAME_TABLE.save()
+
+
+def fold_series(series):
+    return NAME_TABLE.fold(series)
+
+
+def normalize_series(series):
+    return NAME_TABLE.keys(series)
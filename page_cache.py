@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+
+# === CONFIG ===
+CACHE_DIR = ".page_cache"
+CACHE_TTL = 7 * 24 * 3600
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+def cache_key(url):
+    # The full URL is the key, so base_url and base_url?tab=stats are separate entries
+    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    # gzip-compressed page_source snapshots on disk, one file per URL.
+    # Entries older than ttl are treated as misses; once the cache grows past
+    # max_bytes the least recently written entries are evicted.
+
+    def __init__(self, root=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, url):
+        key = cache_key(url)
+        return os.path.join(self.root, key[:2], key + ".html.gz")
+
+    def get(self, url, ignore_ttl=False):
+        path = self.path(url)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if not ignore_ttl and self.ttl is not None and age > self.ttl:
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return f.read()
+        except (OSError, EOFError):
+            return None
+
+    def put(self, url, html):
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".html.gz"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def evict(self):
+        with self._lock:
+            now = time.time()
+            kept = []
+            removed = 0
+            for path, size, mtime in self.entries():
+                if self.ttl is not None and now - mtime > self.ttl:
+                    removed += self._remove(path)
+                else:
+                    kept.append((mtime, size, path))
+
+            total = sum(size for _, size, _ in kept)
+            if self.max_bytes is not None and total > self.max_bytes:
+                for mtime, size, path in sorted(kept):
+                    if total <= self.max_bytes:
+                        break
+                    removed += self._remove(path)
+                    total -= size
+            return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
@@ -0,0 +1,197 @@
+import asyncio
+import random
+import threading
+import time
+
+from fetcher import get_html, fetch_all, HTTP_CONCURRENCY, HTTP_PER_DOMAIN
+from page_cache import PageCache, CacheMiss, CACHE_DIR, CACHE_TTL, CACHE_MAX_BYTES
+from telemetry import count, observe
+
+# === CONFIG ===
+PAGE_TIMEOUT = 15
+POLL_INTERVAL = 0.1
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+
+PAGE_CACHE = None
+OFFLINE = False
+
+# Pages that pass their caller's `expect` check over plain HTTP never touch the browser
+HTTP_FAST_PATH = True
+PREFETCHED = {}
+_prefetch_lock = threading.Lock()
+
+
+def configure_cache(enabled=True, offline=False, root=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+    global PAGE_CACHE, OFFLINE
+    PAGE_CACHE = PageCache(root, ttl, max_bytes) if enabled or offline else None
+    OFFLINE = offline
+    if PAGE_CACHE is not None and not offline:
+        removed = PAGE_CACHE.evict()
+        if removed:
+            print(f"🧹 Evicted {removed} stale cached pages")
+    return PAGE_CACHE
+
+
+def configure_http(enabled=True):
+    global HTTP_FAST_PATH
+    HTTP_FAST_PATH = enabled
+
+
+def backoff_delay(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    # Full jitter: uniform over [0, base * 2^attempt], capped.
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def sleep_backoff(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    time.sleep(backoff_delay(attempt, base_delay, max_delay))
+
+
+def _count(driver, css):
+    return driver.execute_script("return document.querySelectorAll(arguments[0]).length", css)
+
+
+def table_present(css="table"):
+    return lambda driver: _count(driver, css) > 0
+
+
+class table_rows_stable:
+    # Ready once the document has loaded and the row count for `css` has
+    # stopped changing between two polls.
+
+    def __init__(self, css="table tr", min_rows=1):
+        self.css = css
+        self.min_rows = min_rows
+        self.reset()
+
+    def reset(self):
+        self._last = None
+
+    def __call__(self, driver):
+        if driver.execute_script("return document.readyState") != "complete":
+            return False
+        count = _count(driver, self.css)
+        stable = count >= self.min_rows and count == self._last
+        self._last = count
+        return stable
+
+
+def record_latency(url, seconds, attempt, ready, source="browser"):
+    # Kept by telemetry for the current run only (p50/p95 in its summary)
+    observe(f"page_load.{source}", seconds, url=url, attempt=attempt, ready=ready)
+    if not ready:
+        count(f"page_load.{source}.not_ready")
+
+
+def _report_load(driver, seconds, ok):
+    # Session pools judge browser health from these; plain drivers have no hook.
+    # Looked up on the type so a lazy driver is not started just to ask.
+    report = getattr(type(driver), "record_load", None)
+    if report is not None:
+        report(driver, seconds, ok)
+
+
+def _http_get(url, expect, headers=None):
+    start = time.perf_counter()
+    html = get_html(url, expect, headers=headers)
+    record_latency(url, time.perf_counter() - start, 1, html is not None, source="http")
+    return html
+
+
+def _http_first(url, expect, headers=None):
+    with _prefetch_lock:
+        if url in PREFETCHED:
+            return PREFETCHED.pop(url)
+    return _http_get(url, expect, headers)
+
+
+def prefetch(urls, expect, concurrency=HTTP_CONCURRENCY, per_domain=HTTP_PER_DOMAIN):
+    """Fetch urls concurrently over plain HTTP ahead of the browser workers.
+
+    Each result, hit or miss, is held until fetch_html asks for that url, so
+    a page is never requested over HTTP twice. Cached urls are skipped.
+    Returns how many pages passed `expect`.
+    """
+    if OFFLINE or not HTTP_FAST_PATH:
+        return 0
+    urls = [url for url in urls if PAGE_CACHE is None or PAGE_CACHE.get(url) is None]
+    if not urls:
+        return 0
+    pages = asyncio.run(fetch_all(urls, lambda url: _http_get(url, expect), concurrency, per_domain))
+    with _prefetch_lock:
+        PREFETCHED.update(pages)
+    return sum(1 for html in pages.values() if html is not None)
+
+
+def _load(driver, url, ready, timeout, retries, base_delay, required):
+    # Imported here so cache hits and the HTTP fast path never load selenium
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    last_error = None
+    for attempt in range(retries):
+        if hasattr(ready, "reset"):
+            ready.reset()
+        start = time.perf_counter()
+        try:
+            driver.get(url)
+            if ready is not None:
+                WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(ready)
+            seconds = time.perf_counter() - start
+            record_latency(url, seconds, attempt + 1, True)
+            _report_load(driver, seconds, True)
+            return driver.page_source, True
+        except (TimeoutException, WebDriverException) as e:
+            seconds = time.perf_counter() - start
+            record_latency(url, seconds, attempt + 1, False)
+            _report_load(driver, seconds, False)
+            last_error = e
+            print(f"⏳ Load attempt {attempt+1} not ready: {url}")
+            if attempt < retries - 1:
+                count("page_load.retries")
+                sleep_backoff(attempt, base_delay)
+
+    if required:
+        raise last_error
+    return driver.page_source, False
+
+
+def load_page(driver, url, ready=None, timeout=PAGE_TIMEOUT, retries=1, base_delay=BASE_DELAY, required=False):
+    """Navigate to url and return page_source as soon as `ready(driver)` holds.
+
+    Failed loads are retried with exponential backoff and jitter. When every
+    attempt times out the last page_source is returned so the caller's parser
+    can decide, unless required=True, in which case the error is raised.
+    """
+    return _load(driver, url, ready, timeout, retries, base_delay, required)[0]
+
+
+def fetch_html(driver, url, ready=None, timeout=PAGE_TIMEOUT, retries=1, base_delay=BASE_DELAY, required=False, expect=None,
+               headers=None):
+    """load_page behind the page cache and the plain-HTTP fast path.
+
+    With `expect`, the page is first fetched without a browser and returned
+    if `expect(html)` holds; the browser only loads pages that fail it.
+    `headers` (e.g. a session Cookie) go with that plain-HTTP request.
+    Only pages that reached their readiness condition are cached. In offline
+    mode the cache is the only source and a miss raises CacheMiss.
+    """
+    if PAGE_CACHE is not None:
+        html = PAGE_CACHE.get(url, ignore_ttl=OFFLINE)
+        if html is not None:
+            count("page_cache.hits")
+            return html
+    if OFFLINE:
+        count("page_cache.offline_misses")
+        raise CacheMiss(url)
+
+    html = _http_first(url, expect, headers) if expect is not None and HTTP_FAST_PATH else None
+    if html is not None:
+        if PAGE_CACHE is not None:
+            PAGE_CACHE.put(url, html)
+        return html
+
+    html, ready_ok = _load(driver, url, ready, timeout, retries, base_delay, required)
+    if PAGE_CACHE is not None and ready_ok:
+        PAGE_CACHE.put(url, html)
+    return html
@@ -1,18 +1,29 @@
 import pandas as pd
 import re
-import unicodedata
-import difflib
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+import argparse
+
+from driver_cache import resolve_chromedriver, forget_chromedriver
+from enrichment import add_age_columns
+from names import normalize_name, normalize_series, load_name_table, save_name_table
+from team_matcher import TeamIndex, extract_numeric_class, ep_team_id_from_url
+from page_cache import CacheMiss
+from fetcher import html_has_rows
+from page_loader import fetch_html, prefetch, table_rows_stable, configure_cache, configure_http
+from storage import write_table, set_storage_format, SCRAPED_SCHEMA, PHASE1_SCHEMA, STORAGE_FORMAT
+from scrape_pool import DomainLimiter, run_pool, DEFAULT_WORKERS, DEFAULT_PER_DOMAIN
+from team_registry import TeamRegistry, TEAM_REGISTRY_FILE, FUZZY_ALIAS_MIN_RATIO
+from telemetry import start_run, finish_run, stage, timed, count
+from table_stream import iter_table_rows
 
 # === CONFIG ===
 PHASE1_INPUT = "league6_2023-2024.csv"
 REFERENCE_MAPPING = "phase1_team_mapping.csv"
 SCRAPED_OUTPUT = "scraped_new_teams.csv"
 FINAL_OUTPUT = "phase1output.csv"
+# MHR rankings are server-rendered; a page with its table rows in the raw HTML needs no browser
+MHR_EXPECT = html_has_rows("<table", min_rows=2)
+# Teams kept per ranking page; parsing stops there. None reads the whole table.
+MHR_MAX_TEAMS = 200
 
 # === AGE/CLASS MAPPING ===
 
@@ -34,13 +45,6 @@ def get_class_from_birth_year(birth_year, season_end_year, is_canadian):
 
 
 # === HELPERS ===
-def normalize_name(name):
-    if not isinstance(name, str):
-        return ""
-    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("utf-8")
-    name = re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
-    return name
-
 def extract_age_level(text):
     match = re.search(r"(?:u\s?(\d{2})|(\d{2})\s?u)", text.lower())
     if match:
@@ -48,40 +52,53 @@ def extract_age_level(text):
     return ""
 
 def get_driver():
+    # Selenium loads only when a page really needs the browser
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.service import Service
+
     options = webdriver.ChromeOptions()
     options.add_argument("--headless")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    try:
+        return webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+    except SessionNotCreatedException:
+        # Chrome updated under the cached driver; resolve it once more
+        forget_chromedriver()
+        return webdriver.Chrome(service=Service(resolve_chromedriver(refresh=True)), options=options)
 
 def extract_links_from_cell(cell):
-    links = cell.find_all("a")
     ep_url = None
     other_links = []
-    for link in links:
-        href = link.get("href", "")
+    for href in cell.links:
         if "eliteprospects.com" in href:
             ep_url = href
         else:
             other_links.append(href)
     return ep_url, other_links
 
-def scrape_mhr_with_links(driver, url):
+def scrape_mhr_with_links(driver, url, max_teams=MHR_MAX_TEAMS):
     print(f"\U0001f4f0 Scraping MHR: {url}")
-    driver.get(url)
-    time.sleep(5)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    table = soup.find("table")
-    if not table:
-        print("⚠️ No MHR table found")
+    try:
+        html = fetch_html(driver, url, ready=table_rows_stable("table tr", min_rows=2), retries=3, expect=MHR_EXPECT)
+    except CacheMiss:
+        print(f"📭 Not in page cache (offline): {url}")
         return pd.DataFrame()
+    return parse_mhr_table(html, max_teams)
 
-    rows = table.find_all("tr")[1:]
+@timed("phase1.parse_mhr")
+def parse_mhr_table(html, max_teams=MHR_MAX_TEAMS):
     results = []
     seen_teams = set()
+    found = False
 
-    for row in rows:
-        cols = row.find_all("td")
+    # Rows stream out of the parser; breaking off leaves the rest of the page unparsed
+    for i, row in enumerate(iter_table_rows(html)):
+        found = True
+        if i == 0:
+            continue
+        cols = row.tds
         if len(cols) < 7:
             continue
 
@@ -108,49 +125,39 @@ def scrape_mhr_with_links(driver, url):
             "OtherLinks": ", ".join(other_links)
         })
 
-        if len(results) >= 200:
-            print("🔴 Reached 200 teams, stopping scrape for this page.")
+        if max_teams and len(results) >= max_teams:
+            print(f"🔴 Reached {max_teams} teams, stopping scrape for this page.")
             break
 
+    if not found:
+        print("⚠️ No MHR table found")
     return pd.DataFrame(results)
 
 
-def extract_numeric_class(class_str):
-    match = re.search(r"U(\d{2})", str(class_str).upper())
-    return int(match.group(1)) if match else None
-
-def extract_ep_class_from_url(url):
-    match = re.search(r"-u(\d{2})", str(url).lower())
-    return int(match.group(1)) if match else None
-
-def match_to_ep(scraped_df, ref_df):
+def match_to_ep(scraped_df, ref_df, registry=None):
     matched_rows = []
-    used_refs = set()
+    index = TeamIndex(ref_df)
+    ref_rows = index.ref_df.to_dict("records")
+    resolved = 0
 
-    for _, row in scraped_df.iterrows():
+    for row in scraped_df.to_dict("records"):
         norm_team = row["NormalizedTeam"]
         team_class_num = extract_numeric_class(row.get("Class 1", ""))
 
-        candidates = []
-        for _, ref_row in ref_df.iterrows():
-            ref_norm = ref_row["NormalizedTeam"]
-            ep_url = ref_row.get("EP_URL", "")
-            ref_class_num = extract_ep_class_from_url(ep_url)
-
-            if ref_row["NormalizedTeam"] in used_refs:
-                continue
-            if team_class_num and ref_class_num and abs(team_class_num - ref_class_num) > 1:
-                continue
-
-            score = difflib.SequenceMatcher(None, norm_team, ref_norm).ratio()
-            candidates.append((score, ref_row))
-
-        if not candidates:
+        # A name matched in an earlier run or season resolves straight to its EP team
+        pos = None
+        score = 1.0
+        if registry is not None:
+            ep_team_id = registry.resolve(norm_team)
+            if ep_team_id:
+                pos = index.position_of(ep_team_id, team_class_num)
+        if pos is not None:
+            resolved += 1
+        else:
+            pos, score = index.best_match_with_score(norm_team, team_class_num)
+        if pos is None:
             continue
-
-        # Pick best match by score
-        candidates.sort(reverse=True, key=lambda x: x[0])
-        best_score, best_match = candidates[0]
+        best_match = ref_rows[pos]
 
         matched_rows.append({
             "Team": row["Team"],
@@ -163,61 +170,110 @@ def match_to_ep(scraped_df, ref_df):
             "TeamRating": row["TeamRating"],
             "OpponentRating": row["OpponentRating"]
         })
-        used_refs.add(best_match["NormalizedTeam"])
-
+        index.mark_used(pos)
+        # Weak fuzzy matches are used this run but not remembered
+        if registry is not None and score >= FUZZY_ALIAS_MIN_RATIO:
+            registry.add_alias(norm_team, ep_team_id_from_url(best_match["EP_URL"]), row["Team"], "mhr", row.get("Season"))
+
+    if registry is not None:
+        count("phase1.registry_hits", resolved)
+        count("phase1.fuzzy_matches", len(matched_rows) - resolved)
+        print(f"🗂️ Team registry resolved {resolved} of {len(matched_rows)} matched teams; the rest were fuzzy matched")
     return pd.DataFrame(matched_rows)
 
 
-def run_scraper():
-    leagues = pd.read_csv(PHASE1_INPUT)
-    ref = pd.read_csv(REFERENCE_MAPPING)
-    ref["NormalizedTeam"] = ref["Team"].apply(normalize_name)
-
-    driver = get_driver()
-    all_data = []
-
-    for _, row in leagues.iterrows():
-        mhr_url = row.get("MHR", "")
-        if not isinstance(mhr_url, str) or not mhr_url.startswith("http"):
-            print(f"⚠️ Skipping invalid MHR URL: {mhr_url}")
-            continue
-
-        df = scrape_mhr_with_links(driver, mhr_url)
-        if df.empty:
-            continue
-
-        context = {
-            "Level": str(row.get("Level", "")),
-            "Class 1": str(row.get("Class 1", "")),
-            "Class 2": str(row.get("Class 2", "")),
-            "Class 3": str(row.get("Class 3", "")),
-            "Season": str(row.get("Season", "2023-2024"))
-        }
-        for key, value in context.items():
-            df[key] = value
-
-        # === AGE MAPPING ===
-        season_end = int(context["Season"].split("-")[1])
-        df["IsCanadian"] = df.apply(lambda x: any("can" in str(context[k]).lower() for k in ["Class 1", "Class 2", "Class 3"]), axis=1)
-        df["BirthYear"] = df["AgeLevel"].apply(lambda code: get_birth_year_from_code(code, season_end, False))
-        df["BirthYear"] = df.apply(lambda row: get_birth_year_from_code(row["AgeLevel"], season_end, row["IsCanadian"]), axis=1)
-        df["ClassLevel"] = df.apply(lambda row: get_class_from_birth_year(row["BirthYear"], season_end, row["IsCanadian"]), axis=1)
+def scrape_league(driver, row, limiter=None, max_teams=MHR_MAX_TEAMS):
+    mhr_url = row.get("MHR", "")
+    if not isinstance(mhr_url, str) or not mhr_url.startswith("http"):
+        print(f"⚠️ Skipping invalid MHR URL: {mhr_url}")
+        return None
 
-        all_data.append(df)
+    if limiter is not None:
+        with limiter.slot(mhr_url):
+            df = scrape_mhr_with_links(driver, mhr_url, max_teams)
+    else:
+        df = scrape_mhr_with_links(driver, mhr_url, max_teams)
+    if df.empty:
+        return None
 
-    driver.quit()
+    context = {
+        "Level": str(row.get("Level", "")),
+        "Class 1": str(row.get("Class 1", "")),
+        "Class 2": str(row.get("Class 2", "")),
+        "Class 3": str(row.get("Class 3", "")),
+        "Season": str(row.get("Season", "2023-2024"))
+    }
+    for key, value in context.items():
+        df[key] = value
+
+    # === AGE MAPPING ===
+    season_end = int(context["Season"].split("-")[1])
+    add_age_columns(df, season_end, [context[k] for k in ["Class 1", "Class 2", "Class 3"]])
+
+    return df
+
+
+def run_scraper(workers=DEFAULT_WORKERS, per_domain=DEFAULT_PER_DOMAIN, use_cache=True, offline=False, use_http=True,
+                max_teams=MHR_MAX_TEAMS, input_file=PHASE1_INPUT, reference_file=REFERENCE_MAPPING,
+                scraped_output=SCRAPED_OUTPUT, output_file=FINAL_OUTPUT, registry_file=TEAM_REGISTRY_FILE):
+    start_run("phase1")
+    configure_cache(enabled=use_cache, offline=offline)
+    configure_http(enabled=use_http)
+    load_name_table()
+    leagues = pd.read_csv(input_file)
+    ref = pd.read_csv(reference_file)
+    ref["NormalizedTeam"] = normalize_series(ref["Team"])
+
+    limiter = DomainLimiter(per_domain)
+    rows = [row for _, row in leagues.iterrows()]
+    urls = [row.get("MHR") for row in rows if isinstance(row.get("MHR"), str) and row.get("MHR").startswith("http")]
+    with stage("phase1.prefetch") as current:
+        fetched = current.rows = prefetch(urls, MHR_EXPECT, per_domain=per_domain)
+    if fetched:
+        print(f"🌐 Fetched {fetched}/{len(urls)} MHR pages over plain HTTP; the rest need a browser")
+    if workers > 1:
+        print(f"🧵 Scraping {len(rows)} leagues with {workers} browser workers ({per_domain} per domain)")
+    make_driver = (lambda: None) if offline else get_driver
+    with stage("phase1.scrape") as current:
+        current.extra["workers"] = workers
+        results = run_pool(rows, lambda driver, row: scrape_league(driver, row, limiter, max_teams), make_driver, workers=workers)
+        all_data = [df for df in results if df is not None]
+        current.rows = sum(len(df) for df in all_data)
+    save_name_table()
 
     if not all_data:
         print("❌ No data scraped. Aborting.")
+        finish_run()
         return
 
     full_df = pd.concat(all_data, ignore_index=True)
-    full_df.to_csv(SCRAPED_OUTPUT, index=False)
-    print(f"✅ Scraped data saved to: {SCRAPED_OUTPUT}")
-
-    matched_df = match_to_ep(full_df, ref)
-    matched_df.to_csv(FINAL_OUTPUT, index=False)
-    print(f"✅ Final Phase 1 mapping written to: {FINAL_OUTPUT}")
+    with stage("phase1.write_scraped", rows=len(full_df)):
+        write_table(full_df, scraped_output, SCRAPED_SCHEMA)
+    print(f"✅ Scraped data saved to: {scraped_output}")
+
+    registry = TeamRegistry(registry_file) if registry_file else None
+    with stage("phase1.match") as current:
+        if registry is not None:
+            registry.add_reference(ref)
+        matched_df = match_to_ep(full_df, ref, registry)
+        current.rows = len(matched_df)
+    if registry is not None:
+        registry.close()
+    write_table(matched_df, output_file, PHASE1_SCHEMA)
+    print(f"✅ Final Phase 1 mapping written to: {output_file}")
+    finish_run()
 
 if __name__ == "__main__":
-    run_scraper()
+    parser = argparse.ArgumentParser(description="Phase 1: scrape MHR rankings and map teams to EliteProspects")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="number of parallel Chrome workers")
+    parser.add_argument("--per-domain", type=int, default=DEFAULT_PER_DOMAIN, help="max concurrent page loads per domain")
+    parser.add_argument("--offline", action="store_true", help="parse only from the page cache, never start a browser")
+    parser.add_argument("--no-cache", action="store_true", help="always load pages live and do not cache them")
+    parser.add_argument("--no-http", action="store_true", help="load every page in the browser, skipping the plain-HTTP fast path")
+    parser.add_argument("--storage", choices=["csv", "parquet"], default=STORAGE_FORMAT, help="hand-off format (CSV is always written)")
+    parser.add_argument("--max-teams", type=int, default=MHR_MAX_TEAMS, help="teams kept per ranking page (0 = the whole table)")
+    parser.add_argument("--no-registry", action="store_true", help="fuzzy match every team, ignoring the team registry")
+    args = parser.parse_args()
+    set_storage_format(args.storage)
+    run_scraper(workers=args.workers, per_domain=args.per_domain, use_cache=not args.no_cache, offline=args.offline,
+                use_http=not args.no_http, max_teams=args.max_teams, registry_file=None if args.no_registry else TEAM_REGISTRY_FILE)
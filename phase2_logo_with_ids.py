@@ -1,256 +1,387 @@
 import pandas as pd
-import numpy as np
 import os
 import re
-import time
-import unicodedata
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-
-from closerun import get_driver, login_ep
+import argparse
+from urllib.parse import urljoin
+
+from checkpoints import CheckpointStore, checkpoint_keys, CHECKPOINT_DIR
+from fetcher import html_has_rows
+from local_stats import (
+    LocalStatsCache, ingest_local_stats, ingest_pool, INGEST_WORKERS, LOCAL_STATS_CACHE,
+)
+from names import fold_series, normalize_series, load_name_table, save_name_table
+from page_cache import CacheMiss
+from scrape_pool import DriverStartError
+from session_pool import SessionPool, SessionCookies
+from storage import read_table, convert_csv, set_storage_format, PHASE1_SCHEMA, PHASE2_SCHEMA, STORAGE_FORMAT
+from page_loader import (
+    fetch_html, table_rows_stable, sleep_backoff, configure_cache, configure_http, BASE_DELAY, PAGE_TIMEOUT,
+)
+from table_stream import iter_table_rows, has_class
+from team_logos import run_logos, fill_logo_files, LOGO_DIR
+from team_matcher import ep_team_id_from_url
+from team_registry import TeamRegistry, TEAM_REGISTRY_FILE
+from telemetry import start_run, finish_run, stage, timed, count
 
 PHASE1_FILE = "phase1output.csv"
 OUTPUT_FILE = "phase2_team_rosters.csv"
 MISSING_ROSTER_FILE = "missing_rosters_for_manual_input.csv"
 
+ROSTER_READY = "table[class^='SortTable_table'] tr"
+STATS_ROWS = "table.SortTable_table__jnnJk tbody tr"
+# Raw-HTML checks for the plain-HTTP fast path (header row plus at least one player)
+ROSTER_EXPECT = html_has_rows("SortTable_table", min_rows=2)
+STATS_EXPECT = html_has_rows("SortTable_table__jnnJk", min_rows=2)
+ROSTER_TABLE = has_class("SortTable_table")
+STATS_TABLE = has_class("SortTable_table__jnnJk")
+FLAG_WRAPPER = "DualFlag_flagWrapper__Qkagc"
+# The browser's saved EP login. Team pages only take the plain-HTTP fast path
+# with these cookies: signed out, EP can still show a table, and the row
+# check alone would accept it.
+EP_SESSION = SessionCookies()
+# Only shown to a signed-in user. If EP changes it every restore looks signed
+# out and the browser just logs in again, as it did before cookies were saved.
+EP_SIGNED_IN_MARKER = "/logout"
+
+
+def start_browser():
+    # closerun brings in the browser stack; only import it once Chrome is needed
+    from closerun import get_driver
+    return get_driver()
+
+
+def log_in(driver):
+    from closerun import login_ep
+    return login_ep(driver)
+
+
+def ep_signed_in(driver):
+    return EP_SIGNED_IN_MARKER in driver.page_source
+
+
+def _flag_image(cell):
+    # The flag inside EP's DualFlag wrapper, else the first image with alt text
+    for attrs, ancestors in cell.images:
+        if any(tag == "div" and FLAG_WRAPPER in classes for tag, classes in ancestors):
+            return attrs
+    return next((attrs for attrs, _ in cell.images if "alt" in attrs), None)
+
+
+@timed("phase2.parse_roster")
+def parse_ep_roster(html, team_name):
+    # Rows and images stream out of the parser; nothing after the roster table is read
+    images = []
+    roster = []
+    current_section = ""
+    found = False
+    for row in iter_table_rows(html, ROSTER_TABLE, images):
+        found = True
+        if row.has_th:
+            section = row.get_text(strip=True).upper()
+            if "GOALTENDER" in section:
+                current_section = "G"
+            elif "DEFENSE" in section:
+                current_section = "D"
+            elif "FORWARD" in section:
+                current_section = "F"
+            continue
 
-def normalize_name(name):
-    if not isinstance(name, str):
-        return ""
-    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('utf-8')
-    name = re.sub(r'[^a-zA-Z0-9 ]', '', name)
-    return name.strip().lower()
+        cols = row.tds
+        if len(cols) < 1:
+            continue
 
+        jersey = nationality = player_name = position = birth_year = ""
 
-def normalize_local_stats(df):
-    df = df.rename(columns=lambda x: x.strip())
-    df = df.rename(columns={
-        'GamesPlayed': 'GP', 'Goals': 'G', 'Assists': 'A',
-    })
-    for col in ['Player', 'GP', 'G', 'A']:
-        if col not in df.columns:
-            df[col] = np.nan
-    df["PPG"] = df.apply(lambda r: (r["G"] + r["A"]) / r["GP"] if r["GP"] > 0 else 0, axis=1)
-    if "Position" not in df.columns:
-        df["Position"] = "F"
-    return df
+        for col in cols:
+            text = col.get_text(strip=True)
+            if not jersey and re.match(r"#?\d{1,2}$", text):
+                jersey = text
+                continue
+            if not nationality:
+                img = _flag_image(col)
+                if img and "flag" in img.get("alt", "").lower():
+                    nationality = img["alt"].split()[0]
+                continue
+            if not birth_year and re.match(r"19\d{2}|20[0-2]\d", text):
+                birth_year = text
+                continue
+            if not player_name:
+                match = re.search(r"(.*?)\s*\(([A-Z]+)\)", text)
+                if match:
+                    player_name = match.group(1).strip()
+                    position = match.group(2).strip()
+                else:
+                    player_name = text.strip()
+                continue
 
+        position = position or current_section or "F"
+        if player_name:
+            roster.append({
+                "Player": player_name,
+                "Team": team_name,
+                "Position": position,
+                "BirthYear": birth_year,
+                "Nationality": nationality,
+                "Jersey": jersey
+            })
+    if not found:
+        raise ValueError("No roster table found")
+
+    # Grab logo URL from EP team page
+    logo_url = ""
+    logo_el = next((img for img in images if "team-logos" in img.get("src", "")), None) or \
+        next((img for img in images if "TeamHeader_logo__" in img.get("class", "").split()), None)
+    if logo_el and "src" in logo_el:
+        logo_url = logo_el["src"]
+    roster_df = pd.DataFrame(roster)
+    roster_df.attrs["logo_url"] = logo_url
+    return roster_df
+
+
+@timed("phase2.parse_stats")
+def parse_ep_stats(html):
+    stats = []
+    found = False
+    for row in iter_table_rows(html, STATS_TABLE):
+        if row.section != "tbody":
+            continue
+        found = True
+        cols = row.tds
+        if len(cols) < 6:
+            continue
+        name_pos = cols[2].get_text(" ", strip=True)
+        match = re.match(r"(.*?)\s*\((\w+)\)", name_pos)
+        player = match.group(1).strip() if match else name_pos
+        position = match.group(2) if match else "F"
+        gp, g, a = (cols[i].get_text(strip=True) for i in (3, 4, 5))
+        if not (gp.isdigit() and g.isdigit() and a.isdigit()):
+            continue
+        gp, g, a = int(gp), int(g), int(a)
+        ppg = round((g + a) / gp, 4) if gp > 0 else 0
+        stats.append({"Player": player, "Position": position, "GP": gp, "G": g, "A": a, "PPG": ppg})
+    if not found:
+        raise ValueError("No stats table found")
+    return pd.DataFrame(stats)
 
-def scrape_ep_team_roster(driver, base_url, team_name, retries=3, delay=5):
-    for attempt in range(retries):
-        try:
-            print(f"🌀 Attempt {attempt+1} for {team_name}")
-            driver.get(base_url)
-            time.sleep(3)
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            # Grab logo URL from EP team page
-            logo_url = ""
-            logo_el = soup.select_one("img[src*='team-logos']") or soup.select_one("img.TeamHeader_logo__")
-            if logo_el and logo_el.has_attr("src"):
-                logo_url = logo_el["src"]
-
-            table = soup.find("table", class_=lambda c: c and c.startswith("SortTable_table"))
-            if not table:
-                raise ValueError("No roster table found")
-
-            roster = []
-            current_section = ""
-            for row in table.find_all("tr"):
-                if row.find("th"):
-                    section = row.get_text(strip=True).upper()
-                    if "GOALTENDER" in section:
-                        current_section = "G"
-                    elif "DEFENSE" in section:
-                        current_section = "D"
-                    elif "FORWARD" in section:
-                        current_section = "F"
-                    continue
-
-                cols = row.find_all("td")
-                if len(cols) < 1:
-                    continue
-
-                jersey = nationality = player_name = position = birth_year = ""
-
-                for col in cols:
-                    text = col.get_text(strip=True)
-                    if not jersey and re.match(r"#?\d{1,2}$", text):
-                        jersey = text
-                        continue
-                    if not nationality:
-                        img = col.select_one("div.DualFlag_flagWrapper__Qkagc img") or col.select_one("img[alt]")
-                        if img and "flag" in img.get("alt", "").lower():
-                            nationality = img["alt"].split()[0]
-                        continue
-                    if not birth_year and re.match(r"19\d{2}|20[0-2]\d", text):
-                        birth_year = text
-                        continue
-                    if not player_name:
-                        match = re.search(r"(.*?)\s*\(([A-Z]+)\)", text)
-                        if match:
-                            player_name = match.group(1).strip()
-                            position = match.group(2).strip()
-                        else:
-                            player_name = text.strip()
-                        continue
-
-                position = position or current_section or "F"
-                if player_name:
-                    roster.append({
-                        "Player": player_name,
-                        "Team": team_name,
-                        "Position": position,
-                        "BirthYear": birth_year,
-                        "Nationality": nationality,
-                        "Jersey": jersey
-                    })
-            return pd.DataFrame(roster)
 
-        except Exception as e:
-            print(f"⚠️ Attempt {attempt+1} failed for {team_name}: {e}")
-            time.sleep(delay)
-    print(f"❌ Final fail: {team_name}")
-    return pd.DataFrame()
+def ep_http_headers(url):
+    cookie = EP_SESSION.cookie_header(url)
+    return {"Cookie": cookie} if cookie else None
 
 
-def scrape_ep_team_stats(driver, base_url, retries=3, delay=5):
-    stats_url = base_url + "?tab=stats"
+def _fetch_and_parse(driver, url, parse, ready, expect, label, retries, delay, timeout=None):
+    headers = ep_http_headers(url)
+    if headers is None:
+        # No saved login yet (the browser saves one once it has signed in)
+        expect = None
     for attempt in range(retries):
         try:
-            print(f"📊 Attempt {attempt+1} to scrape stats: {stats_url}")
-            driver.get(stats_url)
-            time.sleep(3)
-            stats = []
-            WebDriverWait(driver, 10).until(
-                lambda d: len(d.find_elements(By.CSS_SELECTOR, "table.SortTable_table__jnnJk tbody tr")) > 0
-            )
-            rows = driver.find_elements(By.CSS_SELECTOR, "table.SortTable_table__jnnJk tbody tr")
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, "td")
-                if len(cols) < 6:
-                    continue
-                try:
-                    name_pos = cols[2].text.strip()
-                    match = re.match(r"(.*?)\s*\((\w+)\)", name_pos)
-                    player = match.group(1).strip() if match else name_pos
-                    position = match.group(2) if match else "F"
-                    gp, g, a = cols[3].text.strip(), cols[4].text.strip(), cols[5].text.strip()
-                    if not (gp.isdigit() and g.isdigit() and a.isdigit()):
-                        continue
-                    gp, g, a = int(gp), int(g), int(a)
-                    ppg = round((g + a) / gp, 4) if gp > 0 else 0
-                    stats.append({"Player": player, "Position": position, "GP": gp, "G": g, "A": a, "PPG": ppg})
-                except:
-                    continue
-            return pd.DataFrame(stats)
+            print(f"{label} attempt {attempt+1}: {url}")
+            html = fetch_html(driver, url, ready=ready, timeout=timeout or PAGE_TIMEOUT, required=True, expect=expect,
+                              headers=headers)
+            return parse(html)
+        except CacheMiss:
+            print(f"📭 Not in page cache (offline): {url}")
+            return pd.DataFrame()
+        except DriverStartError:
+            raise
         except Exception as e:
-            print(f"⚠️ Attempt {attempt+1} failed: {e}")
-            time.sleep(delay)
-    print(f"❌ Final stats scrape fail for: {base_url}")
+            print(f"⚠️ Attempt {attempt+1} failed for {url}: {e}")
+            count("phase2.fetch_retries")
+            sleep_backoff(attempt, delay)
+    print(f"❌ Final fail: {url}")
+    count("phase2.fetch_gave_up")
     return pd.DataFrame()
 
 
-def run_phase2():
-    df = pd.read_csv(PHASE1_FILE)
+def scrape_ep_team_roster(driver, base_url, team_name, retries=3, delay=BASE_DELAY):
+    return _fetch_and_parse(driver, base_url, lambda html: parse_ep_roster(html, team_name),
+                            table_rows_stable(ROSTER_READY), ROSTER_EXPECT, "🌀 Roster", retries, delay)
 
-    MAX_TEAMS_PER_DRIVER = 30
-    scrape_counter = 0
-    driver = get_driver()
-    login_ep(driver)
 
-    all_data = []
-    missing_rosters = []
+def scrape_ep_team_stats(driver, base_url, retries=3, delay=BASE_DELAY):
+    return _fetch_and_parse(driver, base_url + "?tab=stats", parse_ep_stats,
+                            table_rows_stable(STATS_ROWS), STATS_EXPECT, "📊 Stats", retries, delay, timeout=10)
 
-    for idx, (_, row) in enumerate(df.iterrows()):
-        if scrape_counter % MAX_TEAMS_PER_DRIVER == 0 and scrape_counter > 0:
-            print(f"🔁 Restarting Chrome after {MAX_TEAMS_PER_DRIVER} teams...")
-            driver.quit()
-            time.sleep(2)
-            driver = get_driver()
-            login_ep(driver)
 
-        scrape_counter += 1
+def merge_roster(stats_df, roster_df):
+    if roster_df.empty:
+        return stats_df
+    roster_df = roster_df.copy()
+    roster_df["Player_norm"] = normalize_series(roster_df["Player"])
+    stats_df["Player_norm"] = normalize_series(stats_df["Player"])
+    return stats_df.merge(
+        roster_df[["Player_norm", "BirthYear", "Nationality", "Jersey"]],
+        on="Player_norm", how="left"
+    )
+
 
+def scrape_ep_team_page(driver, base_url, team_name, retries=3, delay=BASE_DELAY):
+    # One snapshot of the stats tab and one of the roster tab, both parsed in-process.
+    # A team without stats is dropped anyway, so its roster tab is never loaded.
+    stats_df = scrape_ep_team_stats(driver, base_url, retries, delay)
+    if stats_df.empty:
+        return stats_df
+    roster_df = scrape_ep_team_roster(driver, base_url, team_name, retries, delay)
+    merged = merge_roster(stats_df, roster_df)
+    # Logo src may be relative to the team page; the logo stage downloads it
+    logo_url = roster_df.attrs.get("logo_url", "")
+    merged["TeamLogoURL"] = urljoin(base_url, logo_url) if logo_url else ""
+    return merged
+
+
+def run_phase2(use_cache=True, offline=False, fresh=False, use_http=True, phase1_file=PHASE1_FILE,
+               output_file=OUTPUT_FILE, missing_file=MISSING_ROSTER_FILE, checkpoint_dir=CHECKPOINT_DIR,
+               registry_file=TEAM_REGISTRY_FILE, spare=True, ingest_workers=INGEST_WORKERS,
+               local_stats_cache=LOCAL_STATS_CACHE, logo_dir=LOGO_DIR):
+    start_run("phase2")
+    configure_cache(enabled=use_cache, offline=offline)
+    configure_http(enabled=use_http)
+    load_name_table()
+    with stage("phase2.load_phase1") as current:
+        df = read_table(phase1_file, PHASE1_SCHEMA)
+        current.rows = len(df)
+
+    store = CheckpointStore(checkpoint_dir)
+    # Checkpoints only carry over an interrupted run; a finished one starts over
+    if fresh or store.is_complete():
+        store.clear()
+    keys = checkpoint_keys(df)
+    done = store.completed()
+    if done:
+        remaining = sum(1 for k in keys if k not in done)
+        print(f"♻️ Resuming from checkpoints: {len(keys) - remaining} teams done, {remaining} remaining")
+
+    registry = TeamRegistry(registry_file) if registry_file else None
+    # Chrome starts only when a page fails the plain-HTTP path. It signs in
+    # from the saved EP session when it can, and is swapped for a pre-warmed
+    # spare when it gets slow, error-prone or too big.
+    driver = SessionPool(start_browser, log_in, cookies=EP_SESSION, spare=spare, signed_in=ep_signed_in)
+    offline_missing = []
+
+    def save_team(key, row, stats_df):
         team = row['Team']
         ep_url = row.get('EP_URL')
-        local_file = row.get("LocalStatsFile")
-
-        if pd.isna(ep_url):
-            print(f"❌ Skipping {team}, no EP URL")
-            continue
-
-        print(f"📥 Scraping: {team} | {ep_url}")
-        try:
-            stats_df = pd.DataFrame()
-            if pd.notna(local_file) and os.path.exists(local_file):
-                print(f"📂 Loading local stats from: {local_file}")
-                stats_df = normalize_local_stats(pd.read_csv(local_file))
+        if stats_df.empty:
+            print(f"⚠️ No players found for {team}, consider local ingest.")
+            if offline:
+                # A cache miss is not a verdict on the team; leave it for an online run
+                offline_missing.append({"Team": team, "EP_URL": ep_url, "Note": "Not in page cache"})
             else:
-                print(f"❌ LocalStatsFile not found or empty. Falling back to scrape.")
-                stats_df = scrape_ep_team_stats(driver, ep_url)
-
-                # Also get roster metadata (birth year, nationality, etc.)
-                roster_df = scrape_ep_team_roster(driver, ep_url, team)
-                if not roster_df.empty:
-                    roster_df["Player_norm"] = roster_df["Player"].apply(normalize_name)
-                    stats_df["Player_norm"] = stats_df["Player"].apply(normalize_name)
-                    stats_df = stats_df.merge(
-                        roster_df[["Player_norm", "BirthYear", "Nationality", "Jersey"]],
-                        on="Player_norm", how="left"
-                    )
-
-            if stats_df.empty:
-                print(f"⚠️ No players found for {team}, consider local ingest.")
-                missing_rosters.append({"Team": team, "EP_URL": ep_url, "Note": "No stats found"})
-                continue
+                store.record_missing(key, team, ep_url, "No stats found")
+            return
 
-            stats_df["Player"] = stats_df["Player"].apply(lambda x: unicodedata.normalize('NFKD', str(x)).encode('ascii', 'ignore').decode('utf-8'))
-            stats_df["Team"] = team
+        stats_df["Player"] = fold_series(stats_df["Player"])
+        stats_df["Team"] = team
 
-        # Extract EP_Team_ID from EP_URL and build TeamLogoFile
-        ep_url = str(row.get("EP_URL", ""))
-        match = re.search(r"/team/(\d+)", ep_url)
-        ep_team_id = match.group(1) if match else ""
+        # Extract EP_Team_ID from EP_URL; TeamLogoFile is filled in once the logos are downloaded
+        ep_team_id = ep_team_id_from_url(row.get("EP_URL", ""))
         stats_df["EP_Team_ID"] = ep_team_id
-        stats_df["TeamLogoFile"] = ep_team_id + ".jpg" if ep_team_id else ""
-
+        stats_df["TeamLogoFile"] = ""
+        if registry is not None:
+            registry.add_team(ep_team_id, ep_url, season=row.get("Season"))
 
-            for col in ['EP_URL', 'Level', 'Class 1', 'Class 2', 'Class 3', 'Season', 'OpponentRating']:
-                stats_df[col] = row.get(col, None)
+        for col in ['EP_URL', 'Level', 'Class 1', 'Class 2', 'Class 3', 'Season', 'OpponentRating']:
+            stats_df[col] = row.get(col, None)
 
-            all_data.append(stats_df)
-            print(f"✅ Appended {len(stats_df)} players from {team}")
+        store.save(key, team, stats_df)
+        print(f"✅ Checkpointed {len(stats_df)} players from {team}")
 
-        except Exception as e:
-            print(f"❌ Error scraping {team}: {e}")
+    # Teams with a local stats sheet never need the browser. Their sheets
+    # are read on worker threads while the browser works through the rest.
+    local_teams, scrape_teams = [], []
+    for key, (_, row) in zip(keys, df.iterrows()):
+        if key in done:
+            continue
+        if pd.isna(row.get('EP_URL')):
+            print(f"❌ Skipping {row['Team']}, no EP URL")
             continue
+        local_file = row.get("LocalStatsFile")
+        if pd.notna(local_file) and os.path.exists(local_file):
+            local_teams.append((key, row))
+        else:
+            scrape_teams.append((key, row))
+    if local_teams:
+        print(f"📂 Reading local stats for {len(local_teams)} teams in the background; {len(scrape_teams)} teams to scrape")
+
+    with ingest_pool(ingest_workers) as pool:
+        loaded = ingest_local_stats([row["LocalStatsFile"] for _, row in local_teams], pool,
+                                    LocalStatsCache(local_stats_cache) if local_stats_cache else None)
+
+        for key, row in scrape_teams:
+            driver.recycle_if_unhealthy()
+            team = row['Team']
+            ep_url = row.get('EP_URL')
+            print(f"📥 Scraping: {team} | {ep_url}")
+            try:
+                print(f"❌ LocalStatsFile not found or empty. Falling back to scrape.")
+                # Stats plus roster metadata (birth year, nationality, etc.)
+                with stage("phase2.scrape_team") as current:
+                    stats_df = scrape_ep_team_page(driver, ep_url, team)
+                    current.rows = len(stats_df)
+                save_team(key, row, stats_df)
+            except Exception as e:
+                print(f"❌ Error scraping {team}: {e}")
+                count("phase2.team_errors")
+
+        for key, row in local_teams:
+            team = row['Team']
+            try:
+                # The same sheet can back several rows; each gets its own copy
+                stats_df = loaded[row["LocalStatsFile"]].result().copy()
+                print(f"📂 Loaded local stats for {team} from: {row['LocalStatsFile']}")
+                save_team(key, row, stats_df)
+            except Exception as e:
+                print(f"❌ Error reading local stats for {team}: {e}")
+                count("phase2.team_errors")
 
     driver.quit()
+    save_name_table()
 
-    if not all_data:
+    with stage("phase2.build") as current:
+        total = current.rows = store.build(keys, output_file)
+    missing_rosters = store.missing(keys) + offline_missing
+    store.mark_complete()
+    if not total:
         print("❌ No player data collected after Phase2 scrape. Aborting save.")
+        if registry is not None:
+            registry.close()
+        finish_run()
         return
 
-    final_df = pd.concat(all_data, ignore_index=True)
-    final_df["GP"] = pd.to_numeric(final_df["GP"], errors="coerce").fillna(0)
-
-    team_flag = (
-        final_df.groupby("Team")["GP"]
-        .apply(lambda g: (g < 10).all())
-        .rename("StatsMissing")
-    )
-    final_df = final_df.merge(team_flag, on="Team", how="left")
-
-    final_df.to_csv(OUTPUT_FILE, index=False)
-    print(f"✅ Phase 2 complete. Saved final output with {len(final_df)} players to {OUTPUT_FILE}")
+    if logo_dir:
+        if not offline:
+            run_logos(output_file, logo_dir)
+        # Thumbnails from this run or an earlier one; offline runs reuse the cache
+        logo_files = fill_logo_files(output_file, logo_dir)
+        if registry is not None:
+            for ep_team_id, logo_file in logo_files.items():
+                registry.add_team(ep_team_id, logo_file=logo_file)
+    if registry is not None:
+        registry.close()
+    with stage("phase2.convert", rows=total):
+        convert_csv(output_file, PHASE2_SCHEMA)
+    print(f"✅ Phase 2 complete. Saved final output with {total} players to {output_file}")
 
     if missing_rosters:
-        pd.DataFrame(missing_rosters).to_csv(MISSING_ROSTER_FILE, index=False)
-        print(f"⚠️ Saved missing roster log to {MISSING_ROSTER_FILE}")
-
+        pd.DataFrame(missing_rosters).to_csv(missing_file, index=False)
+        print(f"⚠️ Saved missing roster log to {missing_file}")
+    finish_run()
 
 if __name__ == "__main__":
-    run_phase2()
+    parser = argparse.ArgumentParser(description="Phase 2: collect EliteProspects rosters and stats")
+    parser.add_argument("--offline", action="store_true", help="parse only from the page cache, never start a browser")
+    parser.add_argument("--no-cache", action="store_true", help="always load pages live and do not cache them")
+    parser.add_argument("--fresh", action="store_true", help="discard existing checkpoints and scrape every team again")
+    parser.add_argument("--no-http", action="store_true", help="load every page in the browser, skipping the plain-HTTP fast path")
+    parser.add_argument("--ingest-workers", type=int, default=INGEST_WORKERS, help="threads reading local stats files")
+    parser.add_argument("--no-local-cache", action="store_true", help="parse every local stats file again, ignoring the cache")
+    parser.add_argument("--no-spare", action="store_true", help="do not keep a second, pre-warmed browser ready")
+    parser.add_argument("--no-logos", action="store_true", help="skip downloading team logos")
+    parser.add_argument("--storage", choices=["csv", "parquet"], default=STORAGE_FORMAT, help="hand-off format (CSV is always written)")
+    args = parser.parse_args()
+    set_storage_format(args.storage)
+    run_phase2(use_cache=not args.no_cache, offline=args.offline, fresh=args.fresh, use_http=not args.no_http,
+               spare=not args.no_spare, ingest_workers=args.ingest_workers,
+               local_stats_cache=None if args.no_local_cache else LOCAL_STATS_CACHE,
+               logo_dir=None if args.no_logos else LOGO_DIR)
@@ -1,105 +1,113 @@
-
-import pandas as pd
-import numpy as np
+import argparse
+import json
 import os
-import unicodedata
-import re
+
+from names import load_name_table, save_name_table
+from telemetry import start_run, finish_run, stage
+from storage import read_table, write_table, set_storage_format, PHASE2_SCHEMA, PHASE3_SCHEMA, STORAGE_FORMAT
+from phase3_engine import prepare_rosters, class_groups, fingerprint_groups, explode_classes, score_classes
+from phase3_stream import score_chunked
 
 PHASE2_FILE = "phase2_team_rosters.csv"
 OUTPUT_DIR = "phase3_class_outputs"
 CURRENT_YEAR = 2024
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-def run_phase3():
+MANIFEST_FILE = "_manifest.json"
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def changed_groups(all_groups, fingerprints, manifest, output_dir):
+    return {
+        name: group for name, group in all_groups.items()
+        if manifest.get(name) != fingerprints[name] or not os.path.exists(f"{output_dir}/{name}.csv")
+    }
+
+def run_phase3(phase2_file=PHASE2_FILE, output_dir=OUTPUT_DIR, current_year=CURRENT_YEAR, force=False, chunksize=None):
+    start_run("phase3")
+    manifest = {} if force else load_manifest(output_dir)
+    if chunksize:
+        run_phase3_chunked(phase2_file, output_dir, current_year, chunksize, manifest)
+        finish_run()
+        return
     print("[INFO] Loading Phase 2 team rosters...")
-    df = pd.read_csv(PHASE2_FILE, low_memory=False, encoding="utf-8")
-    df.columns = [col.strip().lower() for col in df.columns]
-
-    df["player"] = df["player"].astype(str).str.strip()
-    df["player"] = df["player"].apply(lambda x: unicodedata.normalize("NFKD", x).encode("ascii", "ignore").decode("utf-8"))
-
-    df["position"] = df.get("position", "F").fillna("F").astype(str).str.upper().str.strip()
-    df["position"] = df["position"].replace({
-        "F/D": "F", "D/F": "D", "FORWARD": "F", "DEFENSE": "D", "": "F", "-": "F",
-        "LW": "F", "RW": "F", "C": "F", "LD": "D", "RD": "D"
-    })
-    df = df[df["position"].isin(["F", "D"])]
-
-    df = df[~df["player"].str.strip().str.isnumeric()]
-    df = df.drop_duplicates(subset=["player", "team", "gp", "g", "a", "birthyear"])
-    df["gp"] = pd.to_numeric(df["gp"], errors="coerce")
-    df["g"] = pd.to_numeric(df["g"], errors="coerce")
-    df["a"] = pd.to_numeric(df["a"], errors="coerce")
-    df = df.dropna(subset=["gp", "g", "a"])
-    df = df[df["gp"] >= 10]
-    df["birthyear"] = pd.to_numeric(df["birthyear"], errors="coerce")
-    df = df[df["birthyear"] >= 1999]
-    df["age"] = CURRENT_YEAR - df["birthyear"]
-
-    for field in ["class 1", "class 2", "class 3"]:
-        if field not in df.columns:
+    load_name_table()
+    with stage("phase3.load") as current:
+        df = read_table(phase2_file, PHASE2_SCHEMA, low_memory=False, encoding="utf-8")
+        current.rows = len(df)
+    with stage("phase3.prepare") as current:
+        df = prepare_rosters(df, current_year)
+        current.rows = len(df)
+    save_name_table()
+
+    all_groups = class_groups(df)
+    with stage("phase3.fingerprint", rows=len(df)):
+        fingerprints = fingerprint_groups(df, all_groups, current_year)
+    groups = changed_groups(all_groups, fingerprints, manifest, output_dir)
+    print(f"[INFO] {len(groups)} of {len(all_groups)} classes changed since the last run")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if not groups:
+        finish_run()
+        return
+    with stage("phase3.score") as current:
+        scored = score_classes(explode_classes(df, groups))
+        current.rows = len(scored)
+
+    names = list(groups)
+    for gid in sorted(set(range(len(names))) - set(scored["_group"].unique())):
+        print(f"[SKIP] {groups[names[gid]][1]} has no players left after the opponent-rating cutoff")
+    with stage("phase3.write", rows=len(scored)):
+        for gid, class_df in scored.groupby("_group", sort=False):
+            safe_name = names[gid]
+            value = groups[safe_name][1]
+            write_table(class_df.drop(columns="_group"), f"{output_dir}/{safe_name}.csv", PHASE3_SCHEMA)
+            print(f"[SAVED] {value} → {output_dir}/{safe_name}.csv")
+            manifest[safe_name] = fingerprints[safe_name]
+        save_manifest(output_dir, manifest)
+    finish_run()
+
+def run_phase3_chunked(phase2_file, output_dir, current_year, chunksize, manifest):
+    # Same output as the in-memory run, holding only `chunksize` rows at a
+    # time plus per-class aggregates (see phase3_stream)
+    print(f"[INFO] Scoring Phase 2 team rosters in chunks of {chunksize:,} rows...")
+
+    def select(all_groups, fingerprints):
+        groups = changed_groups(all_groups, fingerprints, manifest, output_dir)
+        print(f"[INFO] {len(groups)} of {len(all_groups)} classes changed since the last run")
+        return groups
+
+    load_name_table()
+    with stage("phase3.chunked") as current:
+        fingerprints, groups, written = score_chunked(phase2_file, output_dir, current_year, chunksize, select)
+        current.rows = sum(written.values())
+        current.extra["chunksize"] = chunksize
+    save_name_table()
+    if not groups:
+        return
+    for safe_name, (_, value) in groups.items():
+        if safe_name not in written:
+            print(f"[SKIP] {value} has no players left after the opponent-rating cutoff")
             continue
-        for value in df[field].dropna().unique():
-            group_df = df[df[field] == value].copy()
-            if group_df.empty:
-                continue
-
-            group_df["actualppg"] = ((group_df["g"] + group_df["a"]) / group_df["gp"]).round(2)
-            group_df["opponentrating"] = pd.to_numeric(group_df["opponentrating"], errors="coerce")
-            opp_cutoff = group_df["opponentrating"].quantile(0.05)
-            group_df = group_df[group_df["opponentrating"] >= opp_cutoff]
-
-            mean_opp = group_df["opponentrating"].mean()
-            range_opp = max(group_df["opponentrating"].max() - group_df["opponentrating"].min(), 1)
-            sched_strength = (group_df["opponentrating"] - mean_opp) / range_opp
-            sched_multiplier = (1 + (sched_strength * 2.5)).clip(0.5, 1.5)
-            group_df["schedadjppg"] = (group_df["actualppg"] * sched_multiplier).round(2)
-
-            mean_age = group_df["age"].mean()
-            range_age = max(group_df["age"].max() - group_df["age"].min(), 1.5)
-            age_factor = (mean_age - group_df["age"]) / range_age
-            group_df["ageadjppg"] = (group_df["schedadjppg"] * (1 + age_factor * 1.5)).round(2)
-
-            team_totals = group_df.groupby("team")[["g", "a"]].sum().sum(axis=1)
-            player_points = group_df["g"] + group_df["a"]
-            group_df["teampoints"] = group_df["team"].map(team_totals)
-            group_df["pctteampoints"] = player_points / group_df["teampoints"].replace(0, np.nan)
-            group_df["pctcentered"] = group_df["pctteampoints"] - group_df["pctteampoints"].mean()
-            group_df["pctteampointsadjppg"] = (group_df["schedadjppg"] * (1 + group_df["pctcentered"] * 1.5)).round(2)
-
-            group_df["truproscore"] = (
-                (group_df["schedadjppg"] + group_df["ageadjppg"] + group_df["pctteampointsadjppg"]) / 3
-            ).round(2)
-
-            pos_frames = []
-            for pos in ["F", "D"]:
-                pos_df = group_df[group_df["position"] == pos].copy()
-                if not pos_df.empty:
-                    mean_pos = pos_df["truproscore"].mean()
-                    std_pos = pos_df["truproscore"].std()
-                    super_threshold = mean_pos + 2.5 * std_pos + std_pos
-                    pos_df["positional_z_score"] = ((pos_df["truproscore"] - mean_pos) / std_pos).round(2)
-
-                    def assign_prospect_grade(z, score):
-                        if score >= super_threshold:
-                            return "🌟🌟🌟🌟🌟 Star Prospect"
-                        elif z > 2.5: return "⭐⭐⭐⭐ Elite Prospect"
-                        elif z > 2.0: return "⭐⭐⭐ High-End Prospect"
-                        elif z > 1.0: return "⭐⭐ Strong Prospect"
-                        elif z > 0.5: return "⭐ Solid Prospect"
-                        else: return ""
-
-                    pos_df["prospect_grade"] = pos_df.apply(lambda row: assign_prospect_grade(row["positional_z_score"], row["truproscore"]), axis=1)
-                    pos_df["prospectscore"] = pos_df["positional_z_score"]
-                    pos_df["scheddifffromactual"] = (pos_df["schedadjppg"] - pos_df["actualppg"]).round(2)
-                    pos_df["agedifffromactual"] = (pos_df["ageadjppg"] - pos_df["actualppg"]).round(2)
-                    pos_df["truprodifffromactual"] = (pos_df["truproscore"] - pos_df["actualppg"]).round(2)
-                    pos_frames.append(pos_df)
-
-            class_df = pd.concat(pos_frames, axis=0, ignore_index=True)
-            safe_name = re.sub(r'[^a-zA-Z0-9_]+', '_', str(value))[:60]
-            class_df.to_csv(f"{OUTPUT_DIR}/{safe_name}.csv", index=False)
-            print(f"[SAVED] {value} → {OUTPUT_DIR}/{safe_name}.csv")
+        print(f"[SAVED] {value} → {output_dir}/{safe_name}.csv")
+        manifest[safe_name] = fingerprints[safe_name]
+    save_manifest(output_dir, manifest)
 
 if __name__ == "__main__":
-    run_phase3()
+    parser = argparse.ArgumentParser(description="Phase 3: score players within each class")
+    parser.add_argument("--storage", choices=["csv", "parquet"], default=STORAGE_FORMAT, help="hand-off format (CSV is always written)")
+    parser.add_argument("--force", action="store_true", help="rescore every class even if its inputs are unchanged")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="stream the roster file this many rows at a time to bound memory (0 = load it whole)")
+    args = parser.parse_args()
+    set_storage_format(args.storage)
+    run_phase3(force=args.force, chunksize=args.chunksize)
@@ -0,0 +1,188 @@
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+
+from group_stats import group_mean, group_std, group_quantile
+from names import fold_series
+
+# Bump whenever scoring changes so incremental runs rebuild every class
+SCORING_VERSION = 2
+
+CLASS_FIELDS = ["class 1", "class 2", "class 3"]
+# A player row counts once per identical set of these
+DEDUPE_COLUMNS = ["player", "team", "gp", "g", "a", "birthyear"]
+POSITIONS = ["F", "D"]
+POSITION_MAP = {
+    "F/D": "F", "D/F": "D", "FORWARD": "F", "DEFENSE": "D", "": "F", "-": "F",
+    "LW": "F", "RW": "F", "C": "F", "LD": "D", "RD": "D"
+}
+GRADES = [
+    "🌟🌟🌟🌟🌟 Star Prospect",
+    "⭐⭐⭐⭐ Elite Prospect",
+    "⭐⭐⭐ High-End Prospect",
+    "⭐⭐ Strong Prospect",
+    "⭐ Solid Prospect",
+]
+
+
+def prepare_rosters(df, current_year, tag_rows=None):
+    df.columns = [col.strip().lower() for col in df.columns]
+
+    df["player"] = df["player"].astype(str).str.strip()
+    df["player"] = fold_series(df["player"])
+
+    position = df["position"] if "position" in df.columns else pd.Series("F", index=df.index)
+    df["position"] = position.astype(object).fillna("F").astype(str).str.upper().str.strip()
+    df["position"] = df["position"].replace(POSITION_MAP)
+    df = df[df["position"].isin(POSITIONS)]
+
+    df = df[~df["player"].str.strip().str.isnumeric()]
+    df = df.drop_duplicates(subset=DEDUPE_COLUMNS)
+    if tag_rows is not None:
+        # A chunked run marks the rows while the dedupe columns are still as
+        # read, to drop repeats of rows from an earlier chunk later on
+        df = tag_rows(df)
+    df["gp"] = pd.to_numeric(df["gp"], errors="coerce")
+    df["g"] = pd.to_numeric(df["g"], errors="coerce")
+    df["a"] = pd.to_numeric(df["a"], errors="coerce")
+    df = df.dropna(subset=["gp", "g", "a"])
+    df = df[df["gp"] >= 10]
+    df["birthyear"] = pd.to_numeric(df["birthyear"], errors="coerce")
+    df = df[df["birthyear"] >= 1999]
+    df["age"] = current_year - df["birthyear"]
+    return df
+
+
+def safe_class_name(value):
+    return re.sub(r'[^a-zA-Z0-9_]+', '_', str(value))[:60]
+
+
+def class_groups(df):
+    """Return the (field, value) class groups to score, keyed by output name.
+
+    Classes are visited field by field, as the old per-class loop did, and a
+    later group that maps to the same file name replaces the earlier one. The
+    dict therefore holds exactly the groups whose CSVs would survive.
+    """
+    return groups_from_classes({field: df[field].dropna().unique() for field in CLASS_FIELDS if field in df.columns})
+
+
+def groups_from_classes(values_by_field):
+    # class_groups for values already collected per field, in order of appearance
+    groups = {}
+    for field in CLASS_FIELDS:
+        for value in values_by_field.get(field, ()):
+            name = safe_class_name(value)
+            groups.pop(name, None)
+            groups[name] = (field, value)
+    return groups
+
+
+def fingerprint_groups(df, groups, current_year):
+    # Hash of each class group's input rows, in order, plus everything else
+    # that feeds the score. Equal fingerprints mean an identical output file.
+    fingerprints = {}
+    for name, (field, value) in groups.items():
+        part = df[df[field] == value]
+        digest = hashlib.sha1(f"{SCORING_VERSION}|{current_year}|{field}|{value}|{list(part.columns)}".encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        fingerprints[name] = digest.hexdigest()
+    return fingerprints
+
+
+def explode_classes(df, groups):
+    # One row per (player, class group). A player listed under three classes
+    # appears three times, each tagged with its group number in `_group`.
+    parts = []
+    for gid, (field, value) in enumerate(groups.values()):
+        part = df[df[field] == value]
+        parts.append(part.assign(_group=gid))
+    if not parts:
+        return df.iloc[0:0].assign(_group=pd.Series(dtype=int))
+    return pd.concat(parts, axis=0)
+
+
+def score_inputs(long_df):
+    # Row-wise columns the class statistics are taken over
+    g = long_df.copy()
+    g["actualppg"] = ((g["g"] + g["a"]) / g["gp"]).round(2)
+    g["opponentrating"] = pd.to_numeric(g["opponentrating"], errors="coerce")
+    return g
+
+
+def score_classes(long_df):
+    """Score every class group of `long_df` at once.
+
+    Returns the scored rows grouped by `_group`. Within each group, forwards
+    come before defensemen, and both keep their input order.
+    """
+    g = score_inputs(long_df)
+    # Class statistics come from group_stats, which matches the per-class
+    # loop's Series.mean()/.std()/.quantile() to the last bit
+    opp_cutoff = group_quantile(g["opponentrating"], g["_group"], 0.05)
+    g = g[g["opponentrating"] >= opp_cutoff]
+
+    grouped = g.groupby("_group")
+    opp = grouped["opponentrating"]
+    age = grouped["age"]
+    g = add_scores(
+        g,
+        mean_opp=group_mean(g["opponentrating"], g["_group"]),
+        range_opp=opp.transform("max") - opp.transform("min"),
+        mean_age=group_mean(g["age"], g["_group"]),
+        range_age=age.transform("max") - age.transform("min"),
+        teampoints=(g["g"] + g["a"]).groupby([g["_group"], g["team"]], observed=True).transform("sum"),
+    )
+    return grade_positions(g)
+
+
+def add_scores(g, mean_opp, range_opp, mean_age, range_age, teampoints, mean_pct=None):
+    # The adjusted PPGs and TruPro score from per-row class statistics.
+    # mean_pct is the class mean of pctteampoints; None takes it from g.
+    sched_strength = (g["opponentrating"] - mean_opp) / range_opp.clip(lower=1)
+    sched_multiplier = (1 + (sched_strength * 2.5)).clip(0.5, 1.5)
+    g["schedadjppg"] = (g["actualppg"] * sched_multiplier).round(2)
+
+    age_factor = (mean_age - g["age"]) / range_age.clip(lower=1.5)
+    g["ageadjppg"] = (g["schedadjppg"] * (1 + age_factor * 1.5)).round(2)
+
+    player_points = g["g"] + g["a"]
+    g["teampoints"] = teampoints
+    g["pctteampoints"] = player_points / g["teampoints"].replace(0, np.nan)
+    if mean_pct is None:
+        mean_pct = group_mean(g["pctteampoints"], g["_group"])
+    g["pctcentered"] = g["pctteampoints"] - mean_pct
+    g["pctteampointsadjppg"] = (g["schedadjppg"] * (1 + g["pctcentered"] * 1.5)).round(2)
+
+    g["truproscore"] = (
+        (g["schedadjppg"] + g["ageadjppg"] + g["pctteampointsadjppg"]) / 3
+    ).round(2)
+    return g
+
+
+def grade_positions(g, mean_pos=None, std_pos=None):
+    # Positional z-scores and grades within each (class group, position).
+    # mean_pos/std_pos may be supplied per row when they were computed elsewhere.
+    if mean_pos is None or std_pos is None:
+        keys = [g["_group"], g["position"]]
+        mean_pos = group_mean(g["truproscore"], keys)
+        std_pos = group_std(g["truproscore"], keys)
+    super_threshold = mean_pos + 2.5 * std_pos + std_pos
+    g["positional_z_score"] = ((g["truproscore"] - mean_pos) / std_pos).round(2)
+
+    z = g["positional_z_score"]
+    g["prospect_grade"] = np.select(
+        [g["truproscore"] >= super_threshold, z > 2.5, z > 2.0, z > 1.0, z > 0.5],
+        GRADES,
+        default="",
+    )
+    g["prospectscore"] = g["positional_z_score"]
+    g["scheddifffromactual"] = (g["schedadjppg"] - g["actualppg"]).round(2)
+    g["agedifffromactual"] = (g["ageadjppg"] - g["actualppg"]).round(2)
+    g["truprodifffromactual"] = (g["truproscore"] - g["actualppg"]).round(2)
+
+    pos_rank = g["position"].map({pos: i for i, pos in enumerate(POSITIONS)})
+    order = np.lexsort((np.arange(len(g)), pos_rank.to_numpy(), g["_group"].to_numpy()))
+    return g.iloc[order]
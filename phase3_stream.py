@@ -0,0 +1,348 @@
+import hashlib
+import math
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from group_stats import PairwiseSum
+from phase3_engine import (
+    CLASS_FIELDS, DEDUPE_COLUMNS, POSITIONS, SCORING_VERSION,
+    prepare_rosters, groups_from_classes, explode_classes, score_inputs, add_scores, grade_positions,
+)
+from storage import iter_csv, convert_csv, PHASE3_SCHEMA
+
+# Bounded-memory phase 3. Every pass streams the data a chunk at a time and
+# keeps only per-class aggregates in memory:
+#
+#   0. read the roster CSV, prepare each chunk and spill it to scratch files
+#      with a hash of each row's dedupe columns
+#   1. drop rows repeated from an earlier chunk, one hash partition at a time
+#   2. fingerprints and opponent-rating counts (for the 5% cutoff)
+#   3. opponent-rating and age ranges, team point totals, rows per class
+#   4. class means of the opponent rating, age and share of team points
+#   5. positional mean, then 6. positional std of the TruPro score
+#   7. scoring, grading and appending rows to the class files
+#
+# Peak memory follows the chunk size, not the number of players. Means and
+# stds are summed with PairwiseSum, in the order Series.mean() adds, so the
+# class files are byte for byte those of the in-memory run.
+
+OPP_QUANTILE = 0.05
+DEDUPE_HASH = "_dedupe_hash"
+# Upper bound on dedupe partition files open at once; each holds about
+# rows / partitions hashes
+MAX_DEDUPE_PARTITIONS = 256
+DEDUPE_RECORD = np.dtype([("hash", np.uint64), ("chunk", np.uint32), ("row", np.uint32)])
+
+
+def tag_dedupe_hash(df):
+    # 64-bit hash of the dedupe columns, as drop_duplicates would compare them
+    return df.assign(**{DEDUPE_HASH: pd.util.hash_pandas_object(df[DEDUPE_COLUMNS], index=False).to_numpy()})
+
+
+def quantile_from_counts(counts, q):
+    """Series.quantile(q) of the values in a value -> count Series.
+
+    Uses numpy's linear method step for step, so the result is the same
+    float the expanded series would give.
+    """
+    counts = counts[counts > 0].sort_index()
+    n = int(counts.sum())
+    if n == 0:
+        return np.nan
+    values = counts.index.to_numpy(dtype="float64")
+    ends = np.cumsum(counts.to_numpy())
+    index = (n - 1) * q
+    below = math.floor(index)
+    if index >= n - 1:
+        return float(values[-1])
+    lo = values[np.searchsorted(ends, below, side="right")]
+    hi = values[np.searchsorted(ends, below + 1, side="right")]
+    t = index - below
+    diff = hi - lo
+    return float(hi - diff * (1 - t) if t >= 0.5 else lo + diff * t)
+
+
+class Spill:
+    # Prepared roster chunks pickled to a scratch directory, each next to the
+    # dedupe hashes of its rows
+
+    def __init__(self, root):
+        self.root = root
+        self.paths = []
+
+    def _write(self, path, df):
+        with open(path, "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def add(self, df, hashes):
+        path = os.path.join(self.root, f"chunk_{len(self.paths):05d}.pkl")
+        self._write(path, df)
+        np.save(path + ".hash.npy", hashes)
+        self.paths.append(path)
+
+    def hashes(self, index):
+        return np.load(self.paths[index] + ".hash.npy")
+
+    def replace(self, index, df):
+        self._write(self.paths[index], df)
+
+    def __iter__(self):
+        for path in self.paths:
+            with open(path, "rb") as f:
+                yield pickle.load(f)
+
+
+def spill_prepared(phase2_file, current_year, chunksize, spill):
+    # Pass 0: prepare every chunk as the in-memory run would, keeping each
+    # row's dedupe hash aside
+    for chunk in iter_csv(phase2_file, chunksize=chunksize, encoding="utf-8"):
+        part = prepare_rosters(chunk, current_year, tag_rows=tag_dedupe_hash)
+        hashes = part.pop(DEDUPE_HASH).to_numpy()
+        spill.add(part, hashes)
+
+
+def repeated_rows(spill):
+    """Rows that repeat the dedupe columns of an earlier row, by chunk.
+
+    Hashes are split by value into partition files, so only one partition's
+    worth of them is in memory at a time. Returns {chunk number: row
+    positions}; that holds the repeats only.
+    """
+    n_parts = max(1, min(len(spill.paths), MAX_DEDUPE_PARTITIONS))
+    part_paths = [os.path.join(spill.root, f"dedupe_{p:05d}.bin") for p in range(n_parts)]
+    files = [open(path, "wb") for path in part_paths]
+    try:
+        for index in range(len(spill.paths)):
+            hashes = spill.hashes(index)
+            records = np.empty(len(hashes), dtype=DEDUPE_RECORD)
+            records["hash"], records["chunk"], records["row"] = hashes, index, np.arange(len(hashes))
+            partition = hashes % np.uint64(n_parts)
+            for p in np.unique(partition):
+                records[partition == p].tofile(files[p])
+    finally:
+        for f in files:
+            f.close()
+
+    repeats = {}
+    for path in part_paths:
+        records = np.fromfile(path, dtype=DEDUPE_RECORD)
+        os.remove(path)
+        # Equal hashes together, each run in file order: all but the first are repeats
+        records = records[np.lexsort((records["row"], records["chunk"], records["hash"]))]
+        later = records[1:][records["hash"][1:] == records["hash"][:-1]]
+        for index in np.unique(later["chunk"]):
+            repeats.setdefault(int(index), []).append(later["row"][later["chunk"] == index])
+    return {index: np.concatenate(rows) for index, rows in repeats.items()}
+
+
+def drop_repeats(spill):
+    # Pass 1: rewrite the chunks that hold repeats without them, and note
+    # the class values of the rows that are left in order of appearance
+    repeats = repeated_rows(spill)
+    classes = {field: {} for field in CLASS_FIELDS}
+    for index, chunk in enumerate(spill):
+        if index in repeats:
+            keep = np.ones(len(chunk), dtype=bool)
+            keep[repeats[index]] = False
+            chunk = chunk[keep]
+            spill.replace(index, chunk)
+        for field in CLASS_FIELDS:
+            if field in chunk.columns:
+                classes[field].update(dict.fromkeys(chunk[field].dropna().unique()))
+    return groups_from_classes(classes)
+
+
+def fingerprint_and_cutoffs(spill, groups, current_year):
+    # Pass 2: the same per-class fingerprints as fingerprint_groups, and each
+    # class's opponent-rating cutoff from exact value counts
+    digests, counts = {}, {}
+    for chunk in spill:
+        for name, (field, value) in groups.items():
+            part = chunk[chunk[field] == value]
+            if name not in digests:
+                digests[name] = hashlib.sha1(
+                    f"{SCORING_VERSION}|{current_year}|{field}|{value}|{list(part.columns)}".encode("utf-8"))
+            digests[name].update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+            opp = pd.to_numeric(part["opponentrating"], errors="coerce").value_counts()
+            counts[name] = opp if name not in counts else counts[name].add(opp, fill_value=0)
+    fingerprints = {name: digest.hexdigest() for name, digest in digests.items()}
+    cutoffs = {name: quantile_from_counts(c, OPP_QUANTILE) for name, c in counts.items()}
+    return fingerprints, cutoffs
+
+
+def _add_values(sums, counts, values, keys):
+    # Each group's values, in row order, onto its running sum; missing
+    # values count as 0 in the sum and not at all in the count, as in nanmean
+    for key, part in values.groupby(keys, sort=False):
+        x = part.to_numpy(dtype="float64", na_value=np.nan)
+        missing = np.isnan(x)
+        sums[key].add(np.where(missing, 0.0, x))
+        counts[key] += int((~missing).sum())
+
+
+def _mean(total, n):
+    return total / n if n else np.nan
+
+
+class ClassStats:
+    # Everything add_scores and grade_positions need about each class group,
+    # keyed by group number (the order of `groups`)
+
+    def __init__(self, groups, cutoffs):
+        self.groups = groups
+        self.cutoffs = dict(enumerate(cutoffs[name] for name in groups))
+        self.per_group = {}
+        self.team_points = None
+        self.team_dtype = None
+        self.sizes = {}
+        self.position_sizes = {}
+        self.mean_pos = {}
+        self.std_pos = {}
+
+    def kept_rows(self, chunk):
+        # Exploded rows of the chunk that pass their class's opponent cutoff
+        g = score_inputs(explode_classes(chunk, self.groups))
+        return g[g["opponentrating"] >= g["_group"].map(self.cutoffs)]
+
+    def row_team_points(self, g):
+        keys = pd.MultiIndex.from_arrays([g["_group"], g["team"]])
+        return pd.Series(self.team_points.reindex(keys).to_numpy(), index=g.index).astype(self.team_dtype)
+
+    def scored_rows(self, chunk):
+        g = self.kept_rows(chunk)
+        per_row = {key: g["_group"].map({gid: stats[key] for gid, stats in self.per_group.items()})
+                   for key in ("mean_opp", "range_opp", "mean_age", "range_age", "mean_pct")}
+        return add_scores(g, teampoints=self.row_team_points(g), **per_row)
+
+    def collect_aggregates(self, spill):
+        # Pass 3: opponent-rating and age range, team point totals, and the
+        # rows in each class and (class, position) that the sums run over
+        columns = {"opp": "opponentrating", "age": "age"}
+        lows = {key: {} for key in columns}
+        highs = {key: {} for key in columns}
+        team_points = {}
+        missing_team = False
+        points_dtype = None
+        for chunk in spill:
+            g = self.kept_rows(chunk)
+            for key, col in columns.items():
+                stats = g.groupby("_group")[col].agg(["min", "max"])
+                for gid, row in stats.iterrows():
+                    lows[key][gid] = min(lows[key].get(gid, row["min"]), row["min"])
+                    highs[key][gid] = max(highs[key].get(gid, row["max"]), row["max"])
+            for gid, n in g["_group"].value_counts(sort=False).items():
+                self.sizes[gid] = self.sizes.get(gid, 0) + n
+            for key, n in g.groupby(["_group", "position"], sort=False).size().items():
+                self.position_sizes[key] = self.position_sizes.get(key, 0) + n
+            player_points = g["g"] + g["a"]
+            points_dtype = player_points.dtype
+            missing_team = missing_team or bool(g["team"].isna().any())
+            for key, total in player_points.groupby([g["_group"], g["team"]], observed=True).sum().items():
+                team_points[key] = team_points.get(key, 0) + total
+
+        for gid in self.sizes:
+            self.per_group[gid] = {f"range_{key}": highs[key][gid] - lows[key][gid] for key in columns}
+        self.team_points = pd.Series(team_points, dtype="float64")
+        # A whole-frame transform("sum") is float as soon as one row has no team
+        self.team_dtype = "float64" if missing_team or points_dtype is None else points_dtype
+
+    def collect_means(self, spill):
+        # Pass 4: class means of the opponent rating, age and share of team points
+        keys = ("opp", "age", "pct")
+        sums = {key: {gid: PairwiseSum(n) for gid, n in self.sizes.items()} for key in keys}
+        counts = {key: dict.fromkeys(self.sizes, 0) for key in keys}
+        for chunk in spill:
+            g = self.kept_rows(chunk)
+            pct = (g["g"] + g["a"]) / self.row_team_points(g).replace(0, np.nan)
+            for key, values in zip(keys, (g["opponentrating"], g["age"], pct)):
+                _add_values(sums[key], counts[key], values, g["_group"])
+        for gid, stats in self.per_group.items():
+            for key in keys:
+                stats[f"mean_{key}"] = _mean(sums[key][gid].total(), counts[key][gid])
+
+    def collect_position_means(self, spill):
+        # Pass 5: mean TruPro score per (class, position)
+        sums = {key: PairwiseSum(n) for key, n in self.position_sizes.items()}
+        counts = dict.fromkeys(self.position_sizes, 0)
+        for chunk in spill:
+            g = self.scored_rows(chunk)
+            _add_values(sums, counts, g["truproscore"], [g["_group"], g["position"]])
+        self.mean_pos = {key: _mean(total.total(), counts[key]) for key, total in sums.items()}
+
+    def collect_position_stds(self, spill):
+        # Pass 6: std of the TruPro score per (class, position), over squared
+        # deviations from the pass 5 mean like Series.std()
+        sums = {key: PairwiseSum(n) for key, n in self.position_sizes.items()}
+        counts = dict.fromkeys(self.position_sizes, 0)
+        for chunk in spill:
+            g = self.scored_rows(chunk)
+            means = pd.Series(list(zip(g["_group"], g["position"])), index=g.index).map(self.mean_pos)
+            squares = (means - g["truproscore"]) ** 2
+            _add_values(sums, counts, squares.where(g["truproscore"].notna()), [g["_group"], g["position"]])
+        self.std_pos = {key: math.sqrt(total.total() / (counts[key] - 1)) if counts[key] > 1 else np.nan
+                        for key, total in sums.items()}
+
+    def graded_rows(self, chunk):
+        g = self.scored_rows(chunk)
+        keys = list(zip(g["_group"], g["position"]))
+        mean_pos = pd.Series([self.mean_pos[k] for k in keys], index=g.index, dtype="float64")
+        std_pos = pd.Series([self.std_pos[k] for k in keys], index=g.index, dtype="float64")
+        return grade_positions(g, mean_pos, std_pos)
+
+
+def write_classes(spill, stats, output_dir, scratch):
+    # Pass 7: score and grade each chunk and append its rows to per-class,
+    # per-position part files; forwards then defensemen are joined at the end
+    names = list(stats.groups)
+    headers, part_rows = {}, {}
+    for chunk in spill:
+        g = stats.graded_rows(chunk)
+        for (gid, position), part in g.groupby(["_group", "position"], sort=False):
+            part = part.drop(columns="_group")
+            part.to_csv(os.path.join(scratch, f"{gid}_{position}.csv"), mode="a", header=False, index=False)
+            headers.setdefault(gid, part.iloc[0:0].to_csv(index=False))
+            part_rows[gid] = part_rows.get(gid, 0) + len(part)
+
+    written = {}
+    for gid, header in headers.items():
+        path = os.path.join(output_dir, f"{names[gid]}.csv")
+        with open(path + ".tmp", "w", encoding="utf-8", newline="") as out:
+            out.write(header)
+            for position in POSITIONS:
+                part_path = os.path.join(scratch, f"{gid}_{position}.csv")
+                if os.path.exists(part_path):
+                    with open(part_path, encoding="utf-8", newline="") as part:
+                        shutil.copyfileobj(part, out)
+        os.replace(path + ".tmp", path)
+        convert_csv(path, PHASE3_SCHEMA)
+        written[names[gid]] = part_rows[gid]
+    return written
+
+
+def score_chunked(phase2_file, output_dir, current_year, chunksize, select):
+    """Score phase2_file in chunks of `chunksize` rows.
+
+    select(groups, fingerprints) returns the class groups to write. Returns
+    (all fingerprints, selected groups, rows written per class name).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".phase3_chunks_", dir=output_dir) as scratch:
+        spill = Spill(scratch)
+        spill_prepared(phase2_file, current_year, chunksize, spill)
+        all_groups = drop_repeats(spill)
+        fingerprints, cutoffs = fingerprint_and_cutoffs(spill, all_groups, current_year)
+        groups = select(all_groups, fingerprints)
+        if not groups:
+            return fingerprints, groups, {}
+        stats = ClassStats(groups, cutoffs)
+        stats.collect_aggregates(spill)
+        stats.collect_means(spill)
+        stats.collect_position_means(spill)
+        stats.collect_position_stds(spill)
+        written = write_classes(spill, stats, output_dir, scratch)
+    return fingerprints, groups, written
@@ -0,0 +1,303 @@
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import redirect_stderr, redirect_stdout
+
+import pandas as pd
+
+from phase3_engine import SCORING_VERSION
+from storage import STORAGE_FORMAT
+from telemetry import start_run, finish_run, count, observe
+
+# Runs phase 1 -> phase 2 -> phase 3 for several seasons from one JSON config:
+#
+#   {
+#     "output_root": "seasons",
+#     "reference": "phase1_team_mapping.csv",
+#     "options": {"workers": 2, "use_http": true},
+#     "seasons": [
+#       {"name": "2023-2024", "leagues": "league6_2023-2024.csv"},
+#       {"name": "2024-2025", "leagues": "league6_2024-2025.csv", "current_year": 2025}
+#     ]
+#   }
+#
+# Every season writes to its own directory under output_root. "options" are
+# passed to whichever phases accept them and can be overridden per season.
+
+# === CONFIG ===
+OUTPUT_ROOT = "seasons"
+REFERENCE_MAPPING = "phase1_team_mapping.csv"
+STATE_FILE = "pipeline_state.json"
+# Scraping tasks load Chrome and hit the sites; scoring tasks only need a core
+SCRAPE_JOBS = 2
+CPU_JOBS = os.cpu_count() or 1
+# A scrape whose inputs have not changed still reruns once its output is this
+# old, and then loads every page live (see refresh_options)
+SCRAPE_MAX_AGE = 20 * 3600
+
+# phase -> (module, function, options it accepts, pool)
+PHASES = {
+    "phase1": ("phase1_2023_2024_age_aware_final", "run_scraper",
+               ("workers", "per_domain", "use_cache", "offline", "use_http", "max_teams", "registry_file"), "scrape"),
+    "phase2": ("phase2_logo_with_ids", "run_phase2",
+               ("use_cache", "offline", "fresh", "use_http", "registry_file", "spare", "ingest_workers",
+                "logo_dir"),
+               "scrape"),
+    "phase3": ("phase32", "run_phase3", ("force", "chunksize"), "cpu"),
+}
+
+
+class Task:
+    # One phase of one season. Paths in `inputs` decide whether it is stale.
+
+    def __init__(self, season, phase, kwargs, inputs, outputs, deps=(), version=None):
+        self.season = season
+        self.phase = phase
+        self.id = f"{season}/{phase}"
+        self.kwargs = kwargs
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = list(deps)
+        self.version = version
+        self.pool = PHASES[phase][3]
+        self.status = "pending"
+        self.seconds = None
+        self.error = None
+        self.fingerprint = None
+        self.started = None
+
+
+def file_digest(path):
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_stats_files(phase1_file):
+    # Phase 2 reads these instead of scraping, so they are inputs too
+    try:
+        column = pd.read_csv(phase1_file, usecols=["LocalStatsFile"])["LocalStatsFile"]
+    except (OSError, ValueError):
+        return []
+    return sorted({path for path in column.dropna().astype(str) if path})
+
+
+def task_fingerprint(task):
+    inputs = list(task.inputs)
+    if task.phase == "phase2":
+        inputs += local_stats_files(task.kwargs["phase1_file"])
+    digest = hashlib.sha1(json.dumps([task.phase, task.version, task.kwargs], sort_keys=True, default=str).encode())
+    for path in inputs:
+        digest.update(f"{path}={file_digest(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def season_tasks(season, output_root=OUTPUT_ROOT, reference=REFERENCE_MAPPING, options=None):
+    name = season["name"]
+    out = os.path.join(output_root, name)
+    current_year = int(season.get("current_year") or name.split("-")[-1])
+    options = {**(options or {}), **season.get("options", {})}
+
+    def phase_options(phase):
+        return {k: v for k, v in options.items() if k in PHASES[phase][2]}
+
+    phase1_file = os.path.join(out, "phase1output.csv")
+    phase2_file = os.path.join(out, "phase2_team_rosters.csv")
+    class_dir = os.path.join(out, "phase3_class_outputs")
+    phase1 = Task(name, "phase1", {
+        **phase_options("phase1"), "input_file": season["leagues"], "reference_file": reference,
+        "scraped_output": os.path.join(out, "scraped_new_teams.csv"), "output_file": phase1_file,
+    }, inputs=[season["leagues"], reference], outputs=[phase1_file])
+    phase2 = Task(name, "phase2", {
+        **phase_options("phase2"), "phase1_file": phase1_file, "output_file": phase2_file,
+        "missing_file": os.path.join(out, "missing_rosters_for_manual_input.csv"),
+        "checkpoint_dir": os.path.join(out, "phase2_checkpoints"),
+    }, inputs=[phase1_file], outputs=[phase2_file], deps=[phase1])
+    phase3 = Task(name, "phase3", {
+        **phase_options("phase3"), "phase2_file": phase2_file, "output_dir": class_dir, "current_year": current_year,
+    }, inputs=[phase2_file], outputs=[class_dir], deps=[phase2], version=SCORING_VERSION)
+    return [phase1, phase2, phase3]
+
+
+def run_task(module, function, kwargs, storage, log_path, telemetry_path):
+    # Runs in a fresh process per task: the phases keep run state (telemetry,
+    # name table, cache and HTTP switches) in module globals
+    os.environ["TRUPRO_TELEMETRY"] = telemetry_path
+    started = time.time()
+    with open(log_path, "w", encoding="utf-8") as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            from storage import set_storage_format
+            set_storage_format(storage)
+            getattr(importlib.import_module(module), function)(**kwargs)
+        except BaseException:
+            traceback.print_exc()
+            raise
+    return started
+
+
+def load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path, state):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def up_to_date(task, entry, max_age):
+    if not entry or entry.get("fingerprint") != task.fingerprint:
+        return False
+    if not all(os.path.exists(path) for path in task.outputs):
+        return False
+    return task.pool != "scrape" or time.time() - entry.get("finished", 0) < max_age
+
+
+def refresh_options(task, entry):
+    # A scrape rerun only because its last run is too old has to reach the
+    # web: cached pages (7-day TTL) and phase 2 checkpoints would hand back
+    # the same output again
+    if task.pool != "scrape" or not entry or entry.get("fingerprint") != task.fingerprint:
+        return {}
+    accepted = PHASES[task.phase][2]
+    return {k: v for k, v in (("use_cache", False), ("fresh", True)) if k in accepted}
+
+
+def produced_outputs(task, started):
+    # Phases 1 and 2 return quietly when they abort; a file they did not
+    # rewrite this run is a failure, not a result
+    for path in task.outputs:
+        if not os.path.exists(path):
+            return False
+        if os.path.isfile(path) and os.path.getmtime(path) < started:
+            return False
+    return True
+
+
+def run_pipeline(tasks, output_root=OUTPUT_ROOT, scrape_jobs=SCRAPE_JOBS, cpu_jobs=CPU_JOBS, force=False,
+                 max_age=SCRAPE_MAX_AGE, storage=STORAGE_FORMAT):
+    """Run tasks as their dependencies finish, up to the pool limits at once.
+
+    Returns the tasks, each with its status: done, skipped, failed or blocked.
+    """
+    start_run("pipeline")
+    os.makedirs(output_root, exist_ok=True)
+    state_path = os.path.join(output_root, STATE_FILE)
+    state = load_state(state_path)
+    limits = {"scrape": max(1, scrape_jobs), "cpu": max(1, cpu_jobs)}
+    busy = {"scrape": 0, "cpu": 0}
+    pending = list(tasks)
+    running = {}
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=sum(limits.values()), mp_context=context, max_tasks_per_child=1) as pool:
+        while pending or running:
+            # Tasks are listed in dependency order, so one pass settles every
+            # skip and block that follows from the tasks finished so far
+            for task in list(pending):
+                if any(dep.status in ("failed", "blocked") for dep in task.deps):
+                    task.status = "blocked"
+                    pending.remove(task)
+                    print(f"⛔ {task.id} blocked by a failed dependency")
+                    continue
+                if not all(dep.status in ("done", "skipped") for dep in task.deps):
+                    continue
+                if task.fingerprint is None:
+                    task.fingerprint = task_fingerprint(task)
+                if not force and up_to_date(task, state.get(task.id), max_age):
+                    task.status = "skipped"
+                    pending.remove(task)
+                    count("pipeline.skipped")
+                    print(f"⏭️ {task.id} is up to date")
+                    continue
+                if busy[task.pool] >= limits[task.pool]:
+                    continue
+                module, function = PHASES[task.phase][:2]
+                season_dir = os.path.join(output_root, task.season)
+                os.makedirs(season_dir, exist_ok=True)
+                log_path = os.path.join(season_dir, f"{task.phase}.log")
+                kwargs = {**task.kwargs, **refresh_options(task, state.get(task.id))}
+                if kwargs != task.kwargs:
+                    print(f"🔄 {task.id} inputs unchanged; scraping live, past the page cache and checkpoints")
+                future = pool.submit(run_task, module, function, kwargs, storage, log_path,
+                                     os.path.join(season_dir, "telemetry.jsonl"))
+                task.started = time.perf_counter()
+                running[future] = task
+                busy[task.pool] += 1
+                task.status = "running"
+                pending.remove(task)
+                print(f"▶️ {task.id} started (log: {log_path})")
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                busy[task.pool] -= 1
+                task.seconds = time.perf_counter() - task.started
+                observe(f"pipeline.{task.phase}", task.seconds, task=task.id)
+                try:
+                    ok = produced_outputs(task, future.result())
+                    task.error = None if ok else "outputs were not written"
+                except Exception as e:
+                    ok = False
+                    task.error = f"{type(e).__name__}: {e}"
+                if ok:
+                    task.status = "done"
+                    state[task.id] = {"fingerprint": task.fingerprint, "finished": time.time()}
+                    save_state(state_path, state)
+                    print(f"✅ {task.id} finished in {task.seconds:.1f}s")
+                else:
+                    task.status = "failed"
+                    count("pipeline.failed")
+                    print(f"❌ {task.id} failed: {task.error}")
+
+    print(f"\n{'task':<28}{'status':<10}{'seconds':>9}")
+    for task in tasks:
+        print(f"{task.id:<28}{task.status:<10}{task.seconds or 0:>9.1f}")
+    finish_run()
+    return tasks
+
+
+def load_config(path, only=None):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    output_root = config.get("output_root", OUTPUT_ROOT)
+    tasks = []
+    for season in config["seasons"]:
+        if only and season["name"] not in only:
+            continue
+        tasks += season_tasks(season, output_root, config.get("reference", REFERENCE_MAPPING), config.get("options"))
+    return tasks, output_root
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run phases 1-3 for many seasons as one dependency graph")
+    parser.add_argument("config", help="JSON file listing the seasons (see the top of pipeline.py)")
+    parser.add_argument("--only", default="", help="comma separated season names to run")
+    parser.add_argument("--scrape-jobs", type=int, default=SCRAPE_JOBS, help="phase 1/2 tasks (browsers) at once")
+    parser.add_argument("--jobs", type=int, default=CPU_JOBS, help="phase 3 tasks at once")
+    parser.add_argument("--force", action="store_true", help="rerun every task, even if its inputs are unchanged")
+    parser.add_argument("--max-age-hours", type=float, default=SCRAPE_MAX_AGE / 3600,
+                        help="rescrape unchanged seasons once their last scrape is this old")
+    parser.add_argument("--storage", choices=["csv", "parquet"], default=STORAGE_FORMAT, help="hand-off format (CSV is always written)")
+    args = parser.parse_args()
+    tasks, output_root = load_config(args.config, set(filter(None, args.only.split(","))))
+    run_pipeline(tasks, output_root, scrape_jobs=args.scrape_jobs, cpu_jobs=args.jobs, force=args.force,
+                 max_age=args.max_age_hours * 3600, storage=args.storage)
+    if any(task.status in ("failed", "blocked") for task in tasks):
+        raise SystemExit(1)
@@ -0,0 +1,111 @@
+import queue
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from telemetry import count, stage
+
+# === CONFIG ===
+DEFAULT_WORKERS = 1
+DEFAULT_PER_DOMAIN = 2
+
+
+class DriverStartError(RuntimeError):
+    pass
+
+
+class LazyDriver:
+    # Stands in for a browser and only starts it on first use, so a worker
+    # whose pages all come over plain HTTP never launches Chrome.
+
+    def __init__(self, make_driver):
+        self._make_driver = make_driver
+        self._driver = None
+
+    @property
+    def started(self):
+        return self._driver is not None
+
+    def __getattr__(self, name):
+        if self._driver is None:
+            try:
+                with stage("driver.start"):
+                    self._driver = self._make_driver()
+            except Exception as e:
+                count("driver.start_failures")
+                raise DriverStartError(str(e)) from e
+            count("driver.starts")
+        return getattr(self._driver, name)
+
+    def quit(self):
+        # A later call starts a fresh browser
+        if self._driver is not None:
+            driver, self._driver = self._driver, None
+            driver.quit()
+
+
+class DomainLimiter:
+    # Caps how many workers may be loading pages from one host at a time.
+
+    def __init__(self, per_domain=DEFAULT_PER_DOMAIN):
+        self.per_domain = max(1, per_domain)
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def _semaphore(self, url):
+        domain = urlparse(url).netloc.lower()
+        with self._lock:
+            if domain not in self._slots:
+                self._slots[domain] = threading.BoundedSemaphore(self.per_domain)
+            return self._slots[domain]
+
+    @contextmanager
+    def slot(self, url):
+        semaphore = self._semaphore(url)
+        with semaphore:
+            yield
+
+
+def run_pool(items, work, make_driver, workers=DEFAULT_WORKERS, close_driver=None):
+    """Run work(driver, item) over items with one browser per worker thread.
+
+    Each worker's browser is a LazyDriver, started the first time work uses
+    it. Workers pull from a shared queue, so a slow page only holds up its own
+    worker. Results come back in input order; an item whose work raised
+    gets None.
+    """
+    results = [None] * len(items)
+    jobs = queue.Queue()
+    for i, item in enumerate(items):
+        jobs.put((i, item))
+
+    def worker(worker_id):
+        driver = LazyDriver(make_driver)
+        try:
+            while True:
+                try:
+                    i, item = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[i] = work(driver, item)
+                except DriverStartError as e:
+                    # Hand the item back so a healthy worker can take it
+                    print(f"❌ Worker {worker_id} could not start a browser: {e}")
+                    jobs.put((i, item))
+                    return
+                except Exception as e:
+                    print(f"⚠️ Worker {worker_id} failed on item {i}: {e}")
+        finally:
+            if driver.started:
+                (close_driver or (lambda d: d.quit()))(driver)
+
+    threads = [
+        threading.Thread(target=worker, args=(n + 1,), name=f"scrape-worker-{n + 1}", daemon=True)
+        for n in range(max(1, min(workers, len(items))))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -0,0 +1,305 @@
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from scrape_pool import DriverStartError
+from telemetry import count, stage
+
+# === CONFIG ===
+SESSION_FILE = "ep_session.json"
+SESSION_URL = "https://www.eliteprospects.com/"
+# Saved cookies older than this are not trusted; the next browser logs in again
+SESSION_MAX_AGE = 3 * 24 * 3600
+# Recycle a browser when any of these hold over its last HEALTH_WINDOW loads
+HEALTH_WINDOW = 20
+MIN_SAMPLES = 5
+MAX_ERROR_RATE = 0.3
+MAX_BROWSER_RSS_MB = 1500
+# Median load time this many times the browser's own early median (and over the floor)
+SLOWDOWN_FACTOR = 2.5
+SLOW_FLOOR_SECONDS = 4.0
+
+
+def process_tree_rss_mb(pid):
+    # Resident memory of pid and all its descendants (chromedriver -> Chrome
+    # -> renderers), read from /proc. None where /proc is not available.
+    try:
+        children = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", encoding="ascii", errors="replace") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+        page_kb = os.sysconf("SC_PAGE_SIZE") / 1024
+        total, todo = 0.0, [pid]
+        while todo:
+            current = todo.pop()
+            try:
+                with open(f"/proc/{current}/statm", encoding="ascii") as f:
+                    total += int(f.read().split()[1]) * page_kb
+            except (OSError, IndexError, ValueError):
+                pass
+            todo.extend(children.get(current, ()))
+        return total / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def browser_pid(driver):
+    pid = getattr(driver, "browser_pid", None)
+    if pid:
+        return pid
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _path_matches(path, cookie_path):
+    # RFC 6265 path-match: "/team" covers "/team" and "/team/9001", not "/teams"
+    if path == cookie_path:
+        return True
+    return path.startswith(cookie_path) and (cookie_path.endswith("/") or path[len(cookie_path)] == "/")
+
+
+class SessionCookies:
+    # The logged-in cookie jar, kept on disk so a new browser can pick up the
+    # session instead of going through the login form again.
+
+    def __init__(self, path=SESSION_FILE, url=SESSION_URL, max_age=SESSION_MAX_AGE):
+        self.path = path
+        self.url = url
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - saved.get("saved", 0) > self.max_age:
+            return None
+        now = time.time()
+        cookies = [c for c in saved.get("cookies", []) if not c.get("expiry") or c["expiry"] > now]
+        return cookies or None
+
+    def cookie_header(self, url=None):
+        # The saved cookies a browser would send to url, as a Cookie header for
+        # plain HTTP requests that should look signed in; None if there are none
+        cookies = self._load()
+        if not cookies:
+            return None
+        parts = urlsplit(url or self.url)
+        host = (parts.hostname or "").lower()
+        path = parts.path or "/"
+        pairs = []
+        for cookie in cookies:
+            domain = (cookie.get("domain") or host).lstrip(".").lower()
+            if host != domain and not host.endswith("." + domain):
+                continue
+            if cookie.get("secure") and parts.scheme != "https":
+                continue
+            if not _path_matches(path, cookie.get("path") or "/"):
+                continue
+            pairs.append(f"{cookie['name']}={cookie['value']}")
+        return "; ".join(pairs) or None
+
+    def restore(self, driver):
+        cookies = self._load()
+        if not cookies:
+            return False
+        try:
+            # Cookies can only be set for the domain the browser is on
+            driver.get(self.url)
+            for cookie in cookies:
+                driver.add_cookie(cookie)
+            driver.get(self.url)
+        except Exception as e:
+            print(f"⚠️ Could not restore the saved session: {e}")
+            return False
+        return True
+
+    def save(self, driver):
+        try:
+            cookies = driver.get_cookies()
+        except Exception as e:
+            print(f"⚠️ Could not read session cookies: {e}")
+            return
+        with self._lock:
+            # Session cookies are credentials: owner-only, and replaced atomically
+            fd = os.open(self.path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"saved": time.time(), "cookies": cookies}, f)
+            os.replace(self.path + ".tmp", self.path)
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class BrowserSession:
+    # One started browser and the load results it has produced.
+
+    def __init__(self, driver, restored):
+        self.driver = driver
+        self.restored = restored
+        self.loads = 0
+        self.recent = deque(maxlen=HEALTH_WINDOW)
+        self.baseline = []
+
+    def record(self, seconds, ok):
+        self.loads += 1
+        self.recent.append((seconds, ok))
+        if ok and len(self.baseline) < MIN_SAMPLES:
+            self.baseline.append(seconds)
+
+    def unhealthy(self):
+        # The reason this browser should be replaced, or None
+        if len(self.recent) >= MIN_SAMPLES:
+            errors = sum(1 for _, ok in self.recent if not ok)
+            if errors / len(self.recent) > MAX_ERROR_RATE:
+                return f"{errors}/{len(self.recent)} recent loads failed"
+            if len(self.baseline) >= MIN_SAMPLES:
+                median = statistics.median(s for s, ok in self.recent if ok)
+                if median > max(SLOW_FLOOR_SECONDS, SLOWDOWN_FACTOR * statistics.median(self.baseline)):
+                    return f"median load {median:.1f}s, was {statistics.median(self.baseline):.1f}s"
+        pid = browser_pid(self.driver)
+        rss = process_tree_rss_mb(pid) if pid else None
+        if rss and rss > MAX_BROWSER_RSS_MB:
+            return f"browser using {rss:.0f} MB"
+        return None
+
+
+class SessionPool:
+    # Drop-in for LazyDriver in a single scraping loop. The first use starts a
+    # browser and signs it in, preferably from the saved cookies; once one is
+    # running a spare is started and signed in on a background thread. Between
+    # items the loop calls recycle_if_unhealthy(), which swaps in the spare
+    # when the current browser has too many failed or slow loads or too much
+    # memory. It never waits for the spare: until it is ready the old browser
+    # keeps working. `signed_in(driver)`, if given, checks the page a restore
+    # lands on: cookies that have not expired can still belong to a session
+    # the site has ended.
+
+    def __init__(self, make_driver, login=None, cookies=None, spare=True, signed_in=None):
+        self._make_driver = make_driver
+        self._login = login
+        self._signed_in = signed_in
+        self._cookies = cookies if cookies is not None else (SessionCookies() if login else None)
+        self._use_spare = spare
+        self._session = None
+        self._spare = None
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="browser-session")
+
+    @property
+    def started(self):
+        return self._session is not None
+
+    def _start_session(self):
+        with stage("driver.start"):
+            driver = self._make_driver()
+        count("driver.starts")
+        restored = False
+        if self._login is not None:
+            restored = self._cookies is not None and self._cookies.restore(driver)
+            if restored and not self._still_signed_in(driver):
+                print("🔑 Saved session is no longer signed in; logging in again")
+                count("session.stale")
+                self._cookies.clear()
+                restored = False
+            if restored:
+                count("session.restored")
+            else:
+                self._login(driver)
+                count("session.logins")
+                if self._cookies is not None:
+                    self._cookies.save(driver)
+        return BrowserSession(driver, restored)
+
+    def _still_signed_in(self, driver):
+        if self._signed_in is None:
+            return True
+        try:
+            return bool(self._signed_in(driver))
+        except Exception as e:
+            print(f"⚠️ Could not check the restored session: {e}")
+            return False
+
+    def _current(self):
+        if self._session is None:
+            spare, self._spare = self._spare, None
+            if spare is not None:
+                # A spare that is already warming up is the quickest browser to get
+                try:
+                    self._session = spare.result()
+                except Exception as e:
+                    count("driver.start_failures")
+                    print(f"⚠️ Spare browser failed to start: {e}")
+            if self._session is None:
+                try:
+                    self._session = self._start_session()
+                except Exception as e:
+                    count("driver.start_failures")
+                    raise DriverStartError(str(e)) from e
+            self._warm_spare()
+        return self._session
+
+    def _warm_spare(self):
+        if self._use_spare and self._spare is None:
+            self._spare = self._background.submit(self._start_session)
+
+    def __getattr__(self, name):
+        return getattr(self._current().driver, name)
+
+    def record_load(self, seconds, ok):
+        # Called by page_loader after every browser page load
+        if self._session is not None:
+            self._session.record(seconds, ok)
+
+    def recycle_if_unhealthy(self):
+        if self._session is None:
+            return False
+        reason = self._session.unhealthy()
+        if reason is None:
+            return False
+        if self._spare is not None and not self._spare.done():
+            return False
+        print(f"🔁 Replacing the browser after {self._session.loads} loads: {reason}")
+        count("driver.recycles")
+        old, self._session = self._session, None
+        if old.restored and sum(1 for _, ok in old.recent if not ok) > MAX_ERROR_RATE * len(old.recent):
+            # A restored session that keeps failing has probably been logged out
+            self._cookies.clear()
+        self._background.submit(self._quit, old.driver)
+        return True
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"⚠️ Browser did not quit cleanly: {e}")
+
+    def quit(self):
+        session, self._session = self._session, None
+        spare, self._spare = self._spare, None
+        if session is not None:
+            self._quit(session.driver)
+        if spare is not None:
+            try:
+                self._quit(spare.result().driver)
+            except Exception:
+                pass
+        self._background.shutdown(wait=True)
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="browser-session")
@@ -0,0 +1,163 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# === CONFIG ===
+# "csv" keeps the original CSV-only hand-off. "parquet" also writes a typed
+# .parquet next to every CSV and prefers it when reading.
+STORAGE_FORMAT = os.environ.get("TRUPRO_STORAGE", "csv")
+CSV_CHUNKSIZE = 200_000
+
+# === SCHEMAS ===
+SCRAPED_SCHEMA = {
+    "Team": "string", "NormalizedTeam": "string", "AgeLevel": "category", "Record": "string",
+    "TeamRating": "float64", "AGD": "float64", "OpponentRating": "float64",
+    "EP_URL": "string", "OtherLinks": "string", "Level": "category",
+    "Class 1": "category", "Class 2": "category", "Class 3": "category", "Season": "category",
+    "IsCanadian": "boolean", "BirthYear": "Int32", "ClassLevel": "category",
+}
+PHASE1_SCHEMA = {
+    "Team": "string", "EP_URL": "string", "Level": "category",
+    "Class 1": "category", "Class 2": "category", "Class 3": "category", "Season": "category",
+    "TeamRating": "float64", "OpponentRating": "float64", "LocalStatsFile": "string",
+}
+PHASE3_SCHEMA = {
+    "player": "string", "team": "category", "position": "category",
+    "gp": "Int32", "g": "Int32", "a": "Int32", "birthyear": "Int32", "age": "Int32",
+    "level": "category", "class 1": "category", "class 2": "category", "class 3": "category",
+    "season": "category", "prospect_grade": "category",
+}
+PHASE2_SCHEMA = {
+    "Player": "string", "GP": "Int32", "G": "Int32", "A": "Int32", "PPG": "float64",
+    "Position": "category", "Team": "category", "EP_Team_ID": "category",
+    "TeamLogoFile": "category", "TeamLogoURL": "category", "EP_URL": "category", "Level": "category",
+    "Class 1": "category", "Class 2": "category", "Class 3": "category", "Season": "category",
+    "OpponentRating": "float64", "BirthYear": "Int32", "Nationality": "category", "Jersey": "string",
+    "StatsMissing": "boolean",
+}
+
+
+def set_storage_format(fmt):
+    global STORAGE_FORMAT
+    if fmt == "parquet" and pq is None:
+        print("⚠️ pyarrow is not installed; staying on CSV storage")
+        fmt = "csv"
+    STORAGE_FORMAT = fmt
+
+
+def columnar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def apply_schema(df, schema):
+    df = df.copy()
+    for col, dtype in (schema or {}).items():
+        if col not in df.columns:
+            continue
+        if dtype in ("Int32", "float64"):
+            values = pd.to_numeric(df[col], errors="coerce")
+            if dtype == "Int32" and not np.allclose(values.dropna() % 1, 0):
+                dtype = "float64"
+            df[col] = values.astype(dtype)
+        elif dtype == "boolean":
+            df[col] = df[col].map({True: True, False: False, "True": True, "False": False}).astype("boolean")
+        elif dtype == "category":
+            df[col] = df[col].astype("string").astype("category")
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def to_numpy_dtypes(df):
+    # Nullable integers become int64, or float64 when they hold missing values,
+    # which is what read_csv would have inferred for the same column.
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_integer_dtype(dtype):
+            df[col] = df[col].astype("float64") if df[col].hasnans else df[col].astype("int64")
+        elif isinstance(dtype, pd.BooleanDtype):
+            df[col] = df[col].astype(object) if df[col].hasnans else df[col].astype(bool)
+    return df
+
+
+def _use_columnar(fmt):
+    return (fmt or STORAGE_FORMAT) == "parquet" and pq is not None
+
+
+def write_table(df, csv_path, schema=None, fmt=None):
+    """Write df as CSV, plus a typed Parquet copy when the columnar backend is on."""
+    df.to_csv(csv_path, index=False)
+    if _use_columnar(fmt):
+        apply_schema(df, schema).to_parquet(columnar_path(csv_path), index=False)
+
+
+def read_table(csv_path, schema=None, fmt=None, **csv_kwargs):
+    """Read a hand-off table, preferring its Parquet copy when it is current.
+
+    A Parquet copy older than the CSV is ignored, so a hand-edited CSV is
+    never shadowed by stale columnar data.
+    """
+    parquet_path = columnar_path(csv_path)
+    if _use_columnar(fmt) and os.path.exists(parquet_path) and (
+        not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+    ):
+        return to_numpy_dtypes(apply_schema(pd.read_parquet(parquet_path), schema))
+    return pd.read_csv(csv_path, **csv_kwargs)
+
+
+def csv_dtypes(csv_path, chunksize=CSV_CHUNKSIZE, **csv_kwargs):
+    # The dtypes read_csv infers for the whole file, found one chunk at a
+    # time: int64 in one chunk and float64 in another is float64, and text
+    # anywhere makes the column text. Columns holding booleans are left to
+    # per-chunk inference.
+    kinds = {}
+    with pd.read_csv(csv_path, chunksize=chunksize, **csv_kwargs) as reader:
+        for chunk in reader:
+            for col, dtype in chunk.dtypes.items():
+                kinds.setdefault(col, set()).add(dtype)
+    dtypes = {}
+    for col, seen in kinds.items():
+        if len(seen) == 1:
+            dtypes[col] = seen.pop()
+        elif all(pd.api.types.is_integer_dtype(d) or pd.api.types.is_float_dtype(d) for d in seen):
+            dtypes[col] = "float64"
+        elif not any(pd.api.types.is_bool_dtype(d) for d in seen):
+            dtypes[col] = "str"
+    return dtypes
+
+
+def iter_csv(csv_path, chunksize=CSV_CHUNKSIZE, **csv_kwargs):
+    """Read a CSV in chunks that all have the dtypes of a whole-file read."""
+    dtypes = csv_dtypes(csv_path, chunksize, **csv_kwargs)
+    with pd.read_csv(csv_path, chunksize=chunksize, dtype=dtypes, **csv_kwargs) as reader:
+        yield from reader
+
+
+def convert_csv(csv_path, schema=None, chunksize=CSV_CHUNKSIZE):
+    # Stream an existing CSV into its Parquet copy without loading it whole.
+    # Categories are stored as plain strings; Parquet dictionary-encodes them
+    # on disk and read_table restores the categorical dtype.
+    if not _use_columnar(None) or not os.path.exists(csv_path):
+        return
+    typed = {col: ("string" if dtype == "category" else dtype) for col, dtype in (schema or {}).items()}
+    tmp_path = columnar_path(csv_path) + ".tmp"
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""]):
+            plain = {col: typed.get(col, "string") for col in chunk.columns}
+            table = pa.Table.from_pandas(apply_schema(chunk, plain), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        os.replace(tmp_path, columnar_path(csv_path))
@@ -0,0 +1,187 @@
+from collections import deque
+from html.parser import HTMLParser
+
+# === CONFIG ===
+# Characters fed to the parser at a time; rows are handed out between chunks,
+# so a caller that stops early never tokenizes the rest of the page
+CHUNK_SIZE = 32 * 1024
+
+SECTIONS = ("thead", "tbody", "tfoot")
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class Cell:
+    # One <td>/<th>: its text nodes, link targets and images, nothing else.
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.parts = []
+        self.links = []
+        # (attrs, ancestors): ancestors are the (tag, classes) of the elements
+        # open inside this cell around the <img>
+        self.images = []
+
+    @property
+    def text(self):
+        # Same as BeautifulSoup's cell.text
+        return "".join(self.parts)
+
+    def get_text(self, separator="", strip=False):
+        # Same as BeautifulSoup's cell.get_text(separator, strip=...)
+        if not strip:
+            return separator.join(self.parts)
+        return separator.join(part.strip() for part in self.parts if part.strip())
+
+
+class Row:
+    def __init__(self, section):
+        self.section = section
+        self.cells = []
+
+    @property
+    def tds(self):
+        return [cell for cell in self.cells if cell.tag == "td"]
+
+    @property
+    def has_th(self):
+        return any(cell.tag == "th" for cell in self.cells)
+
+    def get_text(self, separator="", strip=False):
+        parts = [part for cell in self.cells for part in cell.parts]
+        if strip:
+            parts = [part.strip() for part in parts if part.strip()]
+        return separator.join(parts)
+
+
+def has_class(prefix):
+    # Table matcher: any class starting with `prefix` ("SortTable_table")
+    def match(attrs):
+        return any(c.startswith(prefix) for c in (attrs.get("class") or "").split())
+    return match
+
+
+class TableParser(HTMLParser):
+    # Event-driven reader for the first <table> that `match` accepts. Completed
+    # rows queue up in `rows`; no tree is built. A table nested inside a cell
+    # only contributes its text to that cell.
+
+    def __init__(self, match=None, images=None):
+        super().__init__(convert_charrefs=True)
+        self.match = match
+        self.images = images
+        self.rows = deque()
+        self.done = False
+        self.depth = 0
+        self.section = None
+        self.row = None
+        self.cell = None
+        self.open = []
+        self.in_data = False
+
+    def handle_starttag(self, tag, attrs):
+        self.in_data = False
+        if self.done:
+            return
+        attrs = {name: value or "" for name, value in attrs}
+        if tag == "img":
+            if self.images is not None:
+                self.images.append(attrs)
+            if self.cell is not None:
+                self.cell.images.append((attrs, tuple(self.open)))
+        if not self.depth:
+            if tag == "table" and (self.match is None or self.match(attrs)):
+                self.depth = 1
+            return
+        if tag == "table":
+            self.depth += 1
+        if self.depth > 1:
+            self._open_inner(tag, attrs)
+        elif tag in SECTIONS:
+            self._end_row()
+            self.section = tag
+        elif tag == "tr":
+            self._end_row()
+            self.row = Row(self.section)
+        elif tag in ("td", "th"):
+            self._end_cell()
+            if self.row is None:
+                self.row = Row(self.section)
+            self.cell = Cell(tag)
+            self.row.cells.append(self.cell)
+        else:
+            self._open_inner(tag, attrs)
+
+    def _open_inner(self, tag, attrs):
+        if self.cell is None:
+            return
+        if tag == "a":
+            self.cell.links.append(attrs.get("href", ""))
+        if tag not in VOID_TAGS:
+            self.open.append((tag, tuple(attrs.get("class", "").split())))
+
+    def handle_endtag(self, tag):
+        self.in_data = False
+        if self.done or not self.depth:
+            return
+        if tag == "table":
+            self.depth -= 1
+            if not self.depth:
+                self._end_row()
+                self.done = True
+                return
+        if self.depth > 1 or tag not in ("td", "th", "tr") + SECTIONS:
+            # Pop back to the matching open element, if there is one
+            for i in range(len(self.open) - 1, -1, -1):
+                if self.open[i][0] == tag:
+                    del self.open[i:]
+                    break
+        elif tag in ("td", "th"):
+            self._end_cell()
+        else:
+            self._end_row()
+            if tag in SECTIONS:
+                self.section = None
+
+    def handle_comment(self, data):
+        self.in_data = False
+
+    def handle_data(self, data):
+        # Like BeautifulSoup's get_text(), script and style bodies are not text
+        if self.cell is None or (self.open and self.open[-1][0] in ("script", "style")):
+            return
+        # A text node split across two fed chunks stays one string
+        if self.in_data:
+            self.cell.parts[-1] += data
+        else:
+            self.cell.parts.append(data)
+            self.in_data = True
+
+    def _end_cell(self):
+        self.cell = None
+        self.open = []
+
+    def _end_row(self):
+        self._end_cell()
+        if self.row is not None:
+            self.rows.append(self.row)
+            self.row = None
+
+
+def iter_table_rows(html, match=None, images=None, chunk_size=None):
+    """Yield the rows of the first matching table as they are parsed.
+
+    Stop iterating and the rest of the page is never read. `images`, if
+    given, collects the attributes of every <img> seen up to that point.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    parser = TableParser(match, images)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        while parser.rows:
+            yield parser.rows.popleft()
+        if parser.done:
+            return
+    parser.close()
+    parser._end_row()
+    while parser.rows:
+        yield parser.rows.popleft()
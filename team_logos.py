@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import hashlib
+import http.client
+import io
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from fetcher import HTTP_POOL, HTTP_CONCURRENCY, HTTP_PER_DOMAIN, DECODE_ERRORS, fetch_all
+from storage import CSV_CHUNKSIZE
+from telemetry import stage, count
+
+# === CONFIG ===
+LOGO_DIR = "team_logos"
+LOGO_INDEX = "index.json"
+# Thumbnails fit in a THUMB_SIZE x THUMB_SIZE box (needs Pillow; without it
+# logos are kept as downloaded)
+THUMB_SIZE = 96
+# A logo checked this recently is not asked about again, not even conditionally
+LOGO_MAX_AGE = 7 * 24 * 3600
+IMAGE_TYPES = {
+    "image/png": ".png", "image/jpeg": ".jpg", "image/gif": ".gif", "image/webp": ".webp", "image/svg+xml": ".svg",
+}
+LOGO_HEADERS = {"Accept": "image/avif,image/webp,image/png,image/*;q=0.8,*/*;q=0.5"}
+
+
+class LogoCache:
+    # Thumbnails named by the SHA-1 of their bytes, so teams sharing a logo
+    # share one file and a re-download of the same image writes nothing.
+    # index.json maps each EP team ID to its logo URL, the ETag and
+    # Last-Modified it was served with, and its thumbnail.
+
+    def __init__(self, root=LOGO_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, LOGO_INDEX)
+        self.index = self._load()
+        self._changed = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, ep_team_id):
+        # An entry only counts while its thumbnail is on disk and was made at the
+        # size this install would make it; logos kept as downloaded are rebuilt
+        # once Pillow is there
+        entry = self.index.get(ep_team_id)
+        if not entry or not os.path.exists(self.path(entry["thumb"])):
+            return None
+        if entry.get("size") != thumb_size(os.path.splitext(entry["thumb"])[1]):
+            return None
+        return entry
+
+    def path(self, thumb):
+        return os.path.join(self.root, thumb)
+
+    def put_thumb(self, data, ext):
+        thumb = hashlib.sha1(data).hexdigest() + ext
+        path = self.path(thumb)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return thumb
+
+    def update(self, ep_team_id, entry):
+        with self._lock:
+            self.index[ep_team_id] = entry
+            self._changed[ep_team_id] = entry
+
+    def thumbnails(self):
+        return {team_id: entry["thumb"] for team_id, entry in self.index.items() if entry.get("thumb")}
+
+    def save(self):
+        # Merged into whatever is on disk now, so seasons run side by side
+        # do not drop each other's entries
+        with self._lock:
+            if not self._changed:
+                return
+            index = {**self._load(), **self._changed}
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+            self.index = index
+            self._changed = {}
+
+
+def logo_targets(df):
+    # {EP team ID: logo URL}, one per team, from phase 2 rows
+    if "EP_Team_ID" not in df.columns or "TeamLogoURL" not in df.columns:
+        return {}
+    teams = df[["EP_Team_ID", "TeamLogoURL"]].dropna().astype(str)
+    teams = teams[(teams["EP_Team_ID"] != "") & (teams["TeamLogoURL"] != "")]
+    teams = teams.drop_duplicates("EP_Team_ID")
+    return dict(zip(teams["EP_Team_ID"], teams["TeamLogoURL"]))
+
+
+def image_extension(response, url):
+    ext = IMAGE_TYPES.get(response.headers.get_content_type())
+    if ext is None:
+        # Some CDNs send logos as application/octet-stream
+        ext = os.path.splitext(urlsplit(url).path)[1].lower()
+        ext = ".jpg" if ext == ".jpeg" else ext
+    return ext if ext in IMAGE_TYPES.values() else None
+
+
+def thumb_size(ext):
+    # The box a logo of this type is fitted into here; None when it is kept as downloaded
+    return None if Image is None or ext == ".svg" else THUMB_SIZE
+
+
+def make_thumbnail(data, ext, size=THUMB_SIZE):
+    if thumb_size(ext) is None:
+        return data, ext
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGBA")
+            image.thumbnail((size, size))
+            out = io.BytesIO()
+            image.save(out, "PNG", optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None, None
+    return out.getvalue(), ".png"
+
+
+def download_logo(url, entry, cache, pool=None):
+    """Fetch one logo, conditionally when `entry` holds its validators.
+
+    Returns ("not_modified" or "downloaded", new index entry), or None.
+    """
+    headers = dict(LOGO_HEADERS)
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        response = (pool or HTTP_POOL).get(url, headers=headers)
+    except (OSError, http.client.HTTPException, *DECODE_ERRORS) as e:
+        print(f"🌐 Logo fetch failed for {url}: {e}")
+        return None
+    validators = {
+        "etag": response.headers.get("ETag") or (entry or {}).get("etag"),
+        "last_modified": response.headers.get("Last-Modified") or (entry or {}).get("last_modified"),
+    }
+    if response.status == 304 and entry:
+        return "not_modified", {**entry, **validators}
+    if response.status != 200:
+        print(f"⚠️ Logo {url} returned HTTP {response.status}")
+        return None
+    ext = image_extension(response, url)
+    data, ext = make_thumbnail(response.body, ext) if ext else (None, None)
+    if data is None:
+        print(f"⚠️ Logo {url} is not a readable image")
+        return None
+    return "downloaded", {"url": url, **validators, "thumb": cache.put_thumb(data, ext),
+                          "size": thumb_size(ext)}
+
+
+def update_logos(targets, cache, pool=None, max_age=LOGO_MAX_AGE,
+                 concurrency=HTTP_CONCURRENCY, per_domain=HTTP_PER_DOMAIN):
+    """Bring the cached logo of every {EP team ID: logo URL} up to date.
+
+    Logos checked within max_age are left alone; the rest are requested
+    concurrently, with If-None-Match/If-Modified-Since when a thumbnail is
+    already cached. Returns how many teams were fresh, not modified,
+    downloaded or failed.
+    """
+    now = time.time()
+    summary = dict.fromkeys(["fresh", "not_modified", "downloaded", "failed"], 0)
+    by_url = {}
+    for team_id, url in targets.items():
+        entry = cache.get(team_id)
+        if entry and entry["url"] == url and now - entry.get("checked", 0) < max_age:
+            summary["fresh"] += 1
+        else:
+            by_url.setdefault(url, []).append(team_id)
+
+    if by_url:
+        # Teams sharing a URL share one request, revalidated against any of their entries
+        cached = {url: next((e for e in map(cache.get, ids) if e and e["url"] == url), None)
+                  for url, ids in by_url.items()}
+        results = asyncio.run(fetch_all(
+            by_url, lambda url: download_logo(url, cached[url], cache, pool), concurrency, per_domain))
+        for url, result in results.items():
+            for team_id in by_url[url]:
+                if result is None:
+                    # A logo that was cached before stays usable
+                    summary["failed"] += 1
+                    continue
+                status, entry = result
+                cache.update(team_id, {**entry, "checked": now})
+                summary[status] += 1
+    cache.save()
+    for status, n in summary.items():
+        if n:
+            count(f"logos.{status}", n)
+    return summary
+
+
+def run_logos(phase2_file, logo_dir=LOGO_DIR, max_age=LOGO_MAX_AGE):
+    df = pd.read_csv(phase2_file, usecols=lambda c: c in ("EP_Team_ID", "TeamLogoURL"), dtype=str)
+    targets = logo_targets(df)
+    if not targets:
+        print("🖼️ No team logo URLs in the Phase 2 output")
+        return None
+    with stage("logos.update", rows=len(targets)):
+        summary = update_logos(targets, LogoCache(logo_dir), max_age=max_age)
+    print(f"🖼️ Logos for {len(targets)} teams: {summary['downloaded']} downloaded, "
+          f"{summary['not_modified']} unchanged, {summary['fresh']} recently checked, {summary['failed']} failed")
+    return summary
+
+
+def fill_logo_files(csv_path, logo_dir=LOGO_DIR, chunksize=CSV_CHUNKSIZE):
+    """Point TeamLogoFile in a phase 2 CSV at each team's cached thumbnail.
+
+    Rewrites the CSV a chunk at a time; teams without a usable thumbnail get
+    an empty TeamLogoFile. Returns {EP team ID: thumbnail path}.
+    """
+    if not os.path.isdir(logo_dir) or "EP_Team_ID" not in pd.read_csv(csv_path, nrows=0).columns:
+        return {}
+    cache = LogoCache(logo_dir)
+    files = {}
+    tmp_path = csv_path + ".tmp"
+    written = False
+    for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize, dtype=str, keep_default_na=False)):
+        for team_id in chunk["EP_Team_ID"].unique():
+            if team_id not in files:
+                entry = cache.get(team_id)
+                files[team_id] = cache.path(entry["thumb"]) if entry else ""
+        chunk["TeamLogoFile"] = chunk["EP_Team_ID"].map(files)
+        chunk.to_csv(tmp_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        written = True
+    if written:
+        os.replace(tmp_path, csv_path)
+    return {team_id: path for team_id, path in files.items() if path}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download and thumbnail the team logos named in the Phase 2 output")
+    parser.add_argument("--input", default="phase2_team_rosters.csv")
+    parser.add_argument("--logo-dir", default=LOGO_DIR)
+    parser.add_argument("--refresh", action="store_true", help="revalidate every logo, however recently it was checked")
+    args = parser.parse_args()
+    run_logos(args.input, args.logo_dir, max_age=0 if args.refresh else LOGO_MAX_AGE)
@@ -0,0 +1,146 @@
+import difflib
+import re
+
+import numpy as np
+import pandas as pd
+
+# === CONFIG ===
+NGRAM_SIZE = 3
+TOP_K = 10
+# n-grams shared by more than this fraction of the reference teams ("hoc", " u1")
+# carry no signal and are dropped from blocking.
+MAX_POSTING_FRACTION = 0.05
+
+_EP_TEAM_ID = re.compile(r"/team/(\d+)")
+
+
+def extract_numeric_class(class_str):
+    match = re.search(r"U(\d{2})", str(class_str).upper())
+    return int(match.group(1)) if match else None
+
+def extract_ep_class_from_url(url):
+    match = re.search(r"-u(\d{2})", str(url).lower())
+    return int(match.group(1)) if match else None
+
+def ep_team_id_from_url(url):
+    # "https://www.eliteprospects.com/team/9001/calgary-flames-u18-aaa" -> "9001"
+    match = _EP_TEAM_ID.search(str(url)) if isinstance(url, str) else None
+    return match.group(1) if match else ""
+
+def char_ngrams(text, n=NGRAM_SIZE):
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class TeamIndex:
+    # Candidates share an n-gram and sit within one EP class of the scraped team.
+    # They are ranked by Dice coefficient and the top_k rescored with difflib,
+    # so the final pick uses the same ratio as the old nested loop.
+
+    def __init__(self, ref_df, n=NGRAM_SIZE, top_k=TOP_K, max_posting_fraction=MAX_POSTING_FRACTION):
+        self.ref_df = ref_df.reset_index(drop=True)
+        self.n = n
+        self.top_k = top_k
+
+        self.names = self.ref_df["NormalizedTeam"].fillna("").astype(str).tolist()
+        self.name_ids = pd.factorize(self.ref_df["NormalizedTeam"].fillna(""))[0]
+        self.unused = np.ones(len(self.names), dtype=bool)
+
+        urls = self.ref_df["EP_URL"] if "EP_URL" in self.ref_df.columns else pd.Series("", index=self.ref_df.index)
+        classes = [extract_ep_class_from_url(url) for url in urls]
+        self.classes = np.array([c if c else np.nan for c in classes], dtype=float)
+        self._class_masks = {}
+        # EP team ID -> row positions, for teams the registry already knows
+        self.positions_by_id = {}
+        for pos, url in enumerate(urls):
+            ep_team_id = ep_team_id_from_url(url)
+            if ep_team_id:
+                self.positions_by_id.setdefault(ep_team_id, []).append(pos)
+
+        # The n-gram index is built on the first fuzzy match; a season the
+        # registry resolves completely never needs it
+        self.max_posting_fraction = max_posting_fraction
+        self.postings = None
+
+    def _build_postings(self):
+        postings = {}
+        gram_counts = np.zeros(len(self.names), dtype=np.int32)
+        for i, name in enumerate(self.names):
+            grams = char_ngrams(name, self.n)
+            gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.gram_counts = gram_counts
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.max_posting = max(int(len(self.names) * self.max_posting_fraction), 50)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _class_mask(self, team_class_num):
+        if team_class_num not in self._class_masks:
+            if team_class_num:
+                mask = np.isnan(self.classes) | (np.abs(self.classes - team_class_num) <= 1)
+            else:
+                mask = np.ones(len(self.names), dtype=bool)
+            self._class_masks[team_class_num] = mask
+        return self._class_masks[team_class_num]
+
+    def _blocked_candidates(self, grams):
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        selective = [ids for ids in lists if len(ids) <= self.max_posting]
+        counts = np.bincount(np.concatenate(selective or lists), minlength=len(self.names))
+        ids = np.flatnonzero(counts)
+        return ids, counts[ids]
+
+    def best_match(self, norm_team, team_class_num=None):
+        """Return the row position of the best unused reference team, or None."""
+        return self.best_match_with_score(norm_team, team_class_num)[0]
+
+    def best_match_with_score(self, norm_team, team_class_num=None):
+        # (position, difflib ratio) of the best match, or (None, 0.0)
+        if self.postings is None:
+            self._build_postings()
+        class_mask = self._class_mask(team_class_num)
+        grams = char_ngrams(norm_team, self.n)
+
+        ids, shared = self._blocked_candidates(grams)
+        keep = class_mask[ids] & self.unused[ids]
+        ids, shared = ids[keep], shared[keep]
+
+        if len(ids) == 0:
+            # Nothing shares an n-gram: fall back to scoring every allowed team
+            ids = np.flatnonzero(class_mask & self.unused)
+            if len(ids) == 0:
+                return None, 0.0
+        elif len(ids) > self.top_k:
+            dice = 2.0 * shared / (len(grams) + self.gram_counts[ids])
+            top = np.argpartition(-dice, self.top_k - 1)[:self.top_k]
+            ids = np.sort(ids[top])
+
+        best_pos, best_score = None, -1.0
+        matcher = difflib.SequenceMatcher(None, norm_team)
+        for pos in ids:
+            matcher.set_seq2(self.names[pos])
+            # the quick ratios are upper bounds, so skipping on them never changes the pick
+            if matcher.real_quick_ratio() <= best_score or matcher.quick_ratio() <= best_score:
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best_pos, best_score = int(pos), score
+        return best_pos, max(best_score, 0.0)
+
+    def position_of(self, ep_team_id, team_class_num=None):
+        """Row position of an unused reference team with this EP ID, or None."""
+        class_mask = self._class_mask(team_class_num)
+        for pos in self.positions_by_id.get(ep_team_id, ()):
+            if self.unused[pos] and class_mask[pos]:
+                return pos
+        return None
+
+    def mark_used(self, pos):
+        self.unused[self.name_ids == self.name_ids[pos]] = False
@@ -0,0 +1,149 @@
+import argparse
+import sqlite3
+import time
+
+import pandas as pd
+
+from names import normalize_name
+from team_matcher import ep_team_id_from_url
+
+# === CONFIG ===
+TEAM_REGISTRY_FILE = "team_registry.sqlite"
+# Seconds a writer waits on another process (parallel pipeline seasons) holding the lock
+LOCK_TIMEOUT = 30
+# A fuzzy match is only remembered as an alias at or above this difflib ratio
+FUZZY_ALIAS_MIN_RATIO = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teams (
+    ep_team_id   TEXT PRIMARY KEY,
+    ep_url       TEXT,
+    name         TEXT,
+    level        TEXT,
+    class_1      TEXT,
+    class_2      TEXT,
+    class_3      TEXT,
+    logo_file    TEXT,
+    first_season TEXT,
+    last_season  TEXT
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    alias      TEXT PRIMARY KEY,
+    ep_team_id TEXT NOT NULL,
+    raw_name   TEXT,
+    source     TEXT,
+    season     TEXT,
+    updated    REAL
+);
+"""
+
+def _text(value):
+    return None if value is None or (isinstance(value, float) and pd.isna(value)) else str(value)
+
+
+class TeamRegistry:
+    # EP team IDs and every normalized name a team has been matched under.
+    # Aliases are read into a dict once, so resolving a name is a dict lookup;
+    # writes are queued and land in one transaction on commit(). An alias
+    # entered by hand (source "manual") is never overwritten by a match; a
+    # reference team's own name replaces any other alias it collides with.
+
+    def __init__(self, path=TEAM_REGISTRY_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        rows = self.conn.execute("SELECT alias, ep_team_id, source FROM aliases").fetchall()
+        self.aliases = {alias: ep_team_id for alias, ep_team_id, _ in rows}
+        self.sources = {alias: source for alias, _, source in rows}
+        self._aliases = []
+        self._teams = []
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM teams").fetchone()[0]
+
+    def resolve(self, norm_team):
+        return self.aliases.get(norm_team)
+
+    def add_alias(self, norm_team, ep_team_id, raw_name=None, source="mhr", season=None):
+        if not norm_team or not ep_team_id:
+            return
+        if source != "manual" and (self.aliases.get(norm_team) == ep_team_id or self.sources.get(norm_team) == "manual"):
+            return
+        self.aliases[norm_team] = ep_team_id
+        self.sources[norm_team] = source
+        self._aliases.append((norm_team, ep_team_id, raw_name, source, season, time.time()))
+
+    def add_team(self, ep_team_id, ep_url=None, name=None, level=None, classes=(None, None, None),
+                 logo_file=None, season=None):
+        if ep_team_id:
+            self._teams.append((ep_team_id, _text(ep_url), _text(name), _text(level),
+                                *(_text(c) for c in classes), _text(logo_file), _text(season)))
+
+    def add_reference(self, ref_df, season=None):
+        # Every reference team, plus its own normalized name as an alias.
+        # Teams already stored with the same details are not written again.
+        known = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT ep_team_id, ep_url, name, level, class_1, class_2, class_3 FROM teams")}
+        columns = ["EP_URL", "Team", "Level", "Class 1", "Class 2", "Class 3"]
+        values = [ref_df[c].tolist() if c in ref_df.columns else [None] * len(ref_df) for c in columns]
+        norms = ref_df["NormalizedTeam"].tolist() if "NormalizedTeam" in ref_df.columns else [None] * len(ref_df)
+        for norm, *fields in zip(norms, *values):
+            ep_url, team = fields[0], fields[1]
+            ep_team_id = ep_team_id_from_url(ep_url)
+            if not ep_team_id:
+                continue
+            fields = tuple(_text(v) for v in fields)
+            if known.get(ep_team_id) != fields:
+                self.add_team(ep_team_id, *fields[:3], classes=fields[3:], season=season)
+            norm = norm if isinstance(norm, str) and norm else normalize_name(team)
+            # An exact reference name beats whatever a fuzzy match stored for it
+            if self.aliases.get(norm) != ep_team_id:
+                self.add_alias(norm, ep_team_id, team, "reference", season)
+
+    def commit(self):
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO teams (ep_team_id, ep_url, name, level, class_1, class_2, class_3, logo_file,
+                                   first_season, last_season)
+                VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?9)
+                ON CONFLICT(ep_team_id) DO UPDATE SET
+                    ep_url = COALESCE(excluded.ep_url, ep_url), name = COALESCE(excluded.name, name),
+                    level = COALESCE(excluded.level, level), class_1 = COALESCE(excluded.class_1, class_1),
+                    class_2 = COALESCE(excluded.class_2, class_2), class_3 = COALESCE(excluded.class_3, class_3),
+                    logo_file = COALESCE(excluded.logo_file, logo_file),
+                    first_season = COALESCE(first_season, excluded.first_season),
+                    last_season = COALESCE(excluded.last_season, last_season)
+            """, self._teams)
+            self.conn.executemany("""
+                INSERT INTO aliases (alias, ep_team_id, raw_name, source, season, updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(alias) DO UPDATE SET
+                    ep_team_id = excluded.ep_team_id, raw_name = excluded.raw_name, source = excluded.source,
+                    season = excluded.season, updated = excluded.updated
+                WHERE aliases.source != 'manual' OR excluded.source = 'manual'
+            """, self._aliases)
+        self._teams = []
+        self._aliases = []
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or correct the persistent EP team registry")
+    parser.add_argument("--path", default=TEAM_REGISTRY_FILE)
+    parser.add_argument("--alias", nargs=2, metavar=("TEAM_NAME", "EP_TEAM_ID"),
+                        help="pin a team name to an EP team ID; matching never overrides it")
+    parser.add_argument("--lookup", metavar="TEAM_NAME", help="show which EP team a name resolves to")
+    args = parser.parse_args()
+    registry = TeamRegistry(args.path)
+    if args.alias:
+        name, ep_team_id = args.alias
+        registry.add_alias(normalize_name(name), ep_team_id, name, source="manual")
+        print(f"📌 {name} -> EP team {ep_team_id}")
+    if args.lookup:
+        print(f"🔎 {args.lookup} -> {registry.resolve(normalize_name(args.lookup)) or 'unknown'}")
+    print(f"🗂️ {len(registry)} teams, {len(registry.aliases)} aliases in {args.path}")
+    registry.close()
@@ -0,0 +1,220 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# === CONFIG ===
+# JSON lines are appended here, one file across runs. Set TRUPRO_TELEMETRY=""
+# to keep telemetry in memory and only print the summary.
+TELEMETRY_FILE = "telemetry.jsonl"
+
+
+def telemetry_path():
+    # Read when a run starts, so a pipeline task can point its own process elsewhere
+    return os.environ.get("TRUPRO_TELEMETRY", TELEMETRY_FILE)
+
+
+def memory_mb():
+    # (current, peak) resident set size in MB. The peak is the kernel's
+    # high-water mark, which reset_peak_memory() rewinds where Linux allows it.
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        if resource is None:
+            return None, None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return None, peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def reset_peak_memory():
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+class Stage:
+    # Handed to the body of a `with stage(...)` block so it can report rows.
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.extra = {}
+
+
+class Telemetry:
+    # Stage timings, counters and latency samples for one run. Everything is
+    # kept in memory for the summary and, once a run is started with a path,
+    # also written out as JSON lines as it happens.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        self.reset()
+
+    def reset(self):
+        self.run = None
+        self.run_id = None
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.samples = {}
+
+    def start_run(self, run, path=None):
+        # path None means TRUPRO_TELEMETRY (or telemetry.jsonl); "" writes no file
+        path = telemetry_path() if path is None else path
+        self.finish_file()
+        self.reset()
+        self.run = run
+        self.run_id = uuid.uuid4().hex[:12]
+        if path:
+            self._file = open(path, "a", encoding="utf-8")
+        reset_peak_memory()
+        self.emit({"type": "run_start", "pid": os.getpid()})
+
+    def emit(self, record):
+        if self._file is None:
+            return
+        line = json.dumps({"ts": round(time.time(), 3), "run": self.run, "run_id": self.run_id, **record}, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def finish_file(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # Only an outermost stage on the main thread may rewind the peak, so
+        # nested and worker stages report the peak since that stage began
+        if not stack and threading.current_thread() is threading.main_thread():
+            reset_peak_memory()
+        current = Stage(name, rows)
+        stack.append(current)
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            rss, peak = memory_mb()
+            record = {
+                "type": "stage", "stage": name, "seconds": round(seconds, 4), "rows": current.rows,
+                "rows_per_sec": round(current.rows / seconds, 1) if current.rows and seconds > 0 else None,
+                "rss_mb": rss and round(rss, 1), "peak_rss_mb": peak and round(peak, 1),
+                "thread": threading.current_thread().name, **current.extra,
+            }
+            with self._lock:
+                self.stages.setdefault(name, []).append(record)
+            self.emit(record)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        self.emit({"type": "count", "name": name, "n": n})
+
+    def observe(self, name, seconds, **fields):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+        self.emit({"type": "sample", "name": name, "seconds": round(seconds, 4), **fields})
+
+    def summary_rows(self):
+        rows = []
+        for name, records in self.stages.items():
+            seconds = [r["seconds"] for r in records]
+            total_rows = sum(r["rows"] or 0 for r in records)
+            peaks = [r["peak_rss_mb"] for r in records if r["peak_rss_mb"] is not None]
+            rows.append({
+                "stage": name, "calls": len(records), "total_s": round(sum(seconds), 3),
+                "mean_s": round(sum(seconds) / len(seconds), 4), "p95_s": round(_percentile(seconds, 0.95), 4),
+                "rows": total_rows or None,
+                "rows_per_sec": round(total_rows / sum(seconds), 1) if total_rows and sum(seconds) > 0 else None,
+                "peak_rss_mb": max(peaks) if peaks else None,
+            })
+        return rows
+
+    def finish_run(self):
+        """Print the end-of-run summary table and write it as the run's last JSON line."""
+        elapsed = time.perf_counter() - self.started
+        stages = self.summary_rows()
+        samples = {
+            name: {"n": len(values), "p50_s": round(_percentile(values, 0.5), 4),
+                   "p95_s": round(_percentile(values, 0.95), 4), "max_s": round(max(values), 4)}
+            for name, values in self.samples.items()
+        }
+        self.emit({"type": "summary", "seconds": round(elapsed, 3), "stages": stages,
+                   "counters": dict(self.counters), "samples": samples, "peak_rss_mb": memory_mb()[1]})
+        self.finish_file()
+
+        print(f"\n📊 {self.run or 'run'} finished in {elapsed:.1f}s")
+        if stages:
+            print(f"{'stage':<28}{'calls':>7}{'total s':>10}{'mean s':>9}{'p95 s':>9}{'rows':>10}{'rows/s':>11}{'peak MB':>9}")
+            for row in stages:
+                print(f"{row['stage']:<28}{row['calls']:>7}{row['total_s']:>10.2f}{row['mean_s']:>9.3f}{row['p95_s']:>9.3f}"
+                      f"{row['rows'] or '':>10}{row['rows_per_sec'] or '':>11}{row['peak_rss_mb'] or '':>9}")
+        for name, stats in samples.items():
+            print(f"⏱️ {name}: {stats['n']} | p50 {stats['p50_s']:.3f}s | p95 {stats['p95_s']:.3f}s | max {stats['max_s']:.3f}s")
+        if self.counters:
+            print("🔢 " + " | ".join(f"{name} {n}" for name, n in sorted(self.counters.items())))
+
+
+TELEMETRY = Telemetry()
+
+
+def start_run(run, path=None):
+    TELEMETRY.start_run(run, path)
+
+
+def finish_run():
+    TELEMETRY.finish_run()
+
+
+def stage(name, rows=None):
+    return TELEMETRY.stage(name, rows)
+
+
+def count(name, n=1):
+    TELEMETRY.count(name, n)
+
+
+def observe(name, seconds, **fields):
+    TELEMETRY.observe(name, seconds, **fields)
+
+
+def timed(name):
+    # Decorator form of stage(). A result with a length is reported as rows.
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as current:
+                result = func(*args, **kwargs)
+                if hasattr(result, "__len__"):
+                    current.rows = len(result)
+                return result
+        return wrapper
+    return decorate
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules are flat scripts at the repo root; the legacy reference code and
+# synthetic rosters live with the benchmarks
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO_DIR, os.path.join(REPO_DIR, "benchmarks")]
@@ -0,0 +1,14 @@
+import pandas as pd
+
+from checkpoints import CheckpointStore
+
+
+def test_build_writes_gp_the_same_way_for_every_team(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    store.save("a", "A", pd.DataFrame({"Player": ["x", "y"], "Team": ["A", "A"], "GP": [12, None]}))
+    store.save("b", "B", pd.DataFrame({"Player": ["z"], "Team": ["B"], "GP": [12]}))
+    output = tmp_path / "phase2.csv"
+
+    assert store.build(["a", "b"], str(output)) == 3
+    gp = pd.read_csv(output, dtype=str)["GP"].tolist()
+    assert gp == ["12", "0", "12"]
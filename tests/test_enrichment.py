@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_enrichment import (CLASS_SETS, legacy_age_columns, legacy_ppg, legacy_stats_missing, local_stats,
+                              ranking_table)
+from enrichment import add_age_columns, birth_years, class_levels, points_per_game, stats_missing_by_team
+
+SEED = 0
+
+
+def same(a, b):
+    return a.dtype == b.dtype and a.equals(b)
+
+
+def ranking(codes):
+    return pd.DataFrame({"Team": [f"Team {i}" for i in range(len(codes))], "AgeLevel": pd.array(codes, dtype="str")})
+
+
+def test_all_codes_invalid_give_none():
+    years = birth_years(pd.Series(["", "U", "1a"], dtype="str"))
+    assert years.dtype == object and years.isna().all() and list(years) == [None, None, None]
+    levels = class_levels(years, 2024, False)
+    assert levels.dtype == object and list(levels) == [None, None, None]
+
+
+def test_mixed_codes_keep_float_class_labels():
+    df = add_age_columns(ranking(["15", "", "16"]), 2024, ("AAA", "U15", ""))
+    assert df["BirthYear"].dtype == "float64"
+    assert list(df["ClassLevel"]) == ["U9.0", "Unan", "U8.0"]
+
+
+def test_nobody_played_gives_integer_ppg():
+    ppg = points_per_game(pd.Series([1, 2]), pd.Series([0, 0]), pd.Series([0, 0]))
+    assert ppg.dtype == "int64" and list(ppg) == [0, 0]
+
+
+# Every age-code mix scrape_league can see: all parsed, some blank, all blank
+@pytest.mark.parametrize("classes", CLASS_SETS)
+@pytest.mark.parametrize("n", [1, 7, 200])
+@pytest.mark.parametrize("missing", [0.0, 0.2, 1.0])
+def test_age_columns_match_row_wise(missing, n, classes):
+    df = ranking_table(n, missing, SEED)
+    old = legacy_age_columns(df.copy(), 2024, classes)
+    new = add_age_columns(df.copy(), 2024, classes)
+    for column in ("IsCanadian", "BirthYear", "ClassLevel"):
+        assert same(old[column], new[column]), column
+
+
+@pytest.mark.parametrize("df", [
+    local_stats(10_000, SEED),
+    pd.DataFrame({"Player": ["a", "b"], "GP": [0, 0], "G": [1, 2], "A": [0, 0]}),
+    pd.DataFrame({"Player": ["a", "b"], "GP": [2, np.nan], "G": [1, 2], "A": [0, 0]}),
+    pd.DataFrame({"Player": [], "GP": [], "G": [], "A": []}),
+    pd.DataFrame({"GP": [3, 0], "G": [1, 2], "A": [0, 0]}),
+], ids=["synthetic", "nobody played", "missing GP", "empty", "numeric only"])
+def test_ppg_matches_row_wise(df):
+    assert same(legacy_ppg(df), points_per_game(df["G"], df["A"], df["GP"]))
+
+
+def test_stats_missing_matches_groupby_apply():
+    players = local_stats(10_000, SEED)
+    players.loc[players["Team"] == "T3", "GP"] = 2
+    assert legacy_stats_missing(players).equals(stats_missing_by_team(players["Team"], players["GP"]))
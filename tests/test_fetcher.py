@@ -0,0 +1,94 @@
+import json
+import time
+from urllib.parse import quote
+
+import pytest
+
+import page_loader
+import phase2_logo_with_ids as phase2
+from bench_fetcher import FakeBrowser
+from fetcher import HttpPool, get_html
+from session_pool import SessionCookies
+from stub_server import serve, BROKEN_GZIP_ROUTE, REDIRECT_ROUTE
+
+STATIC_TEAM = "/team/9001/calgary-flames-u18-aaa"
+CLIENT_TEAM = "/team/9002/client-rendered"
+TEAM = "Calgary Flames U18 AAA"
+RENDERED = {(CLIENT_TEAM, True): "ep_stats.html", (CLIENT_TEAM, False): "ep_roster.html"}
+
+
+@pytest.fixture
+def stub():
+    with serve() as (base_url, handler):
+        yield base_url, handler
+
+
+@pytest.fixture
+def ep_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(page_loader, "HTTP_FAST_PATH", True)
+    monkeypatch.setattr(page_loader, "PAGE_CACHE", None)
+    session = SessionCookies(str(tmp_path / "ep_session.json"))
+    monkeypatch.setattr(phase2, "EP_SESSION", session)
+    return session
+
+
+def sign_in(session, **cookie):
+    with open(session.path, "w", encoding="utf-8") as f:
+        json.dump({"saved": time.time(), "cookies": [{"name": "ep_session", "value": "abc", **cookie}]}, f)
+
+
+def test_static_page_takes_the_fast_path_with_the_login(stub, ep_session):
+    base_url, handler = stub
+    sign_in(ep_session, domain="127.0.0.1")
+    browser = FakeBrowser(0)
+    df = phase2.scrape_ep_team_page(browser, base_url + STATIC_TEAM, TEAM)
+    assert not df.empty and browser.loads == 0
+    assert handler.cookies and all(cookie == "ep_session=abc" for cookie in handler.cookies)
+
+
+def test_client_rendered_page_falls_back_to_the_browser(stub, ep_session):
+    base_url, _ = stub
+    sign_in(ep_session, domain="127.0.0.1")
+    static = phase2.scrape_ep_team_page(FakeBrowser(0), base_url + STATIC_TEAM, TEAM)
+    browser = FakeBrowser(0, RENDERED)
+    df = phase2.scrape_ep_team_page(browser, base_url + CLIENT_TEAM, TEAM)
+    assert browser.loads > 0 and df.equals(static)
+
+
+def test_ep_pages_need_the_browser_without_a_saved_login(stub, ep_session):
+    base_url, handler = stub
+    browser = FakeBrowser(0)
+    df = phase2.scrape_ep_team_page(browser, base_url + STATIC_TEAM, TEAM)
+    assert not df.empty and browser.loads > 0
+    assert not any(handler.cookies)
+
+
+def test_cookie_stays_with_its_origin_across_redirects():
+    with serve() as (first_url, first), serve() as (second_url, second):
+        pool = HttpPool()
+        same = pool.get(f"{first_url}{REDIRECT_ROUTE}?to={quote(STATIC_TEAM)}", headers={"Cookie": "ep_session=abc"})
+        assert same.status == 200 and first.cookies == ["ep_session=abc", "ep_session=abc"]
+
+        away = pool.get(f"{first_url}{REDIRECT_ROUTE}?to={quote(second_url + STATIC_TEAM)}",
+                        headers={"Cookie": "ep_session=abc"})
+        assert away.status == 200 and first.cookies[-1] == "ep_session=abc"
+        assert second.cookies == [None]
+
+
+def test_cookie_header_honours_domain_secure_and_path(tmp_path):
+    session = SessionCookies(str(tmp_path / "ep_session.json"))
+    with open(session.path, "w", encoding="utf-8") as f:
+        json.dump({"saved": time.time(), "cookies": [
+            {"name": "site", "value": "1", "domain": ".eliteprospects.com"},
+            {"name": "secure", "value": "2", "domain": "www.eliteprospects.com", "secure": True},
+            {"name": "team", "value": "3", "domain": "www.eliteprospects.com", "path": "/team"},
+        ]}, f)
+    assert session.cookie_header("https://www.eliteprospects.com/team/9001") == "site=1; secure=2; team=3"
+    assert session.cookie_header("http://www.eliteprospects.com/team/9001") == "site=1; team=3"
+    assert session.cookie_header("https://www.eliteprospects.com/teams") == "site=1; secure=2"
+    assert session.cookie_header("https://example.com/team/9001") is None
+
+
+def test_corrupt_body_sends_the_page_to_the_browser(stub):
+    base_url, _ = stub
+    assert get_html(base_url + BROKEN_GZIP_ROUTE) is None
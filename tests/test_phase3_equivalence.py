@@ -0,0 +1,97 @@
+import contextlib
+import filecmp
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_phase3 import compare_outputs, legacy_run_phase3
+from group_stats import PairwiseSum
+from phase32 import run_phase3
+from phase3_engine import prepare_rosters, class_groups, explode_classes, score_classes
+from synthetic import make_phase2_rosters
+
+PLAYERS = 3_000
+# The engine scores this roster about 5x faster than the per-class loop
+MIN_SPEEDUP = 2
+
+
+# Seed 3 is the roster where a last-bit difference in the class means once
+# rounded a truproscore to 0.39 instead of 0.40. At this size no score lands
+# on the boundary, so the class files are also compared byte for byte: the
+# CSVs carry full-precision columns (pctcentered) that show the drift itself.
+@pytest.mark.parametrize("seed", [1, 3, 7])
+def test_engine_matches_legacy_loop(tmp_path, monkeypatch, seed):
+    monkeypatch.setenv("TRUPRO_TELEMETRY", "")
+    monkeypatch.chdir(tmp_path)
+    roster_file = tmp_path / "phase2_team_rosters.csv"
+    make_phase2_rosters(PLAYERS, seed=seed).to_csv(roster_file, index=False)
+    legacy_dir, new_dir = tmp_path / "legacy", tmp_path / "engine"
+    legacy_dir.mkdir()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_run_phase3(str(roster_file), str(legacy_dir))
+        run_phase3(str(roster_file), str(new_dir))
+
+    files, worst = compare_outputs(str(legacy_dir), str(new_dir))
+    assert files > 0 and worst == 0
+    names = sorted(f for f in os.listdir(legacy_dir) if f.endswith(".csv"))
+    _, mismatched, errors = filecmp.cmpfiles(legacy_dir, new_dir, names, shallow=False)
+    assert not mismatched and not errors
+
+
+def best_time(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_engine_is_faster_than_legacy_loop(tmp_path, monkeypatch):
+    roster_file = tmp_path / "phase2_team_rosters.csv"
+    make_phase2_rosters(PLAYERS, seed=3).to_csv(roster_file, index=False)
+    # Both sides write the same class files; only reading and scoring are timed
+    monkeypatch.setattr(pd.DataFrame, "to_csv", lambda *args, **kwargs: None)
+
+    def engine():
+        df = prepare_rosters(pd.read_csv(roster_file, low_memory=False), 2024)
+        score_classes(explode_classes(df, class_groups(df)))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = best_time(lambda: legacy_run_phase3(str(roster_file), str(tmp_path)))
+    assert best_time(engine) * MIN_SPEEDUP < legacy
+
+
+@pytest.mark.parametrize("n", [0, 5, 128, 129, 1_000, 20_011])
+def test_pairwise_sum_in_pieces_matches_numpy(n):
+    rng = np.random.default_rng(n)
+    values = rng.normal(size=n) * 10.0 ** rng.uniform(-3, 3, size=n)
+    total = PairwiseSum(n)
+    for piece in np.split(values, np.sort(rng.integers(0, n + 1, size=7))):
+        total.add(piece)
+    assert total.total() == np.sum(values)
+
+
+# Chunks far smaller than a class, and repeats of earlier rows in later chunks
+@pytest.mark.parametrize("chunksize", [400, 1_700])
+def test_chunked_run_matches_in_memory_run(tmp_path, monkeypatch, chunksize):
+    monkeypatch.setenv("TRUPRO_TELEMETRY", "")
+    monkeypatch.chdir(tmp_path)
+    roster_file = tmp_path / "phase2_team_rosters.csv"
+    df = make_phase2_rosters(PLAYERS, seed=3)
+    pd.concat([df, df.sample(frac=0.05, random_state=3)], ignore_index=True).to_csv(roster_file, index=False)
+    full_dir, chunked_dir = tmp_path / "in_memory", tmp_path / "chunked"
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_phase3(str(roster_file), str(full_dir))
+        run_phase3(str(roster_file), str(chunked_dir), chunksize=chunksize)
+
+    names = sorted(os.listdir(full_dir))
+    assert names == sorted(os.listdir(chunked_dir)) and len(names) > 1
+    _, mismatched, errors = filecmp.cmpfiles(full_dir, chunked_dir, names, shallow=False)
+    assert not mismatched and not errors
@@ -0,0 +1,65 @@
+import json
+import time
+
+from session_pool import SessionCookies, SessionPool
+
+SIGNED_IN = '<a href="/logout">Log out</a>'
+
+
+class FakeDriver:
+    # A browser whose page shows the logout link only once it has the session cookie
+
+    def __init__(self, live_sessions):
+        self.live_sessions = live_sessions
+        self.cookies = []
+        self.page_source = ""
+
+    def get(self, url):
+        signed_in = any(c["value"] in self.live_sessions for c in self.cookies)
+        self.page_source = SIGNED_IN if signed_in else "<a href='/login'>Log in</a>"
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def quit(self):
+        pass
+
+
+def save_cookie(path, value):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"saved": time.time(), "cookies": [{"name": "sid", "value": value, "domain": "example.com"}]}, f)
+
+
+def start_pool(tmp_path, live_sessions):
+    logins = []
+
+    def log_in(driver):
+        logins.append(driver)
+        driver.cookies = [{"name": "sid", "value": "fresh", "domain": "example.com"}]
+
+    cookies = SessionCookies(path=str(tmp_path / "session.json"), url="https://example.com/")
+    pool = SessionPool(lambda: FakeDriver(live_sessions), log_in, cookies=cookies, spare=False,
+                       signed_in=lambda driver: SIGNED_IN in driver.page_source)
+    return pool, cookies, logins
+
+
+def test_live_restored_session_skips_the_login(tmp_path):
+    pool, cookies, logins = start_pool(tmp_path, {"old"})
+    save_cookie(cookies.path, "old")
+    session = pool._current()
+    assert session.restored and not logins
+    pool.quit()
+
+
+def test_stale_restored_session_logs_in_again(tmp_path):
+    pool, cookies, logins = start_pool(tmp_path, set())
+    save_cookie(cookies.path, "old")
+    session = pool._current()
+    assert not session.restored
+    assert len(logins) == 1
+    # The stale cookie is replaced by the new login's, so the HTTP path uses it too
+    assert cookies.cookie_header("https://example.com/") == "sid=fresh"
+    pool.quit()
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from stub_server import serve, ROUTES
+from team_logos import LogoCache, LOGO_INDEX, fill_logo_files, thumb_size, update_logos
+
+LOGO_ROUTE = "/layout/logos/team-logos/9001.png"
+
+
+@pytest.fixture
+def logo_url():
+    assert LOGO_ROUTE in ROUTES
+    with serve() as (base_url, _):
+        yield base_url + LOGO_ROUTE
+
+
+def test_logo_is_written_as_a_thumbnail(tmp_path, logo_url):
+    cache = LogoCache(str(tmp_path / "logos"))
+    assert update_logos({"9001": logo_url}, cache)["downloaded"] == 1
+    entry = cache.get("9001")
+    assert entry and os.path.isfile(cache.path(entry["thumb"]))
+    # The box it was fitted into, or None where Pillow is missing and the logo is kept as served
+    assert entry["size"] == thumb_size(".png")
+    with open(tmp_path / "logos" / LOGO_INDEX, encoding="utf-8") as f:
+        assert json.load(f)["9001"]["thumb"] == entry["thumb"]
+
+
+def test_unchanged_logo_is_revalidated_not_downloaded(tmp_path, logo_url):
+    cache = LogoCache(str(tmp_path / "logos"))
+    update_logos({"9001": logo_url}, cache)
+    thumb = cache.get("9001")["thumb"]
+    assert update_logos({"9001": logo_url}, cache)["fresh"] == 1
+
+    cache = LogoCache(str(tmp_path / "logos"))
+    assert update_logos({"9001": logo_url}, cache, max_age=0)["not_modified"] == 1
+    assert cache.get("9001")["thumb"] == thumb
+    # Nothing new was written next to the thumbnail
+    assert sorted(os.listdir(tmp_path / "logos")) == sorted([LOGO_INDEX, thumb])
+
+
+def test_team_logo_file_points_at_the_thumbnail(tmp_path, logo_url):
+    logo_dir = str(tmp_path / "logos")
+    update_logos({"9001": logo_url}, LogoCache(logo_dir))
+    roster = tmp_path / "phase2_team_rosters.csv"
+    pd.DataFrame({"Player": ["A", "B", "C"], "EP_Team_ID": ["9001", "9002", "9001"],
+                  "TeamLogoFile": ""}).to_csv(roster, index=False)
+
+    files = fill_logo_files(str(roster), logo_dir)
+    assert list(files) == ["9001"] and os.path.isfile(files["9001"])
+    df = pd.read_csv(roster, dtype=str, keep_default_na=False)
+    assert df["TeamLogoFile"].tolist() == [files["9001"], "", files["9001"]]